@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+"""Memory of loaded user rows: ORM instances vs. NamedTuple DTOs.
+
+Fills an in-memory SQLite users table with `--users` synthetic rows and loads
+them once as `User` instances (`session.query(User).all()`, the previous
+read path) and once as `UserRow` tuples from a column query (what
+`DBManager._rows` does). The size of the loaded result, which the session's
+identity map keeps alive for ORM instances, is measured with tracemalloc.
+No Postgres is needed. Run from the repository root:
+
+    python benchmarks/bench_dto_memory.py [--users 100000]
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from modules.dto import UserRow  # noqa: E402
+from modules.models import GroupType, User  # noqa: E402
+
+USER_COLUMNS = (User.uid, User.uname, User.first_name, User.last_name, User.gid)
+
+
+def fill(engine, count: int) -> None:
+    User.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"uid": 10 ** 8 + i,
+                                     "uname": f'user{i}',
+                                     "first_name": f'First{i}',
+                                     "last_name": f'Last{i}' if i % 3 else None,
+                                     "gid": GroupType.users} for i in range(count)])
+
+
+def measure(engine, load) -> tuple:
+    """Load the rows in a new session; return (row count, MiB held while loaded, seconds)."""
+    gc.collect()
+    with Session(engine) as session:
+        tracemalloc.start()
+        start = perf_counter()
+        rows = load(session)
+        elapsed = perf_counter() - start
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return len(rows), size / 2 ** 20, elapsed
+
+
+def main(count: int) -> None:
+    engine = create_engine('sqlite://')
+    fill(engine, count)
+    cases = [('ORM instances', lambda session: session.query(User).all()),
+             ('NamedTuple DTOs', lambda session: [UserRow._make(row)
+                                                  for row in session.query(*USER_COLUMNS)])]
+    print(f"{count} users")
+    print(f"{'path':<18}{'MiB':>10}{'B/row':>10}{'seconds':>10}")
+    for name, load in cases:
+        rows, mib, seconds = measure(engine, load)
+        print(f"{name:<18}{mib:>10.1f}{mib * 2 ** 20 / rows:>10.0f}{seconds:>10.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100_000)
+    main(parser.parse_args().users)
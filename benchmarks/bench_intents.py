@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""Intent matching time: per-intent substring checks vs. the single-scan IntentMatcher.
+
+Builds a synthetic corpus of group chat messages (mostly small talk, some with
+intent keywords) and matches every message with both methods. The substring
+scan is the baseline approach generalized to all intents: every keyword group
+of every intent is checked with `in`. Run from the repository root:
+
+    python benchmarks/bench_intents.py [--messages 100000] [--intents 4]
+
+`--intents N` repeats the intent table N/4 times with renamed keywords to show
+how both methods scale with the number of intents.
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from modules.intents import IntentMatcher, PLAINTEXT_INTENTS  # noqa: E402
+
+WORDS = ('привет всем кто идёт сегодня на пару завтра дедлайн лаба пицца спасибо норм ок да нет '
+         'когда где что почему ребята созвон встреча проект хакатон команда').split()
+
+
+def scaled_intents(count: int) -> dict:
+    intents = {}
+    for copy in range((count + len(PLAINTEXT_INTENTS) - 1) // len(PLAINTEXT_INTENTS)):
+        suffix = '' if copy == 0 else str(copy)
+        for name, groups in PLAINTEXT_INTENTS.items():
+            if len(intents) < count:
+                intents[name + suffix] = [[k + suffix for k in group] for group in groups]
+    return intents
+
+
+def corpus(intents: dict, count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    keywords = [k for groups in intents.values() for group in groups for k in group]
+    messages = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(3, 25))]
+        for _ in range(rng.choice((0, 0, 0, 1, 2))):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        messages.append(' '.join(words).capitalize())
+    return messages
+
+
+def substring_match(intents: dict, text: str) -> str | None:
+    """The previous approach: lowercase once, then `any(k in text ...)` for every group of every intent."""
+    text = text.lower()
+    for intent, groups in intents.items():
+        if all(any(k in text for k in group) for group in groups):
+            return intent
+    return None
+
+
+def timed(match, messages: list) -> tuple:
+    start = perf_counter()
+    matched = sum(match(m) is not None for m in messages)
+    return (perf_counter() - start) / len(messages) * 1e6, matched
+
+
+def main(count: int, intent_count: int) -> None:
+    intents = scaled_intents(intent_count)
+    messages = corpus(intents, count)
+    matcher = IntentMatcher(intents)
+    keyword_count = sum(len(group) for groups in intents.values() for group in groups)
+    print(f"{count} messages, {len(intents)} intents, {keyword_count} keywords, µs/message")
+    print(f"{'method':<20}{'µs':>8}{'matched':>10}")
+    for name, match in (('substring scan', lambda text: substring_match(intents, text)),
+                        ('IntentMatcher', matcher.match)):
+        micros, matched = timed(match, messages)
+        print(f"{name:<20}{micros:>8.2f}{matched:>10}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=100_000)
+    parser.add_argument('--intents', type=int, default=len(PLAINTEXT_INTENTS))
+    args = parser.parse_args()
+    main(args.messages, args.intents)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+"""Dispatch time per update: aiogram's handler list vs. the hash-indexed UpdateRouter.
+
+Registers `--handlers` text handlers and the same number of callback handlers
+(half exact, half prefix) both ways and dispatches a matched and an unmatched
+update of each type. Run from the repository root:
+
+    python benchmarks/bench_router.py [--handlers 80] [--updates 2000]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tests'))
+
+from aiogram import Bot, Dispatcher  # noqa: E402
+from aiogram.contrib.fsm_storage.memory import MemoryStorage  # noqa: E402
+
+from modules.bot.router import UpdateRouter  # noqa: E402
+from test_router import TOKEN, message_update, callback_update  # noqa: E402
+
+
+async def _noop(obj, **kwargs):
+    pass
+
+
+def build(handlers: int, indexed: bool) -> Dispatcher:
+    bot = Bot(token=TOKEN)
+    dp = Dispatcher(bot, storage=MemoryStorage())
+    Bot.set_current(bot)
+    Dispatcher.set_current(dp)
+    if indexed:
+        router = UpdateRouter(dp)
+        for i in range(handlers):
+            router.register_message_handler(_noop, text=f'Button {i}')
+            if i % 2:
+                router.register_callback_query_handler(_noop, text=f'menu:{i}')
+            else:
+                router.register_callback_query_handler(_noop, text_startswith=f'menu:{i}:')
+    else:
+        for i in range(handlers):
+            dp.register_message_handler(_noop, lambda m, i=i: m.text == f'Button {i}')
+            if i % 2:
+                dp.register_callback_query_handler(_noop, lambda c, i=i: c.data == f'menu:{i}')
+            else:
+                dp.register_callback_query_handler(_noop, lambda c, i=i: c.data.startswith(f'menu:{i}:'))
+    return dp
+
+
+async def measure(dp: Dispatcher, update, count: int) -> float:
+    """Mean dispatch time of `update`, microseconds."""
+    start = perf_counter()
+    for _ in range(count):
+        await dp.process_update(update)
+    return (perf_counter() - start) / count * 1e6
+
+
+async def main(handlers: int, count: int) -> None:
+    last = handlers - 2  # Registered near the end of the list (the worst case for aiogram)
+    cases = [('text, matched', message_update(f'Button {handlers - 1}')),
+             ('text, unmatched', message_update('Hello')),
+             ('callback, exact', callback_update(f'menu:{last + 1}')),
+             ('callback, prefix', callback_update(f'menu:{last}:edit')),
+             ('callback, unmatched', callback_update('other'))]
+    print(f"{handlers} message + {handlers} callback handlers, {count} updates per case, µs/update")
+    print(f"{'case':<22}{'aiogram':>10}{'router':>10}")
+    plain, indexed = build(handlers, False), build(handlers, True)
+    for name, update in cases:
+        print(f"{name:<22}{await measure(plain, update, count):>10.1f}{await measure(indexed, update, count):>10.1f}")
+    await plain.storage.close()
+    await indexed.storage.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--handlers', type=int, default=80)
+    parser.add_argument('--updates', type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.handlers, args.updates))
@@ -15,6 +15,7 @@ from aiogram.contrib.fsm_storage.memory import MemoryStorage
 from aiogram.dispatcher import FSMContext
 from aiogram.types.message import ContentType
 
+import uvicorn
 from fastapi import FastAPI
 # endregion
 
@@ -22,17 +23,22 @@ from fastapi import FastAPI
 from config import log, db
 from config import TELEGRAM_API_TOKEN
 # import modules.bot.tools as bot_tools           # Bot tools
-# from modules import markup as nav           # Bot menus
+from modules import markup as nav           # Bot menus
 from modules import btntext                 # Telegram bot button text
 # from modules import replies                 # Telegram bot information output
 from modules import coworking               # Coworking space information
 from modules import replies                 # Telegram bot information output
+from modules import intents                 # Plaintext message intents
+from modules import api                     # Public read-only HTTP API
 # from modules.models import CoworkingStatus  # Coworking status model
 from modules.bot.help import BotHelpFunctions  # Bot help menu functions
 from modules.bot.coworking import BotCoworkingFunctions  # Bot coworking-related functions
 from modules.bot.scheduled import BotScheduledFunctions  # Bot scheduled functions (recurring)
 from modules.bot.broadcast import BotBroadcastFunctions  # Bot broadcast functions
 from modules.bot.generic import BotGenericFunctions      # Bot generic functions
+from modules.bot.router import UpdateRouter              # Hash-indexed update router
+from modules.bot.middlewares import CallbackAckMiddleware  # Early callback query answers
+from modules.bus import ChangeListener                   # Cache invalidation across processes
 # from modules.bot.states import *
 # from modules.buttons import coworking as cwbtn  # Coworking action buttons (admin)
 # from modules import stickers
@@ -49,12 +55,16 @@ groups_only = lambda message: message.chat.type in ['group', 'supergroup']  # no
 # region Modules
 # Coworking status
 coworking = coworking.Manager(db)
+# Plaintext message intents
+intent_matcher = intents.IntentMatcher(intents.PLAINTEXT_INTENTS)
 # endregion
 
 # region Bot initialization
 # Initialize bot and dispatcher
 bot = Bot(token=TELEGRAM_API_TOKEN)
 dp = Dispatcher(bot, storage=MemoryStorage())
+router = UpdateRouter(dp)
+dp.middleware.setup(CallbackAckMiddleware(log, grace=float(os.getenv('CALLBACK_ACK_GRACE', '0.3'))))
 # endregion
 
 # region Post-bot-init modules
@@ -68,10 +78,11 @@ bot_generic = BotGenericFunctions(bot, db, log)
 
 # region Bot replies
 # region Cancel all states
-@dp.callback_query_handler(lambda c: c.data == 'cancel', state='*')
-@dp.message_handler(state='*', commands=['cancel'])
-@dp.message_handler(lambda message: message.text.lower() == 'cancel' or message.text.lower() == btntext.CANCEL.lower(),
-                    state='*')
+@router.callback_query_handler(text='cancel', state='*')
+@router.message_handler(state='*', commands=['cancel'])
+@router.message_handler(lambda message: message.text.lower() == 'cancel'
+                        or message.text.lower() == btntext.CANCEL.lower(),
+                        state='*')
 async def bot_cancel_handler(cmessage: Union[types.Message, types.CallbackQuery], state: FSMContext):
     """Allow user to cancel any action"""
     log.debug(f"User {cmessage.from_user.id} canceled an action")
@@ -90,7 +101,7 @@ async def bot_cancel_handler(cmessage: Union[types.Message, types.CallbackQuery]
 
 
 # region Credits
-@dp.callback_query_handler(lambda c: c.data == 'bot:credits')
+@router.callback_query_handler(text='bot:credits')
 async def bot_credits(call: types.CallbackQuery) -> None:
     """Send credits"""
     await call.message.edit_text(replies.bot_credits(),
@@ -99,13 +110,13 @@ async def bot_credits(call: types.CallbackQuery) -> None:
 
 
 # region Help
-@dp.message_handler(lambda message: message.text == btntext.HELP_MAIN)
-@dp.message_handler(commands=['help'])
+@router.message_handler(text=btntext.HELP_MAIN)
+@router.message_handler(commands=['help'])
 async def bot_help_menu(message: types.Message):
     await bot_help.main(message)
 
 
-@dp.callback_query_handler(lambda c: c.data == 'coworking:location')
+@router.callback_query_handler(text='coworking:location')
 async def bot_coworking_location(call: types.CallbackQuery) -> None:
     await bot_help.location(call)
 # endregion
@@ -118,32 +129,40 @@ async def answer(message: types.Message) -> None:
     if bot_generic.chat_is_private(message):
         await message.answer(replies.plain_message_pm_answer(),
                              reply_markup=bot_generic.get_main_keyboard(message.from_user.id))
-    if not db.is_uname_set(message.from_user.id):  # TODO: Measure performance hit
+    # Keep usernames and names current (flushed in batches by the write-behind flusher)
+    if not db.sync_user_profile(message.from_user.id,
+                                message.from_user.username,
+                                message.from_user.first_name,
+                                message.from_user.last_name):
         if not bot_generic.chat_is_group(message):
-            if db.does_user_exist(message.from_user.id):
-                db.set_uname(message.from_user.id, message.from_user.username)
-            else:
-                await message.answer(replies.please_click_start())
-    # Menus
-    text_lower = message.text.lower()
-
+            await message.answer(replies.please_click_start())
     # Plaintext message answers — checking db value for ChatSettings.message_answers_enabled
     if bot_generic.chat_is_group(message):
         if not db.get_message_answers_status(message.chat.id):
             log.debug(f"Received a message in a group, but plaintext_message_answers is False for {message.chat.id}")
             return
 
-    if any(word in text_lower for word in ['коворк', 'кв']) and any(word in text_lower for word in ['статус',
-                                                                                                    'открыт',
-                                                                                                    'закрыт']):
-        await message.answer(replies.coworking_status_reply(coworking.get_status(),
-                                                            responsible_uname=db.get_coworking_responsible_uname()),
+    intent = intent_matcher.match(message.text)
+    if intent == intents.COWORKING_STATUS:
+        status = coworking.get_status()
+        await message.answer(replies.coworking_status_reply(status,
+                                                            responsible_uname=db.get_coworking_responsible_uname(),
+                                                            next_change=coworking.predict_next_change(status)),
                              reply_markup=bot_generic.get_main_keyboard(message))
+    elif intent == intents.COWORKING_LOCATION:
+        await message.answer(replies.coworking_location_info())
+    elif intent == intents.CLUBS:
+        await message.answer(replies.club_info_general(),
+                             reply_markup=nav.inlClubsMenu)
+    elif intent == intents.HELP:
+        await message.answer(replies.help_message(),
+                             parse_mode=ParseMode.MARKDOWN)
 # endregion
 
 
 # region FastAPI endpoints
 app = FastAPI()
+app.include_router(api.router)
 
 
 @app.get("/healthz")
@@ -153,20 +172,29 @@ async def health_check():
 
 
 # region Startup functions
-async def aiogram_start_polling():
-    await dp.start_polling()
+class ApiServer(uvicorn.Server):
+    """Uvicorn server that runs in the bot's event loop; signals are left to the aiogram executor."""
+
+    def install_signal_handlers(self) -> None:
+        pass
 
 
-async def run_loop():
-    await asyncio.gather(
-        # Run AIOGram and FastAPI in one event loop
-        aiogram_start_polling(),
-        app.run_task(host='0.0.0.0', port=8000)
-    )
+async def on_shutdown(dispatcher: Dispatcher) -> None:
+    """Write the buffered changes of the last flush interval before exiting."""
+    try:
+        db.flush_pending_writes()
+    except Exception as exc:
+        log.error(f"Error while flushing pending writes on shutdown: {exc}")
 
 
+def api_server() -> ApiServer:
+    return ApiServer(uvicorn.Config(app,
+                                    host=os.getenv('API_HOST', '0.0.0.0'),
+                                    port=int(os.getenv('API_PORT', '8000')),
+                                    log_level='warning'))
 # endregion
 
+
 # region Startup
 def run() -> None:
     loop = asyncio.get_event_loop()
@@ -176,6 +204,12 @@ def run() -> None:
 {os.getenv("COWORKING_CLOSING_TIME", "19:00:00")}', '%Y-%m-%d %H:%M:%S'),
                                                             timeout=int(os.getenv('COWORKING_STATUS_WORKER_TIMEOUT',
                                                                                   '120'))))
+    loop.create_task(bot_scheduled.write_behind_flusher(timeout=int(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', '30'))))
+    # Keep the in-memory caches in sync with other bot processes
+    loop.create_task(ChangeListener(db, log,
+                                    fallback_ttl=float(os.getenv('CACHE_FALLBACK_TTL', '60'))).run())
+    # Run FastAPI and AIOGram in one event loop
+    loop.create_task(api_server().serve())
     log.info('Starting AIOGram...')
 
     # region Message handlers
@@ -189,23 +223,33 @@ def run() -> None:
         chat_mgr, \
         clubs, \
         departments, \
-        navigation
-    start.setup(dp, bot, bot_generic)
-    skills.setup(dp, bot, bot_generic)
-    administration.setup(dp, bot, bot_broadcast, bot_generic)
-    coworking_mut.setup(dp, bot, bot_broadcast, bot_generic, bot_cw)
-    coworking_info.setup(dp, bot, bot_broadcast, bot_generic, bot_cw)
-    user_profile.setup(dp, bot, bot_generic)
-    broadcast_flow.setup(dp, bot, bot_broadcast, bot_generic)
-    chat_mgr.setup(dp, bot, bot_broadcast, bot_generic)
-    clubs.setup(dp, bot, bot_broadcast, bot_generic)
-    departments.setup(dp, bot, bot_generic)
-    navigation.setup(dp, bot, bot_generic)
+        navigation, \
+        teammates
+    start.setup(router, bot, bot_generic)
+    skills.setup(router, bot, bot_generic)
+    administration.setup(router, bot, bot_broadcast, bot_generic)
+    coworking_mut.setup(router, bot, bot_broadcast, bot_generic, bot_cw)
+    coworking_info.setup(router, bot, bot_broadcast, bot_generic, bot_cw)
+    user_profile.setup(router, bot, bot_generic)
+    broadcast_flow.setup(router, bot, bot_broadcast, bot_generic)
+    chat_mgr.setup(router, bot, bot_broadcast, bot_generic)
+    clubs.setup(router, bot, bot_broadcast, bot_generic)
+    departments.setup(router, bot, bot_generic)
+    navigation.setup(router, bot, bot_generic)
+    teammates.setup(router, bot, bot_generic)
     # endregion
 
     # Add plaintext handler
-    dp.register_message_handler(answer, content_types=ContentType.TEXT)
-
-    executor.start_polling(dp, skip_updates=True)
+    router.register_message_handler(answer, content_types=ContentType.TEXT)
+
+    # chat_member updates are not sent by Telegram unless requested explicitly
+    # (inline queries also need inline mode enabled in @BotFather)
+    executor.start_polling(dp, skip_updates=True,
+                           on_shutdown=on_shutdown,
+                           allowed_updates=(types.AllowedUpdates.MESSAGE
+                                            | types.AllowedUpdates.CALLBACK_QUERY
+                                            | types.AllowedUpdates.INLINE_QUERY
+                                            | types.AllowedUpdates.CHAT_MEMBER
+                                            | types.AllowedUpdates.MY_CHAT_MEMBER))
     log.info('AIOgram stopped successfully')
 # endregion
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+
+"""Coworking occupancy analytics.
+
+The coworking status log is turned into intervals (each status lasts until
+the next entry, found with LEAD over time) that are split per hour with
+generate_series and summed into the coworking_rollups table
+(UTC day, UTC hour, status -> seconds). The rollups are built once from
+the log and then extended by one interval on every status change, so
+reports never replay the log. The weekday x hour heatmap is computed
+from the rollups with NumPy.
+
+Open/close transitions of the log are kept as per-weekday histograms of
+the local time of day (TransitionForecast); they are loaded once and
+extended on every status change, so the usual next opening or closing
+time can be shown without a query.
+"""
+import io
+from datetime import date, datetime, time, timedelta
+from os import getenv
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.ticker import PercentFormatter
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from modules.models import CoworkingRollup, CoworkingStatus
+
+OPEN_STATUSES = (CoworkingStatus.open, CoworkingStatus.event_open)
+# Reports are shown in local time; rollups are stored in UTC whole hours
+DISPLAY_UTC_OFFSET = int(getenv('COWORKING_DISPLAY_UTC_OFFSET', '3'))
+
+# region SQL
+_ROLLUP_INTERVALS = """
+INSERT INTO coworking_rollups (day, hour, status, seconds)
+SELECT hour_start::date,
+       extract(hour FROM hour_start)::int,
+       status,
+       sum(extract(epoch FROM least(stop, hour_start + interval '1 hour') - greatest(start, hour_start)))
+FROM (SELECT status, start, stop,
+             generate_series(date_trunc('hour', start), stop - interval '1 microsecond', interval '1 hour')
+                 AS hour_start
+      FROM ({intervals}) AS intervals
+      WHERE stop > start) AS hours
+GROUP BY 1, 2, 3
+ON CONFLICT (day, hour, status) DO UPDATE SET seconds = coworking_rollups.seconds + excluded.seconds
+"""
+
+_LOG_INTERVALS = """
+SELECT status, time AS start, lead(time) OVER (ORDER BY time, id) AS stop
+FROM coworking_status
+"""
+
+_SINGLE_INTERVAL = """
+SELECT CAST(:status AS integer) AS status, CAST(:start AS timestamp) AS start, CAST(:stop AS timestamp) AS stop
+"""
+
+_OPEN_PER_LOCAL_HOUR = """
+SELECT day + make_interval(hours => hour + :offset) AS local_hour, sum(seconds) AS seconds
+FROM coworking_rollups
+WHERE status IN :statuses
+GROUP BY 1
+"""
+
+_OPEN_TRANSITIONS = """
+SELECT time, is_open
+FROM (SELECT time, status IN :statuses AS is_open,
+             lag(status IN :statuses) OVER (ORDER BY time, id) AS was_open
+      FROM coworking_status) AS log
+WHERE was_open IS DISTINCT FROM is_open
+"""
+# endregion
+
+
+class OccupancyReport(NamedTuple):
+    """Open time per local day and per local (ISO weekday, hour)."""
+    per_day: List[Tuple[date, float]]               # Seconds open, oldest day first
+    per_weekday_hour: Dict[Tuple[int, int], float]  # Share of the hour the coworking was open (0..1)
+    since: date
+
+
+def rebuild_rollups(session: Session) -> None:
+    """Rebuild the rollups from the whole status log (does not commit)."""
+    session.query(CoworkingRollup).delete(synchronize_session=False)
+    session.execute(text(_ROLLUP_INTERVALS.format(intervals=_LOG_INTERVALS)))
+
+
+def rollup_interval(session: Session, status: CoworkingStatus, start: datetime, stop: datetime) -> None:
+    """Add a finished status interval to the rollups (does not commit)."""
+    session.execute(text(_ROLLUP_INTERVALS.format(intervals=_SINGLE_INTERVAL)),
+                    {"status": int(status), "start": start, "stop": stop})
+
+
+def _split_hours(start: datetime, stop: datetime) -> Dict[datetime, float]:
+    """Split an interval into seconds per whole hour."""
+    hours = {}
+    hour = start.replace(minute=0, second=0, microsecond=0)
+    while hour < stop:
+        hours[hour] = (min(stop, hour + timedelta(hours=1)) - max(start, hour)).total_seconds()
+        hour += timedelta(hours=1)
+    return hours
+
+
+def occupancy_report(session: Session, days: int = 7,
+                     current: Tuple[CoworkingStatus, datetime] | None = None) -> OccupancyReport:
+    """Get the open time of the last `days` days and the weekday/hour open shares of all history.
+
+    `current` is the status that is still in progress and its start; it is not in the rollups yet."""
+    now = datetime.utcnow()
+    offset = timedelta(hours=DISPLAY_UTC_OFFSET)
+    seconds: Dict[datetime, float] = {}
+    for local_hour, secs in session.execute(text(_OPEN_PER_LOCAL_HOUR),
+                                            {"offset": DISPLAY_UTC_OFFSET,
+                                             "statuses": tuple(int(s) for s in OPEN_STATUSES)}):
+        seconds[local_hour] = float(secs)
+    if current is not None and current[0] in OPEN_STATUSES:
+        for hour, secs in _split_hours(current[1], now).items():
+            seconds[hour + offset] = seconds.get(hour + offset, 0.0) + secs
+    today = (now + offset).date()
+    since = today - timedelta(days=days - 1)
+    per_day = {since + timedelta(days=i): 0.0 for i in range(days)}
+    totals: Dict[Tuple[int, int], float] = {}
+    for local_hour, secs in seconds.items():
+        if local_hour.date() in per_day:
+            per_day[local_hour.date()] += secs
+        key = (local_hour.isoweekday(), local_hour.hour)
+        totals[key] = totals.get(key, 0.0) + secs
+    # Number of times each weekday occurred since the first recorded hour
+    first_day = min(seconds).date() if seconds else today
+    weekdays = {d: 0 for d in range(1, 8)}
+    for i in range((today - first_day).days + 1):
+        weekdays[(first_day + timedelta(days=i)).isoweekday()] += 1
+    per_weekday_hour = {key: min(1.0, secs / (3600 * max(1, weekdays[key[0]])))
+                        for key, secs in totals.items()}
+    return OccupancyReport(sorted(per_day.items()), per_weekday_hour, since)
+
+
+def local_today() -> date:
+    """Get the current date in the display time zone."""
+    return (datetime.utcnow() + timedelta(hours=DISPLAY_UTC_OFFSET)).date()
+
+
+def occupancy_heatmap(session: Session) -> np.ndarray:
+    """Get the share of days the coworking was open at each local (weekday, hour) as a 7x24 array (Monday first)."""
+    rows = session.execute(text(_OPEN_PER_LOCAL_HOUR),
+                           {"offset": DISPLAY_UTC_OFFSET,
+                            "statuses": tuple(int(s) for s in OPEN_STATUSES)}).all()
+    heatmap = np.zeros((7, 24))
+    if not rows:
+        return heatmap
+    local_hours = np.array([row[0] for row in rows], dtype='datetime64[h]')
+    seconds = np.fromiter((row[1] for row in rows), dtype=float, count=len(rows))
+    days = local_hours.astype('datetime64[D]')
+    # 1970-01-01 was a Thursday
+    weekdays = (days.astype(np.int64) + 3) % 7
+    hours = (local_hours - days).astype(np.int64)
+    np.add.at(heatmap, (weekdays, hours), seconds)
+    # Number of times each weekday occurred since the first recorded day
+    span = np.arange(days.min(), np.datetime64(local_today(), 'D') + 1)
+    weekday_counts = np.bincount((span.astype(np.int64) + 3) % 7, minlength=7)
+    return np.clip(heatmap / (3600 * np.maximum(weekday_counts, 1))[:, None], 0, 1)
+
+
+def best_time(heatmap: np.ndarray, weekday: int) -> Tuple[int, int, int, float] | None:
+    """Get (start hour, end hour, peak hour, peak share) of the usual opening hours of an ISO weekday.
+
+    The usual opening hours are the longest run of hours that are open on at least half of the days."""
+    row = heatmap[weekday - 1]
+    is_open = np.concatenate(([False], row >= 0.5, [False]))
+    edges = np.flatnonzero(np.diff(is_open.astype(np.int8)))
+    if edges.size == 0:
+        return None
+    starts, ends = edges[::2], edges[1::2]
+    longest = np.argmax(ends - starts)
+    start, end = int(starts[longest]), int(ends[longest])
+    peak = start + int(np.argmax(row[start:end]))
+    return start, end, peak, float(row[peak])
+
+
+def render_heatmap_png(heatmap: np.ndarray) -> bytes:
+    """Render the weekday x hour heatmap to a PNG image."""
+    fig = Figure(figsize=(9, 3.6), dpi=120)
+    ax = fig.subplots()
+    image = ax.imshow(heatmap, cmap='Greens', vmin=0, vmax=1, aspect='auto')
+    ax.set_yticks(range(7), ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс'])
+    ax.set_xticks(range(0, 24, 2), [f'{h:02}' for h in range(0, 24, 2)])
+    ax.set_xlabel(f'Час (UTC{DISPLAY_UTC_OFFSET:+d})')
+    ax.set_title('Вероятность, что коворкинг открыт')
+    fig.colorbar(image, ax=ax, format=PercentFormatter(1.0))
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png')
+    return buf.getvalue()
+
+
+def open_transitions(session: Session) -> List[Tuple[datetime, bool]]:
+    """Get (UTC time, is open) of every log entry where the coworking opened or closed."""
+    return [(row.time, row.is_open) for row in
+            session.execute(text(_OPEN_TRANSITIONS),
+                            {"statuses": tuple(int(s) for s in OPEN_STATUSES)})]
+
+
+class TransitionForecast:
+    """Per-weekday histograms of the local times the coworking opens and closes."""
+    BIN_MINUTES = 15
+
+    def __init__(self, min_samples: int = 3):
+        """Initialize empty histograms; a forecast needs at least `min_samples` transitions."""
+        self.min_samples = min_samples
+        self._bins = {is_open: np.zeros((7, 24 * 60 // self.BIN_MINUTES), dtype=np.int64)
+                      for is_open in (True, False)}
+
+    def load(self, transitions: Iterable[Tuple[datetime, bool]]) -> None:
+        """Replace the histograms with (UTC time, is open) transitions."""
+        for bins in self._bins.values():
+            bins[:] = 0
+        for moment, is_open in transitions:
+            self.add(moment, is_open)
+
+    def add(self, moment: datetime, is_open: bool) -> None:
+        """Count a transition to open (is_open) or closed at a UTC time."""
+        local = moment + timedelta(hours=DISPLAY_UTC_OFFSET)
+        self._bins[is_open][local.weekday(), (local.hour * 60 + local.minute) // self.BIN_MINUTES] += 1
+
+    def next_change(self, is_open: bool, now: datetime | None = None) -> time | None:
+        """Get the usual local time the coworking opens (if closed) or closes (if open) later today.
+
+        This is the median of the transitions recorded later in the day on the same weekday."""
+        local = (now or datetime.utcnow()) + timedelta(hours=DISPLAY_UTC_OFFSET)
+        first_bin = (local.hour * 60 + local.minute) // self.BIN_MINUTES + 1
+        later = self._bins[not is_open][local.weekday(), first_bin:]
+        total = int(later.sum())
+        if total < self.min_samples:
+            return None
+        minutes = (first_bin + int(np.searchsorted(np.cumsum(later), (total + 1) // 2))) * self.BIN_MINUTES
+        return time(minutes // 60, minutes % 60)
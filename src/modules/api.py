@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+"""Public read-only HTTP API (routes of the bot's FastAPI app).
+
+Responses are served from the in-memory coworking snapshot with strong
+ETags, so polling clients cost no database queries and get an empty 304
+while the status has not changed. Clients that want changes pushed can
+long-poll (/coworking/status/poll) or subscribe to Server-Sent Events
+(/coworking/status/stream); both wait on the snapshot's change event.
+"""
+# region Regular dependencies
+from os import getenv
+from time import monotonic
+from typing import AsyncIterator
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import StreamingResponse
+# endregion
+
+# region Local dependencies
+from config import db
+from modules.snapshot import Encoded
+# endregion
+
+STATUS_MAX_AGE = int(getenv('API_STATUS_MAX_AGE', '15'))
+HISTORY_MAX_AGE = int(getenv('API_HISTORY_MAX_AGE', '60'))
+LONG_POLL_TIMEOUT = float(getenv('API_LONG_POLL_TIMEOUT', '30'))
+SSE_KEEPALIVE = float(getenv('API_SSE_KEEPALIVE', '15'))
+
+router = APIRouter(prefix='/coworking')
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, as RFC 7232 requires)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+def _cached_json(request: Request, encoded: Encoded | None, max_age: int) -> Response:
+    """Respond with a pre-encoded JSON body or 304 if the client has it already."""
+    if encoded is None:
+        return Response(status_code=503, headers={'Retry-After': '5'})
+    headers = {'ETag': encoded.etag,
+               'Cache-Control': f'public, max-age={max_age}',
+               'Access-Control-Allow-Origin': '*'}
+    if _etag_matches(request.headers.get('if-none-match'), encoded.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(encoded.body, media_type='application/json', headers=headers)
+
+
+@router.get('/status')
+async def coworking_status(request: Request) -> Response:
+    """Current coworking status."""
+    return _cached_json(request, db.coworking_snapshot.status_json, STATUS_MAX_AGE)
+
+
+@router.get('/history')
+async def coworking_history(request: Request) -> Response:
+    """Latest coworking status transitions, newest first."""
+    return _cached_json(request, db.coworking_snapshot.history_json, HISTORY_MAX_AGE)
+
+
+@router.get('/status/poll')
+async def coworking_status_poll(request: Request, timeout: float = LONG_POLL_TIMEOUT) -> Response:
+    """Current coworking status; waits up to `timeout` seconds while it matches If-None-Match."""
+    snapshot = db.coworking_snapshot
+    if_none_match = request.headers.get('if-none-match')
+    deadline = monotonic() + min(max(timeout, 0), LONG_POLL_TIMEOUT)
+    while snapshot.status_json is not None and _etag_matches(if_none_match, snapshot.status_json.etag):
+        remaining = deadline - monotonic()
+        if remaining <= 0 or not await snapshot.wait(remaining):
+            break
+    response = _cached_json(request, snapshot.status_json, 0)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+async def _status_events(last_event_id: str | None) -> AsyncIterator[bytes]:
+    """Yield the current status and then every change as SSE events; comment lines keep the connection alive."""
+    snapshot = db.coworking_snapshot
+    sent = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    yield b'retry: 5000\n\n'  # Reconnect delay, ms
+    while True:
+        state, encoded = snapshot.state, snapshot.status_json
+        if state is not None and encoded is not None and state.version != sent:
+            sent = state.version
+            yield b'id: %d\nevent: status\ndata: %s\n\n' % (state.version, encoded.body)
+        if not await snapshot.wait(SSE_KEEPALIVE):
+            yield b': keepalive\n\n'
+
+
+@router.get('/status/stream')
+async def coworking_status_stream(request: Request) -> StreamingResponse:
+    """Server-Sent Events stream of the coworking status (resumes from Last-Event-ID)."""
+    return StreamingResponse(_status_events(request.headers.get('last-event-id')),
+                             media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-store',
+                                      'X-Accel-Buffering': 'no',
+                                      'Access-Control-Allow-Origin': '*'})
@@ -3,13 +3,14 @@
 """Bot coworking-related functions."""
 # CYCLE NOTICE: Used in . scheduled.py; . coworking.py
 
-from typing import List, Any
+from typing import Any, Iterable
 # from typing import Union
 # from aiogram import types
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.types.message import ParseMode
 from aiogram.types import ContentType
 from aiogram import Bot
+from aiogram.utils.exceptions import BotBlocked, ChatNotFound, UserDeactivated
 
 # from modules import btntext, replies
 from modules.db import CoworkingStatus, DBManager
@@ -30,7 +31,7 @@ class BotBroadcastFunctions:
 
     async def broadcast(self, content: str, scope: str,  # noqa: C901
                         media_type: str,
-                        custom_scope: list | None = None,
+                        custom_scope: Iterable[int] | None = None,
                         is_html: bool | None = None,
                         media: str | None = None) -> None:
         """Broadcast message to all chats (handles multiple media types)."""
@@ -41,56 +42,57 @@ class BotBroadcastFunctions:
                 and media_type != ContentType.TEXT):  # noqa: W503
             raise ValueError("Media is not specified")
         custom_keyboard: InlineKeyboardMarkup | None = None
+        if media is not None and media_type not in [ContentType.PHOTO, ContentType.VIDEO,
+                                                    ContentType.VIDEO_NOTE]:
+            raise ValueError("Invalid media type")
         if custom_scope:
             chat_ids = custom_scope
-        elif scope == 'all':
-            chat_ids = self.db.get_all_chats()
-        elif scope == 'admins':
-            chat_ids = self.db.get_admin_chats()
-        elif scope == 'users':
-            chat_ids = self.db.get_user_chats()
         else:
-            raise ValueError("Invalid scope")
-        self.log.debug(f"Broadcasting message to \
-{len(chat_ids)} chats: {chat_ids}")
-        if media is None and media_type != ContentType.TEXT:
-            raise ValueError("Media is not specified")
+            # Streamed in batches; raises ValueError for unknown segments
+            chat_ids = self.db.iter_segment_chats(scope)
+        self.log.debug(f"Broadcasting message to scope {scope}")
         if media is None:
-            await self._send_text_broadcast(content,
-                                            chat_ids,
-                                            is_html=is_html,
-                                            custom_keyboard=custom_keyboard)
-            return
-        if media_type in [ContentType.PHOTO, ContentType.VIDEO,
-                          ContentType.VIDEO_NOTE]:
-            await self._send_media_broadcast(content,
-                                             media,
-                                             media_type,  # type: ignore
-                                             chat_ids,
-                                             is_html=is_html,
-                                             custom_keyboard=custom_keyboard)
-            return
-        raise ValueError("Invalid media type")
+            sent = await self._send_text_broadcast(content,
+                                                   chat_ids,
+                                                   is_html=is_html,
+                                                   custom_keyboard=custom_keyboard)
+        else:
+            sent = await self._send_media_broadcast(content,
+                                                    media,
+                                                    media_type,  # type: ignore
+                                                    chat_ids,
+                                                    is_html=is_html,
+                                                    custom_keyboard=custom_keyboard)
+        self.log.debug(f"Broadcast to scope {scope} sent to {sent} chats")
+
+    def _send_failed(self, cid: int, exc: Exception) -> None:
+        """Log a failed broadcast message; exclude chats that cannot be reached from segments."""
+        if isinstance(exc, (BotBlocked, ChatNotFound, UserDeactivated)):
+            self.db.mark_unreachable(cid)
+        self.log.debug(f"Failed to send broadcast message to chat {cid}: \
+{exc}; user probably blocked the bot")
 
     async def _send_text_broadcast(self, content: str,
-                                   chat_ids: List[int],
+                                   chat_ids: Iterable[int],
                                    is_html: bool | None = None,
-                                   custom_keyboard: InlineKeyboardMarkup | None = None):
+                                   custom_keyboard: InlineKeyboardMarkup | None = None) -> int:
+        sent = 0
         for cid in chat_ids:
             try:
                 await self.bot.send_message(cid, content,
                                             parse_mode=ParseMode.HTML if is_html else None,
                                             reply_markup=custom_keyboard)
+                sent += 1
             except Exception as exc:
-                self.log.debug(f"Failed to send broadcast message to chat \
-{cid}: {exc}; user probably blocked the bot")
+                self._send_failed(cid, exc)
+        return sent
 
     async def _send_media_broadcast(self, caption: str,
                                     media: str,
                                     media_type: str,
-                                    chat_ids: List[int],
+                                    chat_ids: Iterable[int],
                                     is_html: bool | None = None,
-                                    custom_keyboard: InlineKeyboardMarkup | None = None):
+                                    custom_keyboard: InlineKeyboardMarkup | None = None) -> int:
         send_func: Any | None = None
         _ = send_func  # Linter error: unused variable
         match media_type:
@@ -102,55 +104,60 @@ class BotBroadcastFunctions:
                 send_func = self._send_video_note
             case _:
                 raise ValueError("Invalid media type")
+        sent = 0
         for cid in chat_ids:
-            await send_func(cid, media, caption=caption,
-                            is_html=is_html,
-                            custom_keyboard=custom_keyboard)
+            sent += await send_func(cid, media, caption=caption,
+                                    is_html=is_html,
+                                    custom_keyboard=custom_keyboard)
+        return sent
 
     async def _send_photo(self, cid: int,
                           photo: str,
                           caption: str | None = None,
                           is_html: bool | None = None,
-                          custom_keyboard: InlineKeyboardMarkup | None = None):
+                          custom_keyboard: InlineKeyboardMarkup | None = None) -> bool:
         try:
             await self.bot.send_photo(cid,
                                       photo,
                                       caption=caption,
                                       parse_mode=ParseMode.HTML if is_html else None,
                                       reply_markup=custom_keyboard)
+            return True
         except Exception as exc:
-            self.log.debug(f"Failed to send broadcast message to chat {cid}: \
-{exc}; user probably blocked the bot")
+            self._send_failed(cid, exc)
+            return False
 
     async def _send_video(self,
                           cid: int,
                           video: str,
                           caption: str | None = None,
                           is_html: bool | None = None,
-                          custom_keyboard: InlineKeyboardMarkup | None = None):
+                          custom_keyboard: InlineKeyboardMarkup | None = None) -> bool:
         try:
             await self.bot.send_video(cid,
                                       video,
                                       caption=caption,
                                       parse_mode=ParseMode.HTML if is_html else None,
                                       reply_markup=custom_keyboard)
+            return True
         except Exception as exc:
-            self.log.debug(f"Failed to send broadcast message to chat {cid}: \
-{exc}; user probably blocked the bot")
+            self._send_failed(cid, exc)
+            return False
 
     async def _send_video_note(self, cid: int,
                                video_note: str,
                                caption: str | None = None,
                                is_html: bool | None = None,
-                               custom_keyboard: InlineKeyboardMarkup | None = None):
+                               custom_keyboard: InlineKeyboardMarkup | None = None) -> bool:
         _ = caption
         _ = is_html
         _ = custom_keyboard  # Do not send custom keyboards with video notes
         try:
             await self.bot.send_video_note(cid, video_note)
+            return True
         except Exception as exc:
-            self.log.debug(f"Failed to send broadcast message to chat {cid}: \
-{exc}; user probably blocked the bot")
+            self._send_failed(cid, exc)
+            return False
 
     async def coworking(self,
                         status: CoworkingStatus,
@@ -2,14 +2,17 @@
 
 """Bot coworking-related functions."""
 
-# import asyncio
-from typing import Union
+import asyncio
+from datetime import date
+from io import BytesIO
+from typing import NamedTuple, Union
 from aiogram import types
+from aiogram.types import InputFile
 from aiogram.types import InlineKeyboardMarkup as InlKbMarkup
 from aiogram.types import InlineKeyboardButton as InlKbBtn
 # from aiogram.types.message import ParseMode
 
-from modules import btntext, replies
+from modules import analytics, btntext, replies
 # from modules import coworking
 from modules.db import CoworkingStatus
 from modules.coworking import Manager as CoworkingManager
@@ -17,6 +20,14 @@ from modules.buttons import coworking as cwbtn  # Coworking action buttons
 from modules.bot.broadcast import BotBroadcastFunctions
 
 
+class _Heatmap(NamedTuple):
+    """Heatmap rendered for one local day."""
+    day: date
+    png: bytes
+    caption: str
+    file_id: str | None = None  # Telegram file_id after the first upload
+
+
 class BotCoworkingFunctions:
     """Bot coworking-related methods."""
 
@@ -27,6 +38,34 @@ class BotCoworkingFunctions:
         self.cwman = CoworkingManager(db)
         self.log = log
         self.broadcast = BotBroadcastFunctions(bot, db, log)
+        self._heatmap: _Heatmap | None = None
+        self._heatmap_lock = asyncio.Lock()
+
+    async def _get_heatmap(self) -> _Heatmap:
+        """Get today's heatmap; it is computed and rendered once per local day."""
+        today = analytics.local_today()
+        async with self._heatmap_lock:
+            if self._heatmap is None or self._heatmap.day != today:
+                heatmap = self.db.get_coworking_heatmap()
+                # Rendering takes a while, keep it off the event loop
+                png = await asyncio.get_running_loop().run_in_executor(None, analytics.render_heatmap_png,
+                                                                       heatmap)
+                weekday = today.isoweekday()
+                self._heatmap = _Heatmap(today, png,
+                                         replies.coworking_best_time(weekday,
+                                                                     analytics.best_time(heatmap, weekday)))
+            return self._heatmap
+
+    async def send_heatmap(self, chat_id: int) -> None:
+        """Send the occupancy heatmap with the best time to come today."""
+        heatmap = await self._get_heatmap()
+        if heatmap.file_id is not None:
+            await self.bot.send_photo(chat_id, heatmap.file_id, caption=heatmap.caption)
+            return
+        message = await self.bot.send_photo(chat_id, InputFile(BytesIO(heatmap.png), 'coworking.png'),
+                                            caption=heatmap.caption)
+        if self._heatmap is not None and self._heatmap.day == heatmap.day:
+            self._heatmap = self._heatmap._replace(file_id=message.photo[-1].file_id)
 
     def get_admin_markup(self, cmessage: Union[types.CallbackQuery, types.Message]) -> InlKbMarkup:
         """Get admin markup for coworking status buttons."""
@@ -71,6 +110,8 @@ class BotCoworkingFunctions:
         markup.add(cwbtn.inl_location_short)
         markup.add(InlKbBtn(replies.toggle_coworking_notifications(notifications_on),
                             callback_data='coworking:toggle_notifications'))
+        markup.add(InlKbBtn(btntext.INL_COWORKING_BEST_TIME,
+                            callback_data='coworking:best_time'))
         markup.add(InlKbBtn(btntext.INL_COWORKING_STATUS_EXPLAIN,
                             callback_data='coworking:status:explain'))
         return markup
@@ -21,3 +21,33 @@ def callback_query_handler(*args, **kwargs):
         func._handlers.append(('callback_query', args, kwargs))
         return func
     return wrapper
+
+
+def chat_member_handler(*args, **kwargs):
+    # noinspection PyProtectedMember
+    def wrapper(func):
+        if not hasattr(func, '_handlers'):
+            func._handlers = []
+        func._handlers.append(('chat_member', args, kwargs))
+        return func
+    return wrapper
+
+
+def my_chat_member_handler(*args, **kwargs):
+    # noinspection PyProtectedMember
+    def wrapper(func):
+        if not hasattr(func, '_handlers'):
+            func._handlers = []
+        func._handlers.append(('my_chat_member', args, kwargs))
+        return func
+    return wrapper
+
+
+def inline_query_handler(*args, **kwargs):
+    # noinspection PyProtectedMember
+    def wrapper(func):
+        if not hasattr(func, '_handlers'):
+            func._handlers = []
+        func._handlers.append(('inline_query', args, kwargs))
+        return func
+    return wrapper
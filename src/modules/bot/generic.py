@@ -60,9 +60,16 @@ class BotGenericFunctions:
     async def send_long_message(self, chat_id, message_text):
         # check if the message length is greater than the maximum allowed by Telegram
         if len(message_text) > constants.MAX_MESSAGE_LENGTH:
-            # split the message into parts
-            message_parts = [message_text[i:i + constants.MAX_MESSAGE_LENGTH] for i in
-                             range(0, len(message_text), constants.MAX_MESSAGE_LENGTH)]
+            # split the message into parts, at line breaks where possible
+            message_parts = []
+            while len(message_text) > constants.MAX_MESSAGE_LENGTH:
+                split_at = message_text.rfind('\n', 0, constants.MAX_MESSAGE_LENGTH + 1)
+                if split_at <= 0:
+                    split_at = constants.MAX_MESSAGE_LENGTH
+                message_parts.append(message_text[:split_at])
+                message_text = message_text[split_at:].lstrip('\n')
+            if message_text:
+                message_parts.append(message_text)
 
             # send each part of the message
             for part in message_parts:
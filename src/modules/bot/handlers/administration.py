@@ -6,7 +6,7 @@
 import io
 import csv
 from typing import Union
-from aiogram import Bot, Dispatcher
+from aiogram import Bot
 from aiogram import types
 from aiogram.types.message import ParseMode
 from aiogram.dispatcher import FSMContext
@@ -21,9 +21,12 @@ from modules import btntext
 from modules.coworking import Manager as CoworkingManager
 from modules import replies
 from modules.db import DBManager
+from modules.dto import UserPage
+from modules.models import GroupType, Skill
 from modules.bot.broadcast import BotBroadcastFunctions
 from modules.bot.generic import BotGenericFunctions
 from modules.bot.states import AdminChangeUserGroup, AdminGetObjectId
+from modules.bot.router import UpdateRouter
 from modules.bot import decorators as dp  # Bot decorators
 from modules import markup as nav
 from modules import constants
@@ -44,9 +47,9 @@ groups_only = lambda message: message.chat.type in ['group', 'supergroup']  # no
 # endregion
 
 
-@dp.message_handler(admin_only, lambda message: message.text == btntext.ADMIN_BTN)
+@dp.message_handler(admin_only, text=btntext.ADMIN_BTN)
 @dp.message_handler(admin_only, commands=['admin'])
-@dp.callback_query_handler(admin_only, lambda c: c.data in ['admin:panel', 'admin:panel:override'])
+@dp.callback_query_handler(admin_only, text=['admin:panel', 'admin:panel:override'])
 async def admin_panel(msg: Union[types.Message, types.CallbackQuery]):
     """Send admin panel."""
     user_id = msg.from_user.id
@@ -86,7 +89,7 @@ async def get_notif_db(message: types.Message):
         await message.answer("Nothing to show here")
 
 
-@dp.callback_query_handler(lambda c: c.data == 'admin:stats')
+@dp.callback_query_handler(text='admin:stats')
 async def get_stats(call: types.CallbackQuery) -> None:
     """Get bot statistics for administration."""
     await call.answer()
@@ -107,7 +110,7 @@ async def get_stats(call: types.CallbackQuery) -> None:
         return
 
 
-@dp.callback_query_handler(lambda c: c.data == 'change_user_group')
+@dp.callback_query_handler(text='change_user_group')
 async def change_user_group_stage0(call: types.CallbackQuery, state: FSMContext) -> None:
     """Change user group, stage 0."""
     await call.answer()
@@ -202,14 +205,80 @@ async def fix_group_keyboards(msg: types.Message):
     await msg.answer("Done")
 
 
+# region User list
+USERS_PAGE_SIZE = 20
+
+
+def users_page_callback(direction: str, uid: int, gid: int | None, skill: Skill | None) -> str:
+    """Encode a page request (n: after uid, p: before uid) and the filters."""
+    return (f"admin:users:{direction}:{uid}:"
+            f"{int(gid) if gid is not None else '-'}:{skill.name if skill is not None else '-'}")
+
+
+def render_users_page(page: UserPage, gid: int | None, skill: Skill | None):
+    """Get the text and navigation keyboard of a user list page."""
+    filters = ', '.join(f for f in (GroupType(gid).name if gid is not None else None,
+                                    str(skill) if skill is not None else None) if f)
+    lines = [f"{u.first_name} {u.last_name if u.last_name else ''} "
+             f"@{u.uname if u.uname else '—'} [{u.uid}]" for u in page.users]
+    text = (f"Пользователи{f' ({filters})' if filters else ''}:\n\n"
+            + ("\n".join(lines) if lines else "Пусто"))
+    keyboard = InlineKeyboardMarkup()
+    buttons = []
+    if page.has_prev and page.users:
+        buttons.append(InlineKeyboardButton('⬅️', callback_data=users_page_callback('p', page.users[0].uid,
+                                                                                    gid, skill)))
+    if page.has_next and page.users:
+        buttons.append(InlineKeyboardButton('➡️', callback_data=users_page_callback('n', page.users[-1].uid,
+                                                                                    gid, skill)))
+    if buttons:
+        keyboard.row(*buttons)
+    return text, keyboard
+
+
 @dp.message_handler(commands=['get_users'])
 async def get_users(msg: types.Message):
-    """Get user info."""
+    """Get user info (paginated; `/get_users <group or skill>` filters the list)."""
     if msg.from_user.id not in [1989957381, 232200895, 201667444]:
         await msg.answer(replies.admin_panel_access_denied())
         log.info(f"User {msg.from_user.id} tried to open the admin panel; denied access")
         return
-    await bot_generic.send_long_message(msg.from_user.id, db.get_users_str())
+    gid, skill = None, None
+    for arg in msg.get_args().split():
+        if arg in GroupType.__members__:
+            gid = GroupType[arg]
+        elif arg in Skill.__members__:
+            skill = Skill[arg]
+        else:
+            await msg.answer(f"Неизвестный фильтр: {arg}\n"
+                             f"Группы: {', '.join(GroupType.__members__)}\n"
+                             f"Навыки: {', '.join(Skill.__members__)}")
+            return
+    page = db.get_users_page(gid=gid, skill=skill, limit=USERS_PAGE_SIZE)
+    text, keyboard = render_users_page(page, gid, skill)
+    await msg.answer(text, reply_markup=keyboard)
+
+
+@dp.callback_query_handler(text_startswith='admin:users:')
+async def get_users_page(call: types.CallbackQuery):
+    """Turn the page of the user list."""
+    if call.from_user.id not in [1989957381, 232200895, 201667444]:
+        await call.answer(replies.admin_panel_access_denied())
+        return
+    await call.answer()
+    _, _, direction, uid, gid, skill = call.data.split(':')
+    gid = GroupType(int(gid)) if gid != '-' else None
+    skill = Skill[skill] if skill != '-' else None
+    if direction == 'p':
+        page = db.get_users_page(before_uid=int(uid), gid=gid, skill=skill, limit=USERS_PAGE_SIZE)
+    else:
+        page = db.get_users_page(after_uid=int(uid), gid=gid, skill=skill, limit=USERS_PAGE_SIZE)
+    text, keyboard = render_users_page(page, gid, skill)
+    try:
+        await call.message.edit_text(text, reply_markup=keyboard)
+    except MessageNotModified:
+        pass
+# endregion
 
 
 @dp.message_handler(commands=['get_users_verbose'])
@@ -232,7 +301,7 @@ async def get_users_verbose(msg: types.Message):
                              user[1].email if user[1].email is not None else '',
                              user[0].first_name,
                              user[0].last_name if user[0].last_name is not None else '',
-                             ', '.join([str(skill.skill) for skill in user[2]])]
+                             ', '.join([str(skill) for skill in user[2]])]
                             )
     csv_file.seek(0)
     await bot.send_document(msg.from_user.id, ('user_list.csv', csv_file), caption='User list')
@@ -274,7 +343,7 @@ async def reply_with_id(message: types.Message):
 
 
 # noinspection PyProtectedMember
-def setup(dispatcher: Dispatcher,
+def setup(dispatcher: UpdateRouter,
           bot_obj: Bot,
           broadcast: BotBroadcastFunctions,
           generic: BotGenericFunctions):
@@ -6,7 +6,7 @@ import logging
 import asyncio
 # from datetime import datetime
 from typing import Union
-from aiogram import Bot, Dispatcher
+from aiogram import Bot
 from aiogram import types
 from aiogram.dispatcher import FSMContext
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup, \
@@ -22,6 +22,7 @@ from modules.db import DBManager
 from modules.bot.broadcast import BotBroadcastFunctions
 from modules.bot.generic import BotGenericFunctions
 from modules.bot.states import AdminBroadcast
+from modules.bot.router import UpdateRouter
 from modules.bot import decorators as dp
 # endregion
 
@@ -51,6 +52,19 @@ media_types = {
     TYPE_VIDEO_NOTE: ContentType.VIDEO_NOTE
 }
 
+# Scope button -> audience segment (see modules.segments)
+scope_segments = {
+    btntext.USERS: 'users',
+    btntext.ADMINS: 'admins',
+    btntext.EVERYONE: 'all',
+    btntext.YANDEX_INTERNSHIP_NOT_SIGNED_UP: 'ya_int-not_signed_up',
+    btntext.YANDEX_INTERNSHIP_SIGNED_UP: 'ya_int-signed_up',
+    btntext.YANDEX_INTERNSHIP_NOT_ENROLLED: 'ya_int-not_enrolled',
+    btntext.YANDEX_INTERNSHIP_ENROLLED: 'ya_int-enrolled',
+    btntext.YANDEX_INTERNSHIP_NOT_FLOW_STARTED: 'ya_int-not_flow_started',
+    btntext.YANDEX_INTERNSHIP_FLOW_STARTED: 'ya_int-flow_started'
+}
+
 msgTypeBroadcastBtn = KeyboardButton(TYPE_TEXT)
 picTypeBroadcastBtn = KeyboardButton(TYPE_PIC)
 videoTypeBroadcastBtn = KeyboardButton(TYPE_VIDEO)
@@ -63,7 +77,7 @@ typeBroadcastMenu = (ReplyKeyboardMarkup(resize_keyboard=True)
                           videoNoteTypeBroadcastBtn))
 
 
-@dp.callback_query_handler(lambda c: c.data == 'admin:broadcast')
+@dp.callback_query_handler(text='admin:broadcast')
 @dp.message_handler(admin_only, commands=['broadcast'])
 async def admin_broadcast_stage0(message: Union[types.Message,
                                                 types.CallbackQuery],
@@ -93,6 +107,12 @@ async def admin_broadcast_stage1(message: types.Message,
         await state.set_state(AdminBroadcast.media)  # type: ignore
 
 
+def scope_menu() -> ReplyKeyboardMarkup:
+    """Get the scope keyboard without the segments that have no data source."""
+    return nav.get_broadcast_scope_kb([button for button, scope in scope_segments.items()
+                                       if db.segments.is_available(scope)])
+
+
 @dp.message_handler(admin_only,
                     state=AdminBroadcast.media,
                     content_types=[ContentType.PHOTO,
@@ -116,7 +136,7 @@ async def admin_broadcast_stage2(message: types.Message,
     else:
         await state.update_data(message='')
         await message.answer(f"Выбери ширину рассылки\n\n{replies.cancel_action()}",
-                             reply_markup=nav.adminBroadcastScopeMenu)
+                             reply_markup=scope_menu())
         await state.set_state(AdminBroadcast.scope)  # type: ignore
 
 
@@ -126,7 +146,7 @@ async def admin_broadcast_stage3(message: types.Message,
     """Broadcast message to all users (admin, stage 3)."""
     await state.update_data(message=message.text)
     await message.answer(f"Выбери ширину рассылки\n\n{replies.cancel_action()}",
-                         reply_markup=nav.adminBroadcastScopeMenu)
+                         reply_markup=scope_menu())
     await state.set_state(AdminBroadcast.scope)  # type: ignore
 
 
@@ -134,13 +154,23 @@ async def admin_broadcast_stage3(message: types.Message,
 async def admin_broadcast_stage4(message: types.Message,
                                  state: FSMContext) -> None:
     """Broadcast message to all users (admin, stage 4)."""
-    await state.update_data(scope=message.text)
+    scope = scope_segments.get(message.text)
+    if scope is None:
+        await bot.send_message(message.from_user.id, "Неверный тип рассылки")
+        await state.finish()
+        return
+    if not db.segments.is_available(scope):
+        await message.answer("Для этой аудитории пока нет данных, рассылка отменена",
+                             reply_markup=bot_generic.get_main_keyboard(message))
+        await state.finish()
+        return
+    await state.update_data(scope=scope)
     state_data = await state.get_data()
     caption_applicable = state_data['msg_type'] in [ContentType.TEXT,
                                                     ContentType.PHOTO,
                                                     ContentType.VIDEO]
     await message.answer(f"""Подтверди рассылку\nТип рассылки: \
-{state_data['msg_type']}\nТекст рассылки\n\"\"\"{(state_data['message']
+{state_data['msg_type']}\nПолучателей: {db.segments.size(scope)}\nТекст рассылки\n\"\"\"{(state_data['message']
                                                    if caption_applicable
                                                    else 'ПУСТО')}\
 \"\"\"\n\n{replies.cancel_action()}""", reply_markup=nav.confirmMenu)
@@ -155,29 +185,9 @@ async def admin_broadcast_stage5(message: types.Message,
     if message.text != btntext.CONFIRM:
         await message.answer("Рассылка отменена")
         await state.finish()
-    state_data = await state.get_data()
-    if state_data['scope'] == btntext.EVERYONE:
-        scope = 'all'
-    elif state_data['scope'] == btntext.USERS:
-        scope = 'users'
-    elif state_data['scope'] == btntext.ADMINS:
-        scope = 'admins'
-    elif state_data['scope'] == btntext.YANDEX_INTERNSHIP_NOT_SIGNED_UP:
-        scope = 'ya_int-not_signed_up'
-    elif state_data['scope'] == btntext.YANDEX_INTERNSHIP_SIGNED_UP:
-        scope = 'ya_int-signed_up'
-    elif state_data['scope'] == btntext.YANDEX_INTERNSHIP_NOT_ENROLLED:
-        scope = 'ya_int-not_enrolled'
-    elif state_data['scope'] == btntext.YANDEX_INTERNSHIP_ENROLLED:
-        scope = 'ya_int-enrolled'
-    elif state_data['scope'] == btntext.YANDEX_INTERNSHIP_NOT_FLOW_STARTED:
-        scope = 'ya_int-not_flow_started'
-    elif state_data['scope'] == btntext.YANDEX_INTERNSHIP_FLOW_STARTED:
-        scope = 'ya_int-flow_started'
-    else:
-        await bot.send_message(message.from_user.id, "Неверный тип рассылки")
-        await state.finish()
         return
+    state_data = await state.get_data()
+    scope = state_data['scope']
     media_type = state_data['msg_type']
     # Send broadcast
     if media_type == ContentType.TEXT:
@@ -197,7 +207,7 @@ async def admin_broadcast_stage5(message: types.Message,
 
 
 # noinspection PyProtectedMember
-def setup(dispatcher: Dispatcher,
+def setup(dispatcher: UpdateRouter,
           bot_obj: Bot,
           broadcast: BotBroadcastFunctions,
           generic: BotGenericFunctions):
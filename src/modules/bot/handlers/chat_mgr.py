@@ -5,7 +5,7 @@
 # region Regular dependencies
 import logging
 from typing import Union
-from aiogram import Bot, Dispatcher
+from aiogram import Bot
 from aiogram import types
 # endregion
 
@@ -16,6 +16,7 @@ from modules import replies
 from modules.db import DBManager
 from modules.bot.broadcast import BotBroadcastFunctions
 from modules.bot.generic import BotGenericFunctions
+from modules.bot.router import UpdateRouter
 from modules.bot import decorators as dp
 # endregion
 
@@ -71,7 +72,7 @@ async def plaintext_answers_status(message: types.Message):
 
 
 # region Coworking notifications (user control)
-@dp.callback_query_handler(lambda c: c.data == 'coworking:toggle_notifications', state='*')
+@dp.callback_query_handler(text='coworking:toggle_notifications', state='*')
 @dp.message_handler(commands=['notify'])
 async def notify(message: Union[types.Message, types.CallbackQuery]) -> None:
     """Turn on notifications for a given chat ID."""
@@ -96,8 +97,18 @@ async def notify_status(message: types.Message) -> None:
 # endregion
 
 
+@dp.my_chat_member_handler()
+@dp.chat_member_handler()
+async def chat_member_updated(update: types.ChatMemberUpdated) -> None:
+    """Drop cached group administrators when someone becomes or stops being one."""
+    if update.old_chat_member.is_chat_admin() or update.new_chat_member.is_chat_admin():
+        bot_tools.chat_admins.invalidate(update.chat.id)
+        log.debug(f"Chat {update.chat.id} administrators changed; cache hit rate \
+{bot_tools.chat_admins.hit_rate:.2f}")
+
+
 # noinspection PyProtectedMember
-def setup(dispatcher: Dispatcher,
+def setup(dispatcher: UpdateRouter,
           bot_obj: Bot,
           broadcast: BotBroadcastFunctions,
           generic: BotGenericFunctions):
@@ -114,3 +125,7 @@ def setup(dispatcher: Dispatcher,
                     dispatcher.register_message_handler(func, *args, **kwargs)
                 elif handler_type == 'callback_query':
                     dispatcher.register_callback_query_handler(func, *args, **kwargs)
+                elif handler_type == 'chat_member':
+                    dispatcher.register_chat_member_handler(func, *args, **kwargs)
+                elif handler_type == 'my_chat_member':
+                    dispatcher.register_my_chat_member_handler(func, *args, **kwargs)
@@ -3,7 +3,7 @@
 
 """Bot club handlers."""
 # region Regular dependencies
-from aiogram import Bot, Dispatcher
+from aiogram import Bot
 from aiogram import types
 from aiogram.types.message import ParseMode
 from aiogram.utils import exceptions
@@ -17,6 +17,7 @@ from modules import replies
 from modules.db import DBManager
 from modules.bot.broadcast import BotBroadcastFunctions
 from modules.bot.generic import BotGenericFunctions
+from modules.bot.router import UpdateRouter
 from modules.bot import decorators as dp
 # endregion
 
@@ -34,18 +35,18 @@ groups_only = lambda message: message.chat.type in ['group', 'supergroup']  # no
 # endregion
 
 
-@dp.message_handler(lambda message: message.text == btntext.CLUBS_BTN)
+@dp.message_handler(text=btntext.CLUBS_BTN)
 async def clubs_menu(message: types.Message):
     """Send club menu."""
     await message.answer(replies.club_info_general(),
                          reply_markup=nav.inlClubsMenu)
 
 
-@dp.callback_query_handler(lambda c: c.data in [i + '_club_info' for i in ['ctf',
-                                                                           'hackathon',
-                                                                           'design',
-                                                                           'gamedev',
-                                                                           'robotics']])
+@dp.callback_query_handler(text=[i + '_club_info' for i in ['ctf',
+                                                            'hackathon',
+                                                            'design',
+                                                            'gamedev',
+                                                            'robotics']])
 async def club_info(call: types.CallbackQuery) -> None:
     """Answer with requested club info."""
     await call.answer()
@@ -87,7 +88,7 @@ async def club_info(call: types.CallbackQuery) -> None:
 
 
 # noinspection PyProtectedMember
-def setup(dispatcher: Dispatcher,
+def setup(dispatcher: UpdateRouter,
           bot_obj: Bot,
           broadcast: BotBroadcastFunctions,
           generic: BotGenericFunctions):
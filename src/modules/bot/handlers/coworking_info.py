@@ -4,10 +4,13 @@
 """Bot department handlers."""
 # region Regular dependencies
 import logging
-from aiogram import Bot, Dispatcher
+from datetime import datetime
+from os import getenv
+from aiogram import Bot
 from aiogram import types
 from aiogram.types.message import ParseMode
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, \
+    InlineQueryResultArticle, InputTextMessageContent
 # endregion
 
 # region Local dependencies
@@ -17,10 +20,12 @@ from modules.coworking import Manager as CoworkingManager
 from modules import replies
 from modules.db import DBManager
 from modules.models import CoworkingStatus
+from modules.snapshot import CoworkingState
 from modules.bot.coworking import BotCoworkingFunctions
 from modules.bot.broadcast import BotBroadcastFunctions
 from modules.bot.generic import BotGenericFunctions
 from modules.buttons import coworking as cwbtn  # Coworking mutation buttons
+from modules.bot.router import UpdateRouter
 from modules.bot import decorators as dp
 # endregion
 
@@ -32,6 +37,10 @@ bot_cw: BotCoworkingFunctions = None  # type: ignore
 coworking: CoworkingManager = None  # type: ignore
 # endregion
 
+# Telegram caches inline answers for all users; the longer the status has not changed, the longer it may be cached
+INLINE_CACHE_TIME_MIN = int(getenv('INLINE_CACHE_TIME_MIN', '5'))
+INLINE_CACHE_TIME_MAX = int(getenv('INLINE_CACHE_TIME_MAX', '120'))
+
 # region Lambda functions
 debug_dec = lambda message: log.debug(f'User {message.from_user.id} from \
 chat {message.chat.id} called command `{message.text}`') or True  # noqa: E731
@@ -40,7 +49,7 @@ groups_only = lambda message: message.chat.type in ['group', 'supergroup']  # no
 # endregion
 
 
-@dp.message_handler(lambda message: message.text == btntext.COWORKING_STATUS)
+@dp.message_handler(text=btntext.COWORKING_STATUS)
 @dp.message_handler(commands=['coworking_status', 'cw_status'])
 async def coworking_status_reply(message: types.Message) -> None:
     # Deny access to group chats
@@ -56,6 +65,8 @@ async def coworking_status_reply(message: types.Message) -> None:
         (inl_coworking_control_menu
          .add(InlineKeyboardButton(replies.toggle_coworking_notifications(are_notifications_on),
                                    callback_data='coworking:toggle_notifications')))
+        inl_coworking_control_menu.add(InlineKeyboardButton(btntext.INL_COWORKING_BEST_TIME,
+                                                            callback_data='coworking:best_time'))
         inl_coworking_control_menu.add(InlineKeyboardButton(btntext.INL_COWORKING_STATUS_EXPLAIN,
                                                             callback_data='coworking:status:explain'))
     try:
@@ -67,20 +78,70 @@ async def coworking_status_reply(message: types.Message) -> None:
                                  reply_markup=inl_coworking_control_menu)
         else:
             await message.answer(replies.coworking_status_reply(status,
-                                                                responsible_uname=db.get_coworking_responsible_uname()),
+                                                                responsible_uname=db.get_coworking_responsible_uname(),
+                                                                next_change=coworking.predict_next_change(status)),
                                  reply_markup=inl_coworking_control_menu)
     except Exception as exc:
         log.error(f"Error while getting coworking status: {exc}")
 
 
-@dp.callback_query_handler(lambda c: c.data == 'coworking:status:explain')
+@dp.message_handler(commands=['coworking_stats'])
+async def coworking_stats(message: types.Message) -> None:
+    """Send coworking open time per day and per weekday (from the rollups)."""
+    if bot_generic.chat_is_group(message):
+        await message.answer(replies.coworking_status_only_in_pm())
+        return
+    report = db.get_coworking_occupancy(days=7)
+    await message.answer(replies.coworking_occupancy(report.per_day, report.per_weekday_hour))
+
+
+@dp.callback_query_handler(text='coworking:best_time')
+async def coworking_best_time(call: types.CallbackQuery) -> None:
+    """Send the weekday/hour occupancy heatmap (rendered once per day)."""
+    await call.answer()
+    await bot_cw.send_heatmap(call.message.chat.id)
+
+
+def _inline_cache_time(state: CoworkingState, now: datetime) -> int:
+    """Get the inline answer cache time: a tenth of the time since the last change, \
+but not past the end of a temporary closure."""
+    cache_time = (now - state.updated).total_seconds() / 10
+    if state.status == CoworkingStatus.temp_closed and state.temp_delta:
+        # The closure started with the transition; handovers during it only bump `updated`
+        cache_time = min(cache_time, state.temp_delta * 60 - (now - state.since).total_seconds())
+    return int(min(max(cache_time, INLINE_CACHE_TIME_MIN), INLINE_CACHE_TIME_MAX))
+
+
+@dp.inline_query_handler()
+async def coworking_status_inline(query: types.InlineQuery) -> None:
+    """Answer inline queries with the coworking status from the in-memory snapshot."""
+    state = db.coworking_snapshot.state
+    if state is None:
+        await query.answer([], cache_time=INLINE_CACHE_TIME_MIN)
+        return
+    reply = replies.coworking_status_reply(state.status,
+                                           responsible_uname=state.responsible_uname,
+                                           delta_mins=((state.temp_delta or 0)
+                                                       if state.status == CoworkingStatus.temp_closed
+                                                       else 0),
+                                           next_change=coworking.predict_next_change(state.status))
+    title, _, description = reply.partition("\n\n")
+    await query.answer([InlineQueryResultArticle(id=str(state.version),
+                                                 title=title,
+                                                 description=description.replace("\n\n", " · ") or None,
+                                                 input_message_content=InputTextMessageContent(reply))],
+                       cache_time=_inline_cache_time(state, datetime.utcnow()),
+                       is_personal=False)
+
+
+@dp.callback_query_handler(text='coworking:status:explain')
 async def coworking_status_explain(call: types.CallbackQuery) -> None:
     await call.message.edit_text(replies.coworking_status_explain(coworking.get_responsible_uname()),
                                  parse_mode=ParseMode.MARKDOWN)
 
 
 # noinspection PyProtectedMember
-def setup(dispatcher: Dispatcher,
+def setup(dispatcher: UpdateRouter,
           bot_obj: Bot,
           broadcast: BotBroadcastFunctions,
           generic: BotGenericFunctions,
@@ -102,3 +163,5 @@ def setup(dispatcher: Dispatcher,
                     dispatcher.register_message_handler(func, *args, **kwargs)
                 elif handler_type == 'callback_query':
                     dispatcher.register_callback_query_handler(func, *args, **kwargs)
+                elif handler_type == 'inline_query':
+                    dispatcher.register_inline_query_handler(func, *args, **kwargs)
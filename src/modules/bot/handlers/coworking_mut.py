@@ -5,14 +5,16 @@
 # region Regular dependencies
 import logging
 import asyncio
-from aiogram import Bot, Dispatcher
+from datetime import datetime, timedelta
+from aiogram import Bot
 from aiogram import types
 # from aiogram.types.message import ParseMode
 # from aiogram.dispatcher.filters import ChatTypeFilter
 # from aiogram.contrib.fsm_storage.memory import MemoryStorage
 from aiogram.dispatcher import FSMContext
 # from aiogram.dispatcher.filters.state import State, StatesGroup
-from aiogram.types import ChatType
+from aiogram.types import ChatType, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.utils.exceptions import MessageNotModified
 # endregion
 
 # region Local dependencies
@@ -22,11 +24,13 @@ from modules import btntext
 from modules.coworking import Manager as CoworkingManager
 from modules import replies
 from modules.db import DBManager
+from modules.dto import CoworkingLogPage
 from modules.models import CoworkingStatus
 from modules.bot.coworking import BotCoworkingFunctions
 from modules.bot.broadcast import BotBroadcastFunctions
 from modules.bot.generic import BotGenericFunctions
 from modules.bot.states import AdminCoworkingTempCloseFlow
+from modules.bot.router import UpdateRouter
 from modules.bot import decorators as dp
 # endregion
 
@@ -46,19 +50,26 @@ groups_only = lambda message: message.chat.type in ['group', 'supergroup']  # no
 # endregion
 
 
-@dp.callback_query_handler(lambda c: c.data == 'coworking:take_responsibility')
+def _already_set(status: CoworkingStatus, already: str) -> str:
+    """Get the answer for a lost status change (from the in-memory snapshot)."""
+    state = db.coworking_snapshot.state
+    return already if state is not None and state.status == status else replies.coworking_status_already_changed()
+
+
+@dp.callback_query_handler(text='coworking:take_responsibility')
 async def coworking_take_responsibility(call: types.CallbackQuery) -> None:
     """Take responsibility for coworking status."""
-    if coworking.is_responsible(call.from_user.id):
-        await call.answer(replies.coworking_status_already_responsible())
+    if not db.coworking_status_set_uid_responsible(call.from_user.id):
+        await call.answer(replies.coworking_status_already_responsible()
+                          if coworking.is_responsible(call.from_user.id)
+                          else replies.coworking_status_already_changed())
         return
-    db.coworking_status_set_uid_responsible(call.from_user.id)
     # Update inline keyboard in the call message
     await call.message.edit_reply_markup(reply_markup=bot_cw.get_admin_markup_full(call))
     await call.answer(replies.coworking_status_now_responsible())
 
 
-@dp.callback_query_handler(lambda c: c.data == 'coworking:open',
+@dp.callback_query_handler(text='coworking:open',
                            chat_type=ChatType.PRIVATE)
 async def coworking_open(call: types.CallbackQuery) -> None:
     """Set coworking status to open."""
@@ -66,10 +77,9 @@ async def coworking_open(call: types.CallbackQuery) -> None:
     if not coworking.is_trusted(call.from_user.id):
         await call.answer(replies.permission_denied())
         return
-    if coworking.get_status() == CoworkingStatus.open:
-        await call.answer("Коворкинг уже открыт")
+    if coworking.open(call.from_user.id) is None:
+        await call.answer(_already_set(CoworkingStatus.open, "Коворкинг уже открыт"))
         return
-    coworking.open(call.from_user.id)
     asyncio.get_event_loop().create_task(bot_broadcast.coworking(CoworkingStatus.open))
     await call.answer("Коворкинг теперь открыт")
     # Update inline keyboard in the call message
@@ -77,7 +87,7 @@ async def coworking_open(call: types.CallbackQuery) -> None:
     log.info(f"Coworking opened by {call.from_user.id}")
 
 
-@dp.callback_query_handler(lambda c: c.data == 'coworking:close',
+@dp.callback_query_handler(text='coworking:close',
                            chat_type=ChatType.PRIVATE)
 async def coworking_close(call: types.CallbackQuery) -> None:
     """Set coworking status to closed."""
@@ -85,10 +95,9 @@ async def coworking_close(call: types.CallbackQuery) -> None:
     if not coworking.is_trusted(call.from_user.id):
         await call.answer(replies.permission_denied())
         return
-    if coworking.get_status() == CoworkingStatus.closed:
-        await call.answer("Коворкинг уже закрыт")
+    if coworking.close(call.from_user.id) is None:
+        await call.answer(_already_set(CoworkingStatus.closed, "Коворкинг уже закрыт"))
         return
-    coworking.close(call.from_user.id)
     asyncio.get_event_loop().create_task(bot_broadcast.coworking(CoworkingStatus.closed))
     await call.answer("Коворкинг теперь закрыт")
     # Update inline keyboard in the call message
@@ -96,7 +105,7 @@ async def coworking_close(call: types.CallbackQuery) -> None:
     log.info(f"Coworking closed by {call.from_user.id}")
 
 
-@dp.callback_query_handler(lambda c: c.data == 'coworking:temp_close',
+@dp.callback_query_handler(text='coworking:temp_close',
                            chat_type=ChatType.PRIVATE)
 async def coworking_temp_close_stage0(call: types.CallbackQuery, state: FSMContext) -> None:
     """Set coworking status to temporarily closed."""
@@ -109,8 +118,8 @@ async def coworking_temp_close_stage0(call: types.CallbackQuery, state: FSMConte
         return
     # Set AdminCoworkingTempCloseFlow state
     await state.set_state(AdminCoworkingTempCloseFlow.delta.state)
-    # Store call id in state
-    await state.update_data(status_msg_id=call.message.message_id)
+    # Store call id and the state version in state (the closure is dropped if the status changes meanwhile)
+    await state.update_data(status_msg_id=call.message.message_id, version=coworking.get_version())
     await bot.send_message(call.from_user.id,
                            f"На какое время закрыть коворкинг? (в минутах; можно ввести любое целое число)\
 \n\n{replies.cancel_action()}",
@@ -161,7 +170,11 @@ async def coworking_temp_close_stage2(message: types.Message, state: FSMContext)
     data = await state.get_data()
     delta: int = data['delta']
     # Temporarily close coworking
-    coworking.temp_close(message.from_user.id, delta_mins=delta)
+    if coworking.temp_close(message.from_user.id, delta_mins=delta, expected_version=data.get('version')) is None:
+        await message.answer(replies.coworking_status_already_changed(),
+                             reply_markup=bot_generic.get_main_keyboard(message))
+        await state.finish()
+        return
     asyncio.get_event_loop().create_task(bot_broadcast.coworking(CoworkingStatus.temp_closed, delta_mins=delta))
     await message.answer("Коворкинг теперь временно закрыт",
                          reply_markup=bot_generic.get_main_keyboard(message))
@@ -172,7 +185,7 @@ async def coworking_temp_close_stage2(message: types.Message, state: FSMContext)
     await state.finish()
 
 
-@dp.callback_query_handler(lambda c: c.data == 'coworking:event_open',
+@dp.callback_query_handler(text='coworking:event_open',
                            chat_type=ChatType.PRIVATE)
 async def coworking_event_open(call: types.CallbackQuery) -> None:
     """Set coworking status to opened for an event."""
@@ -180,10 +193,10 @@ async def coworking_event_open(call: types.CallbackQuery) -> None:
     if not coworking.is_trusted(call.from_user.id):
         await call.answer(replies.permission_denied())
         return
-    if coworking.get_status() == CoworkingStatus.event_open:
-        await call.answer("Коворкинг уже открыт (с предупреждением о проведении мероприятия)")
+    if coworking.event_open(call.from_user.id) is None:
+        await call.answer(_already_set(CoworkingStatus.event_open,
+                                       "Коворкинг уже открыт (с предупреждением о проведении мероприятия)"))
         return
-    coworking.event_open(call.from_user.id)
     asyncio.get_event_loop().create_task(bot_broadcast.coworking(CoworkingStatus.event_open))
     await call.answer("Коворкинг теперь открыт (с предупреждением о проведении мероприятия)")
     # Update inline keyboard in the call message
@@ -191,7 +204,7 @@ async def coworking_event_open(call: types.CallbackQuery) -> None:
     log.info(f"Coworking opened for an event by {call.from_user.id}")
 
 
-@dp.callback_query_handler(lambda c: c.data == 'coworking:event_close',
+@dp.callback_query_handler(text='coworking:event_close',
                            chat_type=ChatType.PRIVATE)
 async def coworking_event_close(call: types.CallbackQuery) -> None:
     """Set coworking status to closed for an event."""
@@ -203,10 +216,9 @@ async def coworking_event_close(call: types.CallbackQuery) -> None:
     if not coworking.is_trusted(call.from_user.id):
         await call.answer(replies.permission_denied())
         return
-    if coworking.get_status() == CoworkingStatus.event_closed:
-        await call.answer("Коворкинг уже закрыт на мероприятие")
+    if coworking.event_close(call.from_user.id) is None:
+        await call.answer(_already_set(CoworkingStatus.event_closed, "Коворкинг уже закрыт на мероприятие"))
         return
-    coworking.event_close(call.from_user.id)
     asyncio.get_event_loop().create_task(bot_broadcast.coworking(CoworkingStatus.event_closed))
     await call.answer("Коворкинг теперь закрыт на мероприятие")
     # Update inline keyboard in the call message
@@ -214,7 +226,7 @@ async def coworking_event_close(call: types.CallbackQuery) -> None:
     log.info(f"Coworking closed for an event by {call.from_user.id}")
 
 
-@dp.callback_query_handler(admin_only, lambda c: c.data == 'coworking:trim_log',
+@dp.callback_query_handler(admin_only, text='coworking:trim_log',
                            chat_type=ChatType.PRIVATE)
 async def trim_coworking_status_log(call: types.CallbackQuery) -> None:
     """Trim coworking log."""
@@ -223,15 +235,79 @@ async def trim_coworking_status_log(call: types.CallbackQuery) -> None:
     await call.answer(f"Лог статуса коворкинг пространства урезан; последние {limit} записей сохранены")
 
 
-@dp.message_handler(admin_only, commands=['get_coworking_status_log'],
+# region Coworking log viewer
+COWORKING_LOG_PAGE_SIZE = 15
+COWORKING_LOG_MAX_DAYS = 3650
+EPOCH = datetime(1970, 1, 1)
+
+
+def coworking_log_callback(direction: str, time: datetime, entry_id: int, since: datetime) -> str:
+    """Encode a page request (o: older than, n: newer than the (time, id) key) and the range start."""
+    return (f"coworking:log:{direction}:{(time - EPOCH) // timedelta(microseconds=1)}:{entry_id}:"
+            f"{(since - EPOCH) // timedelta(seconds=1)}")
+
+
+def render_coworking_log_page(page: CoworkingLogPage, since: datetime):
+    """Get the text and navigation keyboard of a coworking log page."""
+    lines = [f"{e.time:%d.%m.%Y %H:%M:%S} — {replies.get_coworking_status_reply_data(e.status)[0]} "
+             f"{e.status.name}{f' ({e.temp_delta} мин)' if e.temp_delta else ''} — "
+             f"{f'@{e.uname}' if e.uname else e.uid}" for e in page.entries]
+    text = (f"Лог статуса коворкинга с {since:%d.%m.%Y %H:%M} (UTC):\n\n"
+            + ("\n".join(lines) if lines else "Пусто"))
+    keyboard = InlineKeyboardMarkup()
+    buttons = []
+    if page.has_newer and page.entries:
+        first = page.entries[0]
+        buttons.append(InlineKeyboardButton('⬅️ Новее',
+                                            callback_data=coworking_log_callback('n', first.time, first.id, since)))
+    if page.has_older and page.entries:
+        last = page.entries[-1]
+        buttons.append(InlineKeyboardButton('Старше ➡️',
+                                            callback_data=coworking_log_callback('o', last.time, last.id, since)))
+    if buttons:
+        keyboard.row(*buttons)
+    return text, keyboard
+
+
+@dp.message_handler(admin_only, commands=['get_coworking_status_log', 'coworking_log'],
                     chat_type=ChatType.PRIVATE)
 async def get_coworking_status_log(message: types.Message) -> None:
-    """Get coworking status log."""
-    await message.answer(coworking.get_log_str())
+    """Get coworking status log (`/coworking_log <days>`, 7 days by default)."""
+    try:
+        days = int(message.get_args() or 7)
+        if not 1 <= days <= COWORKING_LOG_MAX_DAYS:
+            raise ValueError(days)
+    except ValueError:
+        await message.answer(f"Использование: /coworking_log <количество дней от 1 до {COWORKING_LOG_MAX_DAYS}>")
+        return
+    since = (datetime.utcnow() - timedelta(days=days)).replace(microsecond=0)
+    page = db.get_coworking_log_page(since=since, limit=COWORKING_LOG_PAGE_SIZE)
+    text, keyboard = render_coworking_log_page(page, since)
+    await message.answer(text, reply_markup=keyboard)
+
+
+@dp.callback_query_handler(admin_only, text_startswith='coworking:log:',
+                           chat_type=ChatType.PRIVATE)
+async def get_coworking_status_log_page(call: types.CallbackQuery) -> None:
+    """Turn the page of the coworking status log."""
+    await call.answer()
+    _, _, direction, time_us, entry_id, since_s = call.data.split(':')
+    key = (EPOCH + timedelta(microseconds=int(time_us)), int(entry_id))
+    since = EPOCH + timedelta(seconds=int(since_s))
+    if direction == 'n':
+        page = db.get_coworking_log_page(since=since, newer_than=key, limit=COWORKING_LOG_PAGE_SIZE)
+    else:
+        page = db.get_coworking_log_page(since=since, older_than=key, limit=COWORKING_LOG_PAGE_SIZE)
+    text, keyboard = render_coworking_log_page(page, since)
+    try:
+        await call.message.edit_text(text, reply_markup=keyboard)
+    except MessageNotModified:
+        pass
+# endregion
 
 
 # noinspection PyProtectedMember
-def setup(dispatcher: Dispatcher,
+def setup(dispatcher: UpdateRouter,
           bot_obj: Bot,
           broadcast: BotBroadcastFunctions,
           generic: BotGenericFunctions,
@@ -4,7 +4,7 @@
 """Bot department handlers."""
 # region Regular dependencies
 from typing import Union
-from aiogram import Bot, Dispatcher
+from aiogram import Bot
 from aiogram import types
 from aiogram.types.message import ParseMode
 # endregion
@@ -15,6 +15,7 @@ from modules import markup as nav
 from modules.db import DBManager
 from modules.bot.broadcast import BotBroadcastFunctions
 from modules.bot.generic import BotGenericFunctions
+from modules.bot.router import UpdateRouter
 from modules.bot import decorators as dp  # Bot decorators
 from .replies import departments as dept_replies
 
@@ -37,7 +38,7 @@ groups_only = lambda message: message.chat.type in ['group', 'supergroup']  # no
 # endregion
 
 
-@dp.callback_query_handler(lambda c: c.data == 'skill:departments')
+@dp.callback_query_handler(text='skill:departments')
 async def welcome(call: Union[types.CallbackQuery, types.Message]):
     await call.answer()
     await call.message.edit_text(dept_replies.welcome(),
@@ -46,7 +47,7 @@ async def welcome(call: Union[types.CallbackQuery, types.Message]):
 
 
 # noinspection PyProtectedMember
-def setup(dispatcher: Dispatcher,
+def setup(dispatcher: UpdateRouter,
           bot_obj: Bot,
           generic: BotGenericFunctions):
     global bot
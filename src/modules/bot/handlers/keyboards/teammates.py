@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+
+"""Teammate search keyboards."""
+from aiogram.types import InlineKeyboardMarkup as InlKbMkup
+from aiogram.types import InlineKeyboardButton as InlKbBtn
+
+from modules.models import Skill, skill_mask_test
+from modules.replies import skill_names as profile_skill_names
+
+
+def callback_data(mask: int, match_all: bool, page: int) -> str:
+    """Encode the whole search state, so that no state has to be stored."""
+    return f"teammates:{mask}:{'all' if match_all else 'any'}:{page}"
+
+
+def search_menu(mask: int, match_all: bool, page: int, pages: int) -> InlKbMkup:
+    """Get inline keyboard with skill toggles, search mode and pages."""
+    kb = InlKbMkup(row_width=2)
+    skill_names = profile_skill_names()
+    kb.add(*[InlKbBtn(f"{'✅' if skill_mask_test(mask, skill) else '🅾️'} {skill_names[skill.name]}",
+                      callback_data=callback_data(mask ^ skill.bit, match_all, 0))
+             for skill in Skill])
+    kb.row(InlKbBtn('Режим: все навыки' if match_all else 'Режим: любой навык',
+                    callback_data=callback_data(mask, not match_all, 0)))
+    page_buttons = []
+    if page > 0:
+        page_buttons.append(InlKbBtn('⬅️', callback_data=callback_data(mask, match_all, page - 1)))
+    if page + 1 < pages:
+        page_buttons.append(InlKbBtn('➡️', callback_data=callback_data(mask, match_all, page + 1)))
+    if page_buttons:
+        kb.row(*page_buttons)
+    return kb
@@ -3,7 +3,7 @@
 """MISIS Entrance Guide module."""
 # region Regular dependencies
 from typing import Union
-from aiogram import Bot, Dispatcher
+from aiogram import Bot
 from aiogram import types
 from aiogram.types.message import ParseMode
 # endregion
@@ -14,6 +14,7 @@ from modules import markup as nav
 from modules.db import DBManager
 from modules.bot.broadcast import BotBroadcastFunctions
 from modules.bot.generic import BotGenericFunctions
+from modules.bot.router import UpdateRouter
 from modules.bot import decorators as dp  # Bot decorators
 from .replies import navigation as dir_replies
 from .skills import bot_skills_menu
@@ -38,7 +39,7 @@ groups_only = lambda message: message.chat.type in ['group', 'supergroup']  # no
 # endregion
 
 
-@dp.callback_query_handler(lambda c: c.data == 'skill:navigation')
+@dp.callback_query_handler(text='skill:navigation')
 async def welcome(call: Union[types.CallbackQuery, types.Message]):
     await call.answer()
     await call.message.edit_text(dir_replies.welcome(),
@@ -46,7 +47,7 @@ async def welcome(call: Union[types.CallbackQuery, types.Message]):
                                  reply_markup=dir_keyboards.main_menu())
 
 
-@dp.callback_query_handler(lambda c: c.data == 'navigation:back')
+@dp.callback_query_handler(text='navigation:back')
 async def back(call: types.CallbackQuery):
     """Go back to the skills menu."""
     await call.answer()
@@ -55,7 +56,7 @@ async def back(call: types.CallbackQuery):
 
 
 # noinspection PyProtectedMember
-def setup(dispatcher: Dispatcher,
+def setup(dispatcher: UpdateRouter,
           bot_obj: Bot,
           generic: BotGenericFunctions):
     global bot
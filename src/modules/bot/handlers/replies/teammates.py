@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+
+"""Teammate search replies."""
+from typing import List
+
+from modules.dto import UserRow
+
+
+def only_in_pm() -> str:
+    return "🧑‍🤝‍🧑‼️ Поиск тиммейтов доступен только в личных сообщениях"
+
+
+def user_line(user: UserRow) -> str:
+    """Single search result."""
+    name = ' '.join(n for n in (user.first_name, user.last_name) if n) or 'Без имени'
+    return f"• {name} (@{user.uname})" if user.uname else f"• {name}"
+
+
+def search(skills: List[str], match_all: bool, users: List[UserRow], total: int, page: int, pages: int) -> str:
+    """Teammate search message."""
+    if not skills:
+        return """🧑‍🤝‍🧑 Поиск тиммейтов на хакатоны
+
+Выбери навыки, которые нужны твоей команде"""
+    mode = 'все навыки' if match_all else 'любой из навыков'
+    results = '\n'.join(user_line(user) for user in users) if users else 'Никого не нашлось 😔'
+    return f"""🧑‍🤝‍🧑 Поиск тиммейтов на хакатоны
+
+Навыки ({mode}): {', '.join(skills)}
+Найдено: {total}{f' (страница {page + 1}/{pages})' if pages > 1 else ''}
+
+{results}"""
@@ -3,7 +3,7 @@
 """Bot skill reply handlers."""
 # region Regular dependencies
 import logging
-from aiogram import Bot, Dispatcher
+from aiogram import Bot
 from aiogram import types
 # from aiogram.types.message import ParseMode
 
@@ -15,6 +15,7 @@ from modules import markup as nav
 from modules import btntext
 from modules.db import DBManager
 from modules.bot.generic import BotGenericFunctions
+from modules.bot.router import UpdateRouter
 from modules.bot import decorators as dp
 from .replies import skills as sk_replies
 # endregion
@@ -32,10 +33,13 @@ groups_only = lambda message: message.chat.type in ['group', 'supergroup']  # no
 # endregion
 
 
-@dp.message_handler(lambda message: message.text == btntext.BOT_SKILLS_BTN)
+@dp.message_handler(text=btntext.BOT_SKILLS_BTN)
 async def bot_skills_menu(message: types.Message, reopened: bool = False):
     if not reopened:
-        if not db.user_exists(message.from_user.id):
+        if not db.sync_user_profile(message.from_user.id,
+                                    message.from_user.username,
+                                    message.from_user.first_name,
+                                    message.from_user.last_name):
             db.add_regular_user(message.from_user.id,
                                 message.from_user.username,
                                 message.from_user.first_name,
@@ -44,7 +48,7 @@ async def bot_skills_menu(message: types.Message, reopened: bool = False):
 
 
 # noinspection PyProtectedMember
-def setup(dispatcher: Dispatcher,
+def setup(dispatcher: UpdateRouter,
           bot_obj: Bot,
           generic: BotGenericFunctions):
     global bot
@@ -6,10 +6,9 @@
 import logging
 import asyncio
 from typing import Union
-from aiogram import Bot, Dispatcher
+from aiogram import Bot
 from aiogram import types
 # from aiogram.types.message import ParseMode
-from aiogram.dispatcher.filters.builtin import CommandStart
 from aiogram.types import ReplyKeyboardRemove
 from aiogram.types.chat import ChatActions
 # endregion
@@ -19,6 +18,7 @@ from config import log, db
 from modules import replies
 from modules.db import DBManager
 from modules.bot.generic import BotGenericFunctions
+from modules.bot.router import UpdateRouter
 from modules.bot import decorators as dp
 from modules.media import stickers
 # endregion
@@ -36,8 +36,8 @@ groups_only = lambda message: message.chat.type in ['group', 'supergroup']  # no
 # endregion
 
 
-@dp.callback_query_handler(lambda query: query.data == 'start')
-@dp.message_handler(CommandStart())
+@dp.callback_query_handler(text='start')
+@dp.message_handler(commands=['start'])
 async def bot_send_welcome(message: Union[types.Message, types.CallbackQuery], user_first_name: str = None) -> None:
     """Send welcome message and init user's record in DB"""
     if isinstance(message, types.CallbackQuery):
@@ -47,10 +47,14 @@ async def bot_send_welcome(message: Union[types.Message, types.CallbackQuery], u
         args = message.get_args().split(',')
         user_first_name = message.from_user.first_name
     args_empty = args[0] == ''
-    db.add_regular_user(message.from_user.id,
-                        message.from_user.username,
-                        message.from_user.first_name,
-                        message.from_user.last_name)
+    if not db.sync_user_profile(message.from_user.id,
+                                message.from_user.username,
+                                message.from_user.first_name,
+                                message.from_user.last_name):
+        db.add_regular_user(message.from_user.id,
+                            message.from_user.username,
+                            message.from_user.first_name,
+                            message.from_user.last_name)
     if args_empty:
         await message.answer(replies.welcome_message(user_first_name),
                              reply_markup=ReplyKeyboardRemove())
@@ -76,7 +80,7 @@ async def bot_send_welcome(message: Union[types.Message, types.CallbackQuery], u
 
 
 # noinspection PyProtectedMember
-def setup(dispatcher: Dispatcher,
+def setup(dispatcher: UpdateRouter,
           bot_obj: Bot,
           generic: BotGenericFunctions):
     global bot
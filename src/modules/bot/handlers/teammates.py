@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+"""Teammate search handlers."""
+# region Regular dependencies
+from os import getenv
+from typing import Tuple
+from aiogram import Bot
+from aiogram import types
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.exceptions import MessageNotModified
+# endregion
+
+# region Local dependencies
+from config import log, db
+from modules.models import skills_from_mask
+from modules.replies import skill_names as profile_skill_names
+from modules.bot.generic import BotGenericFunctions
+from modules.bot.router import UpdateRouter
+from modules.bot import decorators as dp  # Bot decorators
+from .replies import teammates as tm_replies
+from .keyboards import teammates as tm_keyboards
+# endregion
+
+# region Passed by setup()
+bot: Bot = None  # type: ignore
+bot_generic: BotGenericFunctions = None  # type: ignore
+# endregion
+
+PAGE_SIZE = int(getenv('TEAMMATES_PAGE_SIZE', '10'))
+
+
+def render_search(mask: int, match_all: bool, page: int) -> Tuple[str, InlineKeyboardMarkup]:
+    """Get the search message and keyboard for a search state."""
+    skills = skills_from_mask(mask)
+    users, total = db.find_teammates(skills, match_all, offset=page * PAGE_SIZE, limit=PAGE_SIZE)
+    pages = max(1, -(-total // PAGE_SIZE))
+    skill_names = profile_skill_names()
+    return (tm_replies.search([skill_names[s.name] for s in skills], match_all, users, total, page, pages),
+            tm_keyboards.search_menu(mask, match_all, page, pages))
+
+
+@dp.message_handler(commands=['find_teammates'])
+async def find_teammates(message: types.Message):
+    """Open the teammate search."""
+    if message.chat.type != 'private':
+        await message.answer(tm_replies.only_in_pm())
+        return
+    text, keyboard = render_search(0, True, 0)
+    await message.answer(text, reply_markup=keyboard)
+
+
+@dp.callback_query_handler(text='skill:teammates')
+async def find_teammates_from_skills(call: types.CallbackQuery):
+    """Open the teammate search from the bot skills menu."""
+    await call.answer()
+    text, keyboard = render_search(0, True, 0)
+    await call.message.edit_text(text, reply_markup=keyboard)
+
+
+@dp.callback_query_handler(text_startswith='teammates:')
+async def find_teammates_update(call: types.CallbackQuery):
+    """Toggle a skill, switch the search mode or turn the page."""
+    await call.answer()
+    try:
+        _, mask, mode, page = call.data.split(':')
+        mask, match_all, page = int(mask), mode == 'all', max(0, int(page))
+    except ValueError:
+        log.warning(f"Invalid teammate search callback data from {call.from_user.id}: {call.data}")
+        return
+    text, keyboard = render_search(mask, match_all, page)
+    try:
+        await call.message.edit_text(text, reply_markup=keyboard)
+    except MessageNotModified:
+        pass
+
+
+# noinspection PyProtectedMember
+def setup(dispatcher: UpdateRouter,
+          bot_obj: Bot,
+          generic: BotGenericFunctions):
+    global bot
+    global bot_generic
+    bot = bot_obj
+    bot_generic = generic
+    for func in globals().values():
+        if hasattr(func, '_handlers'):
+            for handler_type, args, kwargs in func._handlers:
+                if handler_type == 'message':
+                    dispatcher.register_message_handler(func, *args, **kwargs)
+                elif handler_type == 'callback_query':
+                    dispatcher.register_callback_query_handler(func, *args, **kwargs)
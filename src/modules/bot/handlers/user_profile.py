@@ -6,7 +6,7 @@
 from typing import Union
 import logging
 from datetime import datetime
-from aiogram import Bot, Dispatcher
+from aiogram import Bot
 from aiogram import types
 from aiogram.dispatcher import FSMContext
 from aiogram.types import ReplyKeyboardRemove
@@ -23,6 +23,7 @@ from modules.db import DBManager
 from modules.models import Skill
 from modules.bot.generic import BotGenericFunctions
 from modules.bot.states import UserEditProfile, UserProfileSetup
+from modules.bot.router import UpdateRouter
 from modules.bot import decorators as dp
 from modules.markup import get_skill_inl_kb, get_profile_edit_fields_kb
 # endregion
@@ -40,20 +41,31 @@ groups_only = lambda message: message.chat.type in ['group', 'supergroup']  # no
 # endregion
 
 
+def render_profile(uid: int) -> str | None:
+    """Get the profile info text of a user (cached until the profile changes); None if the user is not found."""
+    return db.get_user_profile_text(uid, lambda profile: replies.profile_info(profile._asdict()))
+
+
+def profile_text(uid: int) -> str:
+    """Get the profile info text of a user or, if the user is not found, the hint to /start."""
+    return render_profile(uid) or replies.please_start_bot()
+
+
 @dp.message_handler(commands=['profile'])
-@dp.message_handler(lambda message: message.text == btntext.PROFILE_INFO)
+@dp.message_handler(text=btntext.PROFILE_INFO)
 async def profile_info(message: types.Message) -> None:
     """Send user profile info and edit buttons."""
     if message.chat.type == 'group':
         await message.answer(replies.profile_info_only_in_pm())
         return
-    try:
-        await bot.send_message(message.from_user.id,
-                               replies.profile_info(db.get_user_data(message.from_user.id)),
-                               reply_markup=nav.inlProfileMenu)
-    except TypeError:
+    text = render_profile(message.from_user.id)
+    if text is None:
         await bot.send_message(message.from_user.id,
                                replies.please_start_bot())
+        return
+    await bot.send_message(message.from_user.id,
+                           text,
+                           reply_markup=nav.inlProfileMenu)
 
 
 @dp.message_handler(commands=['bio'])
@@ -68,29 +80,32 @@ async def user_data_get_resume(message: types.Message) -> None:
     await message.answer(db.get_user_data_resume(message.from_user.id))
 
 
-@dp.callback_query_handler(lambda c: c.data == 'profile:edit')
+@dp.callback_query_handler(text='profile:edit')
 async def edit_profile(call: types.CallbackQuery, secondary_run: bool = False) -> None:
     """Edit user profile."""
     keyboard = get_profile_edit_fields_kb()
     if not secondary_run:
         await call.answer()
-        await call.message.edit_text(replies.profile_info(db.get_user_data(call.from_user.id)),
+        await call.message.edit_text(profile_text(call.from_user.id),
                                      reply_markup=keyboard)
     else:
         await bot.send_message(call.from_user.id,
-                               replies.profile_info(db.get_user_data(call.from_user.id)),
+                               profile_text(call.from_user.id),
                                reply_markup=keyboard)
     mkb_remove = await call.message.answer("Убираю основную клавиатуру...", reply_markup=ReplyKeyboardRemove())
     await mkb_remove.delete()
 
 
-@dp.callback_query_handler(lambda c: c.data.startswith('profile:edit:')
-                           and not c.data.startswith('profile:edit:skill:')  # noqa: W503
-                           and not c.data == 'profile:edit:done')  # noqa: W503
+# More specific keys ('profile:edit:done', 'profile:edit:skill:') are routed to their own handlers
+@dp.callback_query_handler(text_startswith='profile:edit:')
 async def edit_profile_action(call: types.CallbackQuery, state: FSMContext) -> None:
     """Edit user profile - select action."""
     await call.answer()
-    user_data = db.get_user_data(call.from_user.id)
+    profile = db.get_user_profile(call.from_user.id)
+    if profile is None:
+        await call.message.edit_text(replies.please_start_bot())
+        return
+    user_data = profile._asdict()
     await state.update_data(profile_call=call)
     fn = lambda x: f'profile:edit:{x}'  # noqa: E731
     if call.data == fn('first_name'):
@@ -116,18 +131,18 @@ async def edit_profile_action(call: types.CallbackQuery, state: FSMContext) -> N
         await bot.send_message(call.from_user.id, f"Field is not editable yet: {call.data}")
 
 
-@dp.callback_query_handler(lambda c: c.data == 'profile:edit:done')
+@dp.callback_query_handler(text='profile:edit:done')
 async def edit_profile_done(call: types.CallbackQuery, state: FSMContext) -> None:
     """Edit user profile (Original state)."""
     await state.finish()
     await call.answer()
-    await call.message.edit_text(replies.profile_info(db.get_user_data(call.from_user.id)),
+    await call.message.edit_text(profile_text(call.from_user.id),
                                  reply_markup=nav.inlProfileMenu)
     await call.message.answer("Восстанавливаю основную клавиатуру...",
                               reply_markup=bot_generic.get_main_keyboard(call.from_user.id))
 
 
-@dp.callback_query_handler(lambda c: c.data.startswith('profile:edit:skill:'))
+@dp.callback_query_handler(text_startswith='profile:edit:skill:')
 @dp.callback_query_handler(state=UserEditProfile.skills)
 async def edit_profile_skills(call: Union[types.CallbackQuery, types.Message],
                               state: FSMContext,
@@ -141,20 +156,24 @@ async def edit_profile_skills(call: Union[types.CallbackQuery, types.Message],
     await state.set_state(UserEditProfile.skills)
     if not manual_run and call.data == 'profile:edit:skill:done':
         await call.answer()
-        await call.message.edit_text(replies.profile_info(db.get_user_data(call.from_user.id)),
+        await call.message.edit_text(profile_text(call.from_user.id),
                                      reply_markup=get_profile_edit_fields_kb())
         await state.finish()
         return
+    skills = None
     if not manual_run:
         split = call.data.split(':')
         action = split[3]
         skill = Skill[split[4]]
+        # The write returns the new skills, so the keyboard needs no reload
         if action == 'add':
-            db.add_user_skills(call.from_user.id, skill)
+            skills = db.add_user_skills(call.from_user.id, skill)
         elif action == 'remove':
-            db.remove_user_skill(call.from_user.id, skill)
-    user_data = db.get_user_data(call.from_user.id)
-    keyboard = get_skill_inl_kb(user_data['skills'])
+            skills = db.remove_user_skill(call.from_user.id, skill)
+    if skills is None:
+        profile = db.get_user_profile(call.from_user.id)
+        skills = profile.skills if profile is not None else ()
+    keyboard = get_skill_inl_kb(skills)
     cmessage = call.message if isinstance(call, types.CallbackQuery) else call
     if not message_to_be_edited:
         await cmessage.edit_text(replies.profile_edit_skills(), reply_markup=keyboard)
@@ -168,7 +187,7 @@ async def edit_profile_first_name(message: types.Message, state: FSMContext):
     profile_call = (await state.get_data())['profile_call']
     await state.update_data(first_name=message.text)
     db.set_user_first_name(message.from_user.id, message.text)
-    await profile_call.message.edit_text(replies.profile_info(db.get_user_data(profile_call.from_user.id)),
+    await profile_call.message.edit_text(profile_text(profile_call.from_user.id),
                                          reply_markup=get_profile_edit_fields_kb())
     await message.delete()
     await state.finish()
@@ -180,7 +199,7 @@ async def edit_profile_last_name(message: types.Message, state: FSMContext):
     profile_call = (await state.get_data())['profile_call']
     await state.update_data(last_name=message.text)
     db.set_user_last_name(message.from_user.id, message.text)
-    await profile_call.message.edit_text(replies.profile_info(db.get_user_data(profile_call.from_user.id)),
+    await profile_call.message.edit_text(profile_text(profile_call.from_user.id),
                                          reply_markup=get_profile_edit_fields_kb())
     await message.delete()
     await state.finish()
@@ -201,7 +220,7 @@ async def edit_profile_birthday(message: types.Message, state: FSMContext):
         return
     await state.update_data(birthday=birthday)
     db.set_user_birthday(message.from_user.id, birthday)
-    await profile_call.message.edit_text(replies.profile_info(db.get_user_data(profile_call.from_user.id)),
+    await profile_call.message.edit_text(profile_text(profile_call.from_user.id),
                                          reply_markup=get_profile_edit_fields_kb())
     await message.delete()
     await state.finish()
@@ -220,7 +239,7 @@ async def edit_profile_email(message: types.Message, state: FSMContext):
         except MessageNotModified:
             pass
         return
-    await profile_call.message.edit_text(replies.profile_info(db.get_user_data(profile_call.from_user.id)),
+    await profile_call.message.edit_text(profile_text(profile_call.from_user.id),
                                          reply_markup=get_profile_edit_fields_kb())
     await message.delete()
     await state.finish()
@@ -239,14 +258,14 @@ async def edit_profile_phone(message: types.Message, state: FSMContext):
         except MessageNotModified:
             pass
         return
-    await profile_call.message.edit_text(replies.profile_info(db.get_user_data(profile_call.from_user.id)),
+    await profile_call.message.edit_text(profile_text(profile_call.from_user.id),
                                          reply_markup=get_profile_edit_fields_kb())
     await message.delete()
     await state.finish()
 
 
 # region Profile setup flow (full profile info)
-@dp.callback_query_handler(lambda call: call.data == 'profile:setup')
+@dp.callback_query_handler(text='profile:setup')
 async def profile_setup(call: types.CallbackQuery):
     """Profile setup."""
     await call.answer()
@@ -319,7 +338,7 @@ async def profile_setup_phone(message: types.Message, state: FSMContext):
 
 
 # noinspection PyProtectedMember
-def setup(dispatcher: Dispatcher,
+def setup(dispatcher: UpdateRouter,
           bot_obj: Bot,
           generic: BotGenericFunctions):
     """Setup handlers for bot."""
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+"""Dispatcher middlewares."""
+import asyncio
+from typing import Hashable, Set, Tuple
+
+from aiogram import types
+from aiogram.dispatcher.handler import CancelHandler
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from aiogram.utils.exceptions import InvalidQueryID
+
+
+class _CallbackAck:
+    """Answers a callback query exactly once.
+
+    Replaces `CallbackQuery.answer` of the query: the first answer (the
+    handler's or the automatic one) is sent, later ones are dropped, and
+    an expired query is not an error.
+    """
+
+    def __init__(self, call: types.CallbackQuery, log):
+        self.call = call
+        self.log = log
+        self.answered = False
+        self._answer = call.answer
+        self._timer: asyncio.TimerHandle | None = None
+
+    def schedule(self, delay: float) -> None:
+        """Answer without text after `delay` seconds unless the handler answers first."""
+        self._timer = asyncio.get_running_loop().call_later(delay, lambda: asyncio.ensure_future(self.ack()))
+
+    async def answer(self, text: str | None = None, show_alert: bool | None = None,
+                     url: str | None = None, cache_time: int | None = None) -> bool:
+        if self.answered:
+            if text:
+                self.log.debug(f"Callback query {self.call.data} has already been answered, dropped: {text}")
+            return False
+        self.answered = True
+        if self._timer is not None:
+            self._timer.cancel()
+        try:
+            return await self._answer(text, show_alert, url, cache_time)
+        except InvalidQueryID:
+            # Answered too late (the query expires after ~15 seconds)
+            return False
+
+    async def ack(self) -> None:
+        """Answer without text if nothing has been answered yet."""
+        if self.answered:
+            return
+        try:
+            await self.answer()
+        except Exception as exc:
+            self.log.debug(f"Failed to answer callback query {self.call.data}: {exc}")
+
+
+class CallbackAckMiddleware(BaseMiddleware):
+    """Answers callback queries early and drops repeated taps.
+
+    Handlers that answer within `grace` seconds still show their text;
+    otherwise the query is answered without text, so the client stops
+    showing the spinner while the handler keeps working. A tap on the same
+    button of the same message by the same user is dropped while the first
+    one is still being handled; once it is done, the button works again
+    (e.g. refresh and pagination buttons that keep their callback data).
+    """
+
+    def __init__(self, log, grace: float = 0.3):
+        """Initialize the middleware."""
+        super().__init__()
+        self.log = log
+        self.grace = grace
+        self._busy: Set[Hashable] = set()  # Keys of the callback queries that are being handled
+
+    @staticmethod
+    def _key(call: types.CallbackQuery) -> Tuple:
+        message = ((call.message.chat.id, call.message.message_id)
+                   if call.message is not None
+                   else call.inline_message_id)
+        return call.from_user.id, message, call.data
+
+    async def on_pre_process_callback_query(self, call: types.CallbackQuery, data: dict) -> None:
+        key = self._key(call)
+        ack = _CallbackAck(call, self.log)
+        if key in self._busy:
+            await ack.ack()
+            raise CancelHandler()
+        self._busy.add(key)
+        call.answer = ack.answer
+        data['callback_ack'] = ack
+        if self.grace <= 0:
+            await ack.ack()
+        else:
+            ack.schedule(self.grace)
+
+    async def on_post_process_callback_query(self, call: types.CallbackQuery, results: list, data: dict) -> None:
+        # Not called for dropped taps, so this is the tap that holds the key
+        self._busy.discard(self._key(call))
+        ack = data.get('callback_ack')
+        if ack is not None:
+            await ack.ack()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+
+"""Hash-indexed update router.
+
+Handlers that are registered with an exact button text (`text=`),
+a command (`commands=`) or a callback_data prefix (`text_startswith=`)
+are stored in dicts (prefixes in a character trie) instead of being
+appended to the aiogram handler list. A single aiogram handler looks up
+the candidates for each update and only runs the remaining filters
+(state, chat type, `admin_only`, ...) of those candidates.
+
+Only the most specific key is used: an exact match wins over a prefix,
+and a longer prefix wins over a shorter one. If none of the candidates
+pass their filters, the update falls through to the generic handlers.
+"""
+import inspect
+from typing import Any, Callable, Dict, List, Iterable, NamedTuple, Union
+from aiogram import Dispatcher
+from aiogram import types
+from aiogram.dispatcher.filters import check_filters, get_filters_spec, Command, FilterNotPassed
+from aiogram.dispatcher.handler import SkipHandler, ctx_data, current_handler
+
+_ROUTES = None  # Trie node key that holds the routes of a prefix
+
+
+class Route(NamedTuple):
+    """Handler with its resolved (non-indexed) filters."""
+    callback: Callable
+    spec: inspect.FullArgSpec
+    filters: list
+
+
+class _RouteIndex:
+    """Exact-key dict and prefix trie for a single update type."""
+
+    def __init__(self):
+        self.exact: Dict[str, List[Route]] = {}
+        self.prefixes: Dict[Any, Any] = {}
+
+    def add_exact(self, key: str, route: Route) -> None:
+        self.exact.setdefault(key, []).append(route)
+
+    def add_prefix(self, prefix: str, route: Route) -> None:
+        node = self.prefixes
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node.setdefault(_ROUTES, []).append(route)
+
+    def match(self, key: str) -> List[Route] | None:
+        """Get the routes of the most specific key matching `key`."""
+        routes = self.exact.get(key)
+        if routes is not None:
+            return routes
+        node = self.prefixes
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                break
+            routes = node.get(_ROUTES, routes)
+        return routes
+
+
+def _as_list(value: Union[str, Iterable[str]]) -> List[str]:
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _get_spec(callback: Callable) -> inspect.FullArgSpec:
+    while hasattr(callback, '__wrapped__'):  # Unwrap decorated callbacks
+        callback = callback.__wrapped__
+    return inspect.getfullargspec(callback)
+
+
+def _check_spec(spec: inspect.FullArgSpec, kwargs: dict) -> dict:
+    if spec.varkw:
+        return kwargs
+    return {k: v for k, v in kwargs.items() if k in set(spec.args + spec.kwonlyargs)}
+
+
+class UpdateRouter:
+    """Routing layer in front of the aiogram dispatcher.
+
+    Mirrors the `register_*_handler` and decorator API of `Dispatcher`;
+    registrations without an indexable key are passed to the dispatcher as is.
+    """
+
+    def __init__(self, dispatcher: Dispatcher):
+        """Initialize the router and hook it into the dispatcher."""
+        self.dispatcher = dispatcher
+        self.texts = _RouteIndex()
+        self.commands: Dict[str, List[Route]] = {}
+        self.callbacks = _RouteIndex()
+        # Registered first so that indexed handlers are checked before the generic ones
+        dispatcher.message_handlers.register(self._dispatch_message)
+        dispatcher.callback_query_handlers.register(self._dispatch_callback_query)
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate everything else (other update types, middlewares, ...) to the dispatcher."""
+        return getattr(self.dispatcher, name)
+
+    # region Registration
+    def register_message_handler(self, callback: Callable, *custom_filters,
+                                 commands: Union[str, Iterable[str]] = None,
+                                 text: Union[str, Iterable[str]] = None,
+                                 text_startswith: Union[str, Iterable[str]] = None,
+                                 state=None, **kwargs) -> None:
+        """Register a message handler (indexed if it has a text or command key)."""
+        if commands is None and text is None and text_startswith is None:
+            self.dispatcher.register_message_handler(callback, *custom_filters, state=state, **kwargs)
+            return
+        if sum(key is not None for key in (commands, text, text_startswith)) > 1:
+            raise ValueError("Only one of commands, text and text_startswith can be indexed")
+        filters = self.dispatcher.filters_factory.resolve(self.dispatcher.message_handlers,
+                                                          *custom_filters,
+                                                          state=state,
+                                                          **kwargs)
+        route = Route(callback, _get_spec(callback), get_filters_spec(self.dispatcher, filters))
+        if commands is not None:
+            for command in _as_list(commands):
+                self.commands.setdefault(command.lower(), []).append(route)
+        elif text is not None:
+            for key in _as_list(text):
+                self.texts.add_exact(key, route)
+        else:
+            for prefix in _as_list(text_startswith):
+                self.texts.add_prefix(prefix, route)
+
+    def register_callback_query_handler(self, callback: Callable, *custom_filters,
+                                        text: Union[str, Iterable[str]] = None,
+                                        text_startswith: Union[str, Iterable[str]] = None,
+                                        state=None, **kwargs) -> None:
+        """Register a callback query handler (indexed if it has a callback_data key)."""
+        if text is None and text_startswith is None:
+            self.dispatcher.register_callback_query_handler(callback, *custom_filters, state=state, **kwargs)
+            return
+        if text is not None and text_startswith is not None:
+            raise ValueError("Only one of text and text_startswith can be indexed")
+        filters = self.dispatcher.filters_factory.resolve(self.dispatcher.callback_query_handlers,
+                                                          *custom_filters,
+                                                          state=state,
+                                                          **kwargs)
+        route = Route(callback, _get_spec(callback), get_filters_spec(self.dispatcher, filters))
+        if text is not None:
+            for key in _as_list(text):
+                self.callbacks.add_exact(key, route)
+        else:
+            for prefix in _as_list(text_startswith):
+                self.callbacks.add_prefix(prefix, route)
+
+    def message_handler(self, *custom_filters, **kwargs):
+        """Decorator for `register_message_handler`."""
+        def decorator(callback):
+            self.register_message_handler(callback, *custom_filters, **kwargs)
+            return callback
+        return decorator
+
+    def callback_query_handler(self, *custom_filters, **kwargs):
+        """Decorator for `register_callback_query_handler`."""
+        def decorator(callback):
+            self.register_callback_query_handler(callback, *custom_filters, **kwargs)
+            return callback
+        return decorator
+    # endregion
+
+    # region Dispatching
+    async def _dispatch_message(self, message: types.Message):
+        if message.text is None:
+            raise SkipHandler()
+        data = {}
+        if message.is_command():
+            command, _, mention = message.get_command().partition('@')
+            if mention and mention != (await message.bot.me).username:
+                raise SkipHandler()
+            routes = self.commands.get(command[1:].lower())
+            # Same handler argument as aiogram's Command filter provides
+            data['command'] = Command.CommandObj(prefix=command[0], command=command[1:],
+                                                 mention=mention or None, args=message.get_args() or None)
+        else:
+            routes = self.texts.match(message.text)
+        if not routes or not await self._notify(routes, message, data):
+            raise SkipHandler()
+
+    async def _dispatch_callback_query(self, call: types.CallbackQuery):
+        routes = self.callbacks.match(call.data) if call.data is not None else None
+        if not routes or not await self._notify(routes, call):
+            raise SkipHandler()
+
+    @staticmethod
+    async def _notify(routes: List[Route], obj: Union[types.Message, types.CallbackQuery],
+                      extra: dict | None = None) -> bool:
+        """Run the first candidate whose filters pass; return False if none did."""
+        for route in routes:
+            data = {**ctx_data.get({}), **(extra or {})}
+            try:
+                data.update(await check_filters(route.filters, (obj,)))
+            except FilterNotPassed:
+                continue
+            token = current_handler.set(route.callback)
+            try:
+                await route.callback(obj, **_check_spec(route.spec, data))
+                return True
+            except SkipHandler:
+                continue
+            finally:
+                current_handler.reset(token)
+        return False
+    # endregion
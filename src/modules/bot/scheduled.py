@@ -57,3 +57,12 @@ class BotScheduledFunctions:
             except Exception as exc:
                 self.log.error(f"Error in coworking_status_checker: {exc}")
                 await sleep(timeout)
+
+    async def write_behind_flusher(self, timeout: int = 30):
+        """Periodically flush buffered database writes (e.g. newly seen chats)"""
+        while True:
+            await sleep(timeout)
+            try:
+                self.db.flush_pending_writes()
+            except Exception as exc:
+                self.log.error(f"Error in write_behind_flusher: {exc}")
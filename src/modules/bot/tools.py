@@ -1,17 +1,72 @@
 #!/usr/bin/env python3
 
 """Common tools."""
-from typing import Union
+import asyncio
+from os import getenv
+from time import monotonic
+from typing import Dict, FrozenSet, Tuple, Union
 from aiogram import types
 
 
+class ChatAdminCache:
+    """Per-chat cache of Telegram administrator ids with TTL.
+
+    Concurrent lookups for the same chat share one getChatAdministrators call.
+    """
+
+    def __init__(self, ttl: float = 600):
+        """Initialize an empty cache."""
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[int, Tuple[float, FrozenSet[int]]] = {}
+        self._inflight: Dict[int, asyncio.Future] = {}
+        self._generations: Dict[int, int] = {}
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    async def get(self, chat: types.Chat) -> FrozenSet[int]:
+        """Get the ids of the administrators of a chat."""
+        entry = self._entries.get(chat.id)
+        if entry is not None and entry[0] > monotonic():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        future = self._inflight.get(chat.id)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(chat))
+            self._inflight[chat.id] = future
+            future.add_done_callback(lambda _: self._inflight.pop(chat.id, None))
+        return await asyncio.shield(future)
+
+    async def _fetch(self, chat: types.Chat) -> FrozenSet[int]:
+        generation = self._generations.get(chat.id, 0)
+        administrators = await chat.get_administrators()
+        admin_ids = frozenset(adm.user.id for adm in administrators)
+        # Do not store the result if the chat has been invalidated in the meantime
+        if self._generations.get(chat.id, 0) == generation:
+            self._entries[chat.id] = (monotonic() + self.ttl, admin_ids)
+        return admin_ids
+
+    def invalidate(self, chat_id: int) -> None:
+        """Drop the cached administrators of a chat."""
+        self._entries.pop(chat_id, None)
+        self._generations[chat_id] = self._generations.get(chat_id, 0) + 1
+
+
+chat_admins = ChatAdminCache(ttl=float(getenv('CHAT_ADMINS_CACHE_TTL', '600')))
+
+
 async def is_group_admin(message: types.Message) -> bool:
     """Check if the user is a group admin."""
     if not (message.chat.type == 'group' or message.chat.type == 'supergroup'):
         return True
     # Check if the user is a group admin
-    administrators = await message.chat.get_administrators()
-    administrators = [adm['user']['id'] for adm in administrators]
+    administrators = await chat_admins.get(message.chat)
     if message.from_user.id not in administrators:
         return False
     return True
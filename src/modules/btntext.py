@@ -20,6 +20,7 @@ INL_ADMIN_STATS = "📊 Статистика"
 REFRESH = "🔄 Обновить"
 BACK = "🔙 Назад"
 INL_COWORKING_STATUS_EXPLAIN = "🤨 Что это?"
+INL_COWORKING_BEST_TIME = "📊 Когда лучше прийти?"
 
 # Inline user profile buttons
 NOT_SET = "☔️ Не указано"
@@ -68,6 +69,7 @@ COWORKING_LOCATION_SHORT = "📍 Местоположение"
 BOT_SKILL_YANDEX_INTERNSHIP = "🧑‍💼 Яндекс Стажировка"
 BOT_SKILL_INSTITUTIONS = "🎓 Институты МИСИС"
 BOT_SKILL_NAVIGATION = "🧭 Навигация"
+BOT_SKILL_TEAMMATES = "🧑‍🤝‍🧑 Поиск тиммейтов"
 
 # Yandex Internship
 INL_ADMIN_YANDEX_INTERNSHIP = "🧑‍💼 Яндекс Стажировка"
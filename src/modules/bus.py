@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+"""Change notification bus between bot processes (Postgres LISTEN/NOTIFY).
+
+DBManager mutators send `NOTIFY <channel>, '<instance> <kind> <key>'` in
+the transaction of the change, so it is delivered only if it commits.
+Every process runs one ChangeListener on its own autocommit psycopg2
+connection, driven by the event loop (loop.add_reader), and applies the
+notifications of other processes to its local caches. Notifications sent
+while the listener is disconnected are lost, so the caches are reloaded
+after every (re)connect and every `fallback_ttl` seconds while the
+listener is down.
+"""
+import asyncio
+from time import monotonic
+
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from modules.db import DBManager
+
+
+class ChangeListener:
+    """Listener of change notifications for one process."""
+
+    def __init__(self, db: DBManager, log,
+                 reconnect_delay: float = 5,
+                 ping_interval: float = 60,
+                 fallback_ttl: float = 60):
+        """Initialize the listener (call run() to start it)."""
+        self.db = db
+        self.log = log
+        self.reconnect_delay = reconnect_delay
+        self.ping_interval = ping_interval
+        self.fallback_ttl = fallback_ttl
+        self.connected = False
+
+    def _connect(self):
+        conn = psycopg2.connect(host=self.db.pg_host, port=self.db.pg_port,
+                                user=self.db.pg_user, password=self.db.pg_pass,
+                                dbname=self.db.pg_db,
+                                connect_timeout=10,
+                                keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3)
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.db.notify_channel)))
+        return conn
+
+    async def run(self) -> None:
+        """Listen until cancelled, reconnecting after errors."""
+        last_reload = monotonic()
+        while True:
+            conn = None
+            try:
+                conn = self._connect()
+                self.connected = True
+                self.log.info(f"Listening for change notifications on {self.db.notify_channel}")
+                # Changes may have been missed while disconnected
+                self.db.reload_shared_caches()
+                last_reload = monotonic()
+                await self._listen(conn)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.log.error(f"Change notification listener failed: {exc}")
+            finally:
+                self.connected = False
+                if conn is not None:
+                    conn.close()
+            if monotonic() - last_reload >= self.fallback_ttl:
+                try:
+                    self.db.reload_shared_caches()
+                    last_reload = monotonic()
+                except Exception as exc:
+                    self.log.error(f"Error while reloading caches: {exc}")
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _listen(self, conn) -> None:
+        """Apply notifications as they arrive; ping the server when idle to detect a dead connection."""
+        loop = asyncio.get_running_loop()
+        readable = asyncio.Event()
+        loop.add_reader(conn.fileno(), readable.set)
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(readable.wait(), self.ping_interval)
+                except asyncio.TimeoutError:
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT 1")
+                readable.clear()
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        self.db.apply_notification(notify.payload)
+                    except Exception as exc:
+                        self.log.error(f"Error while applying change notification {notify.payload}: {exc}")
+        finally:
+            loop.remove_reader(conn.fileno())
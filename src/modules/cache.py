@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+
+"""In-memory caches for database-backed state."""
+from collections import OrderedDict
+from time import monotonic
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+from modules.dto import UserProfile
+from modules.models import Skill
+
+
+class ChatSettingsEntry(NamedTuple):
+    """Cached ChatSettings row."""
+    notifications_enabled: bool = False
+    plaintext_answers_enabled: bool = False
+
+
+class ChatSettingsCache:
+    """In-memory copy of the chat_settings table.
+
+    Reads never touch the database; chats that are not in the table yet
+    are remembered as pending and inserted by the next flush.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._entries: Dict[int, ChatSettingsEntry] = {}
+        self._pending: Set[int] = set()
+
+    def load(self, rows: Iterable[Tuple[int, bool, bool]]) -> None:
+        """Replace the cache contents with (cid, notifications, plaintext answers) rows."""
+        self._entries = {cid: ChatSettingsEntry(bool(notifications), bool(answers))
+                         for cid, notifications, answers in rows}
+        self._pending.clear()
+
+    def get(self, cid: int, register: bool = False) -> ChatSettingsEntry:
+        """Get the settings of a chat (defaults if unknown; `register` queues it for insertion)."""
+        entry = self._entries.get(cid)
+        if entry is not None:
+            return entry
+        entry = ChatSettingsEntry()
+        if register:
+            self._entries[cid] = entry
+            self._pending.add(cid)
+        return entry
+
+    def set(self, cid: int, **fields) -> ChatSettingsEntry:
+        """Update cached fields of a chat that has been written to the database."""
+        entry = self._entries.get(cid, ChatSettingsEntry())._replace(**fields)
+        self._entries[cid] = entry
+        self._pending.discard(cid)
+        return entry
+
+    def pending(self) -> List[int]:
+        """Get the chats that still have to be inserted."""
+        return list(self._pending)
+
+    def clear_pending(self) -> None:
+        """Forget pending chats after they have been inserted."""
+        self._pending.clear()
+
+    def cids(self, notifications_enabled: bool | None = None) -> List[int]:
+        """Get cached chat ids, optionally only those with notifications on/off."""
+        if notifications_enabled is None:
+            return list(self._entries)
+        return [cid for cid, entry in self._entries.items()
+                if entry.notifications_enabled == notifications_enabled]
+
+
+class UserSyncBuffer:
+    """Write-behind buffer for Telegram profile fields of registered users.
+
+    Keeps a hash of the last written (uname, first_name, last_name) per uid
+    so that only changed profiles are queued for the next batched flush.
+    Users that were looked up and not found are remembered for `miss_ttl`
+    seconds, so their messages do not query the users table every time.
+    """
+
+    def __init__(self, miss_ttl: float = 60):
+        """Initialize an empty buffer."""
+        self.miss_ttl = miss_ttl
+        self._known: Dict[int, int] = {}
+        self._pending: Dict[int, Tuple[str | None, str | None, str | None]] = {}
+        self._misses: Dict[int, float] = {}  # Unregistered uid -> time until which it is not looked up again
+
+    def load(self, rows: Iterable[Tuple[int, str | None, str | None, str | None]]) -> None:
+        """Replace the known users with (uid, uname, first_name, last_name) rows."""
+        self._known = {uid: hash((uname, first_name, last_name)) for uid, uname, first_name, last_name in rows}
+        self._pending.clear()
+        self._misses.clear()
+
+    def is_registered(self, uid: int) -> bool:
+        """Check if a user is known to be in the users table."""
+        return uid in self._known
+
+    def is_missing(self, uid: int) -> bool:
+        """Check if a user was recently looked up and not found."""
+        until = self._misses.get(uid)
+        if until is None:
+            return False
+        if until <= monotonic():
+            del self._misses[uid]
+            return False
+        return True
+
+    def set_missing(self, uid: int) -> None:
+        """Remember that a user is not registered."""
+        now = monotonic()
+        if len(self._misses) >= 4096:
+            self._misses = {u: until for u, until in self._misses.items() if until > now}
+        self._misses[uid] = now + self.miss_ttl
+
+    def forget_missing(self, uid: int) -> None:
+        """Look a user up again on the next message (e.g. after registration by another process)."""
+        self._misses.pop(uid, None)
+
+    def add(self, uid: int, uname: str | None, first_name: str | None, last_name: str | None,
+            written: bool = True) -> None:
+        """Remember a registered user; queue the fields if they have not been `written` to the database."""
+        fields = (uname, first_name, last_name)
+        self._known[uid] = hash(fields)
+        self.forget_missing(uid)
+        if written:
+            self._pending.pop(uid, None)
+        else:
+            self._pending[uid] = fields
+
+    def record(self, uid: int, uname: str | None, first_name: str | None, last_name: str | None) -> bool:
+        """Queue the latest profile fields of a registered user; return False if the user is unknown."""
+        known = self._known.get(uid)
+        if known is None:
+            return False
+        fields = (uname, first_name, last_name)
+        if hash(fields) != known:
+            self._pending[uid] = fields
+        return True
+
+    def pending(self) -> Dict[int, Tuple[str | None, str | None, str | None]]:
+        """Get the queued profile fields by uid."""
+        return dict(self._pending)
+
+    def clear_pending(self) -> None:
+        """Mark the queued profiles as written."""
+        for uid, fields in self._pending.items():
+            self._known[uid] = hash(fields)
+        self._pending.clear()
+
+
+class ProfileCache:
+    """LRU cache of user profile aggregates and their rendered text.
+
+    Setters in DBManager update or invalidate entries, so a cached
+    profile is never older than the last write made by this process.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """Initialize an empty cache holding at most `maxsize` profiles."""
+        self.maxsize = maxsize
+        self._entries: OrderedDict[int, Tuple[UserProfile, str | None]] = OrderedDict()
+
+    def get(self, uid: int) -> UserProfile | None:
+        """Get a cached profile."""
+        entry = self._entries.get(uid)
+        if entry is None:
+            return None
+        self._entries.move_to_end(uid)
+        return entry[0]
+
+    def put(self, profile: UserProfile) -> None:
+        """Cache a profile loaded from the database."""
+        self._entries[profile.uid] = (profile, None)
+        self._entries.move_to_end(profile.uid)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get_rendered(self, uid: int) -> str | None:
+        """Get the cached rendered text of a profile."""
+        entry = self._entries.get(uid)
+        return entry[1] if entry is not None else None
+
+    def set_rendered(self, uid: int, text: str) -> None:
+        """Cache the rendered text of a cached profile."""
+        entry = self._entries.get(uid)
+        if entry is not None:
+            self._entries[uid] = (entry[0], text)
+
+    def update(self, uid: int, **fields) -> None:
+        """Apply a write to a cached profile and drop its rendered text."""
+        entry = self._entries.get(uid)
+        if entry is not None:
+            self._entries[uid] = (entry[0]._replace(**fields), None)
+
+    def invalidate(self, uid: int | None = None) -> None:
+        """Drop a cached profile (all profiles if uid is None)."""
+        if uid is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(uid, None)
+
+
+class AdminRoleCache:
+    """Cache of whether users are admins.
+
+    Entries expire after `ttl` seconds so that changes that were not
+    announced on the change bus (see modules.bus) are picked up eventually.
+    """
+
+    def __init__(self, ttl: float = 60):
+        """Initialize an empty cache with entries living `ttl` seconds."""
+        self.ttl = ttl
+        self._entries: Dict[int, Tuple[bool, float]] = {}
+
+    def get(self, uid: int) -> bool | None:
+        """Get the cached role of a user (None if unknown or expired)."""
+        entry = self._entries.get(uid)
+        if entry is None or entry[1] <= monotonic():
+            return None
+        return entry[0]
+
+    def set(self, uid: int, is_admin: bool) -> None:
+        """Cache the role of a user."""
+        self._entries[uid] = (is_admin, monotonic() + self.ttl)
+
+    def invalidate(self, uid: int | None = None) -> None:
+        """Drop the role of a user (of all users if uid is None)."""
+        if uid is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(uid, None)
+
+
+class SkillIndex:
+    """Inverted index from Skill to a bitset of users.
+
+    Every user gets a dense slot number; the bitset of a skill is a Python
+    int with the slot bits of the users that have the skill set.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._slots: Dict[int, int] = {}
+        self._uids: List[int] = []
+        self._masks: Dict[int, int] = {}
+        self._bitsets: Dict[Skill, int] = {skill: 0 for skill in Skill}
+
+    def load(self, rows: Iterable[Tuple[int, int]]) -> None:
+        """Replace the index contents with (uid, skill mask) rows."""
+        self.__init__()
+        for uid, mask in rows:
+            self.set(uid, mask)
+
+    def set(self, uid: int, mask: int) -> None:
+        """Set the skill mask of a user."""
+        slot = self._slots.get(uid)
+        if slot is None:
+            slot = self._slots[uid] = len(self._uids)
+            self._uids.append(uid)
+        changed = self._masks.get(uid, 0) ^ mask
+        self._masks[uid] = mask
+        for skill in Skill:
+            if changed & skill.bit:
+                self._bitsets[skill] ^= 1 << slot
+
+    def _match(self, skills: Iterable[Skill], match_all: bool) -> int:
+        bitsets = [self._bitsets[skill] for skill in skills]
+        if not bitsets:
+            return 0
+        result = bitsets[0]
+        for bitset in bitsets[1:]:
+            result = result & bitset if match_all else result | bitset
+        return result
+
+    def count(self, skills: Iterable[Skill], match_all: bool = True) -> int:
+        """Count the users that have all (or any) of the skills."""
+        return self._match(skills, match_all).bit_count()
+
+    def find(self, skills: Iterable[Skill], match_all: bool = True,
+             offset: int = 0, limit: int | None = None) -> List[int]:
+        """Get the uids of users that have all (or any) of the skills, in slot order."""
+        bitset = self._match(skills, match_all)
+        uids = []
+        while bitset and (limit is None or len(uids) < limit):
+            low = bitset & -bitset
+            if offset:
+                offset -= 1
+            else:
+                uids.append(self._uids[low.bit_length() - 1])
+            bitset ^= low
+        return uids
@@ -2,7 +2,9 @@
 
 """Coworking status manager."""
 # region Imports
+from datetime import time
 from modules.models import CoworkingStatus
+from modules.analytics import OPEN_STATUSES
 from .db import DBManager
 # endregion
 
@@ -28,27 +30,46 @@ class Manager:
         that shows how long a coworking status will be active.
         """
         return self.db.get_coworking_delta()
+
+    def predict_next_change(self, status: CoworkingStatus) -> time | None:
+        """
+        Get the usual local time of the next opening or closing today.
+
+        Built from the status log history in memory; \
+        None if there is not enough history or the status is temporary.
+        """
+        if status == CoworkingStatus.temp_closed:
+            return None
+        return self.db.coworking_forecast.next_change(status in OPEN_STATUSES)
     # endregion
 
     # region Mutate status
-    def open(self, uid: int) -> CoworkingStatus:
+    # Mutations are compare-and-set: they return None if the status is already set
+    # or has been changed concurrently (nothing is written then)
+    def get_version(self) -> int:
+        """Get the coworking state version (to pass as `expected_version`)."""
+        return self.db.get_coworking_version()
+
+    def open(self, uid: int) -> CoworkingStatus | None:
         """Mutate coworking status to open."""
         return self.db.set_coworking_status(CoworkingStatus.open, uid)
 
-    def close(self, uid: int) -> CoworkingStatus:
+    def close(self, uid: int) -> CoworkingStatus | None:
         """Mutate coworking status to closed."""
         return self.db.set_coworking_status(CoworkingStatus.closed, uid)
 
-    def temp_close(self, uid: int, delta_mins: int = 15) -> CoworkingStatus:
+    def temp_close(self, uid: int, delta_mins: int = 15,
+                   expected_version: int | None = None) -> CoworkingStatus | None:
         """Mutate coworking status to temporarily closed."""
         return self.db.set_coworking_status(CoworkingStatus.temp_closed,
-                                            uid, delta_mins=delta_mins)
+                                            uid, delta_mins=delta_mins,
+                                            expected_version=expected_version)
 
-    def event_open(self, uid: int) -> CoworkingStatus:
+    def event_open(self, uid: int) -> CoworkingStatus | None:
         """Mutate coworking status to event open."""
         return self.db.set_coworking_status(CoworkingStatus.event_open, uid)
 
-    def event_close(self, uid: int) -> CoworkingStatus:
+    def event_close(self, uid: int) -> CoworkingStatus | None:
         """Mutate coworking status to event closed."""
         return self.db.set_coworking_status(CoworkingStatus.event_closed, uid)
     # endregion
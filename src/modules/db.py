@@ -2,20 +2,31 @@
 # region Dependencies
 from datetime import date, datetime, timedelta
 from os import getenv
-from time import sleep
+from time import monotonic, sleep
+from uuid import uuid4
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
-from typing import List, Tuple, Union
+from sqlalchemy import create_engine, func, inspect, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import array, insert as pg_insert
+from typing import Callable, Iterable, Iterator, List, Tuple, Union
 from sqlalchemy.exc import OperationalError as sqlalchemyOpError
 from psycopg2 import OperationalError as psycopg2OpError
 # endregion
 
 # region Local imports
-from modules.models import CoworkingStatus, CoworkingTrustedUser, GroupType, Skill
-from modules.models import Base, User, UserData, UserSkill, Group, ChatSettings, \
-    Coworking, AdminCoworkingNotification
+from modules.models import CoworkingStatus, CoworkingTrustedUser, GroupType, Skill, skill_mask, skills_from_mask
+from modules.models import Base, User, UserData, Group, ChatSettings, \
+    Coworking, CoworkingCurrent, CoworkingHandover, AdminCoworkingNotification, CoworkingRollup, UnreachableUser
+from modules import analytics
+from modules.cache import AdminRoleCache, ChatSettingsCache, ProfileCache, SkillIndex, UserSyncBuffer
+from modules.dto import CoworkingLogEntry, CoworkingLogPage, CoworkingLogRow, GroupRow, UserDataRow, UserPage, \
+    UserProfile, UserRow
+from modules.segments import SegmentEngine
+from modules.snapshot import CoworkingSnapshot, CoworkingState
 # endregion
 
+# Key of the advisory lock that serializes the startup migrations of the bot processes
+MIGRATION_LOCK_KEY = 0x17A3B07
+
 
 class DBManager:
     def __init__(self, log):
@@ -33,8 +44,22 @@ class DBManager:
                 sleep(2)
             else:
                 connected = True
+        # Other processes are told about committed changes with NOTIFY on this channel (see modules.bus)
+        self.notify_channel = getenv('PG_NOTIFY_CHANNEL', 'itam_bot_changes')
+        self.instance_id = uuid4().hex[:12]
+        self.chat_settings = ChatSettingsCache()
+        self.admin_roles = AdminRoleCache(ttl=float(getenv('ADMIN_CACHE_TTL', '60')))
+        self.user_sync = UserSyncBuffer(miss_ttl=float(getenv('USER_MISS_CACHE_TTL', '60')))
+        self.profiles = ProfileCache(maxsize=int(getenv('PROFILE_CACHE_SIZE', '1024')))
+        self.skill_index = SkillIndex()
+        self.segments = SegmentEngine()
+        self.stats_ttl = float(getenv('STATS_CACHE_TTL', '30'))
+        self._stats: Tuple[float, dict] | None = None
+        self.coworking_forecast = analytics.TransitionForecast()
+        self.coworking_snapshot = CoworkingSnapshot(history_size=int(getenv('COWORKING_SNAPSHOT_HISTORY', '50')))
         self._update_db()
         self.admin_groups = [GroupType.admins]
+        self._load_caches()
 
     def __del__(self):
         """Close the database connection when the object is destroyed"""
@@ -63,6 +88,18 @@ class DBManager:
         """Create the database structure if it doesn't exist (update)"""
         # Create the tables if they don't exist
         Base.metadata.create_all(self.engine)
+        self.__migrate_user_skills()
+        self.__migrate_coworking_state()
+        # create_all() does not add indexes to existing tables
+        self.session.execute(text("CREATE INDEX IF NOT EXISTS ix_coworking_status_time_id "
+                                  "ON coworking_status (time, id)"))
+        self.session.commit()
+        if self.session.query(CoworkingRollup.day).first() is None:
+            self._lock_migration()
+            # Checked again: another process may have rebuilt the rollups while this one waited for the lock
+            if self.session.query(CoworkingRollup.day).first() is None:
+                analytics.rebuild_rollups(self.session)
+            self.session.commit()
         # !Create the default groups if they don't exist
         # Create ITAM admins group
         if not self.session.query(Group).filter(Group.gtype == GroupType.admins).first():
@@ -75,14 +112,222 @@ class DBManager:
                            gid=GroupType.admins)
         self.__update_groups()
         # Create the first coworking status if it doesn't exist
-        if not self.session.query(Coworking).first():
+        if not self.session.query(CoworkingCurrent.id).first():
             self.set_coworking_status(CoworkingStatus.closed, int(getenv('DEFAULT_ADMIN_UID', "")))
 
+    def _lock_migration(self) -> None:
+        """Serialize a startup migration with the other bot processes (until the transaction ends)"""
+        self.session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+    def __migrate_user_skills(self) -> None:
+        """Move skills from the user_skills table to the user_data skill mask"""
+        if 'skills' in (c['name'] for c in inspect(self.engine).get_columns(UserData.__tablename__)):
+            return
+        self._lock_migration()
+        # Another process may have migrated the table while this one waited for the lock
+        if self.session.execute(text("SELECT 1 FROM information_schema.columns "
+                                     "WHERE table_name = 'user_data' AND column_name = 'skills'")).first():
+            self.session.commit()
+            return
+        self.session.execute(text("ALTER TABLE user_data ADD COLUMN skills INTEGER NOT NULL DEFAULT 0"))
+        self.session.execute(text("UPDATE user_data SET skills = s.mask "
+                                  "FROM (SELECT uid, bit_or(1 << skill) AS mask FROM user_skills GROUP BY uid) AS s "
+                                  "WHERE user_data.uid = s.uid"))
+        self.session.commit()
+
+    def __migrate_coworking_state(self) -> None:
+        """Create the current coworking state row from the log and move responsibility handovers out of the log"""
+        if self.session.query(CoworkingCurrent.id).first() is not None:
+            return
+        self._lock_migration()
+        # Another process may have migrated the log while this one waited for the lock
+        if self.session.query(CoworkingCurrent.id).first() is not None:
+            self.session.commit()
+            return
+        # Handovers used to repeat the current status (without a delta) as a new log entry
+        self.session.execute(text("""
+            WITH log AS (SELECT id, status, temp_delta, lag(status) OVER (ORDER BY time, id) AS previous
+                         FROM coworking_status),
+                 moved AS (DELETE FROM coworking_status USING log
+                           WHERE coworking_status.id = log.id
+                             AND log.previous = log.status AND log.temp_delta IS NULL
+                           RETURNING coworking_status.uid, coworking_status.time, coworking_status.status)
+            INSERT INTO coworking_handovers (uid, time, status)
+            SELECT uid, time, status FROM moved WHERE uid IS NOT NULL"""))
+        self.session.execute(text("""
+            INSERT INTO coworking_state (id, version, status, uid, since, updated, temp_delta)
+            SELECT 1, 1, t.status, coalesce(h.uid, t.uid), t.time, coalesce(h.time, t.time), t.temp_delta
+            FROM (SELECT * FROM coworking_status ORDER BY time DESC, id DESC LIMIT 1) AS t
+            LEFT JOIN LATERAL (SELECT uid, time FROM coworking_handovers
+                               WHERE time >= t.time ORDER BY time DESC, id DESC LIMIT 1) AS h ON true
+            ON CONFLICT (id) DO NOTHING"""))
+        self.session.commit()
+
     def __update_groups(self) -> None:
         """Create groups from the models in the database"""
         for group in GroupType:
             if not self.session.query(Group).filter(Group.gtype == group).first():
                 self.add_group(gid=group, name=group.name, gtype=group)
+
+    def _load_caches(self) -> None:
+        """Load the in-memory caches (ChatSettings, known users, skill index, segments, \
+coworking forecast and snapshot) from the database"""
+        self.chat_settings.load(self.session.query(ChatSettings.cid,
+                                                   ChatSettings.notifications_enabled,
+                                                   ChatSettings.plaintext_answers_enabled).all())
+        self._load_user_caches()
+        self.coworking_forecast.load(analytics.open_transitions(self.session))
+        self._load_coworking_snapshot()
+
+    def _load_user_caches(self) -> None:
+        """Load the known users, the skill index and the segments from the database"""
+        self.user_sync.load(self.session.query(User.uid, User.uname, User.first_name, User.last_name).all())
+        self.skill_index.load(self.session.query(UserData.uid, UserData.skills).filter(UserData.skills != 0).all())
+        self.segments.load(self.session.query(User.uid, User.gid, UserData.skills)
+                           .outerjoin(UserData, UserData.uid == User.uid)
+                           .all(),
+                           unreachable=[row.uid for row in self.session.query(UnreachableUser.uid)])
+
+    # region Change notifications
+    def _notify(self, kind: str, key) -> None:
+        """Announce a change to other processes; it is delivered when the transaction commits"""
+        self.session.execute(text("SELECT pg_notify(:channel, :payload)"),
+                             {"channel": self.notify_channel, "payload": f"{self.instance_id} {kind} {key}"})
+
+    def apply_notification(self, payload: str) -> None:
+        """Refresh or invalidate the local caches affected by a change committed by another process"""
+        origin, kind, key = payload.split(" ", 2)
+        if origin == self.instance_id:
+            return
+        if kind == 'chat':
+            self._refresh_chat_settings(int(key))
+        elif kind == 'user':
+            self._refresh_user(int(key))
+        elif kind == 'reachability':
+            self._refresh_reachability(int(key))
+        elif kind == 'coworking':
+            state = self.coworking_snapshot.state
+            if state is None or int(key) > state.version:
+                self._refresh_coworking()
+        else:
+            self.log.warning(f"Unknown change notification: {payload}")
+
+    def reload_shared_caches(self) -> None:
+        """Reload all caches that other processes can invalidate (after missed notifications)"""
+        # Loading replaces the pending chats, so write them first
+        self.flush_pending_writes()
+        self.chat_settings.load(self.session.query(ChatSettings.cid,
+                                                   ChatSettings.notifications_enabled,
+                                                   ChatSettings.plaintext_answers_enabled).all())
+        self._load_user_caches()
+        self.admin_roles.invalidate()
+        self.profiles.invalidate()
+        self._refresh_coworking()
+
+    def _refresh_chat_settings(self, cid: int) -> None:
+        row = (self.session.query(ChatSettings.notifications_enabled, ChatSettings.plaintext_answers_enabled)
+               .filter(ChatSettings.cid == cid)
+               .first())
+        if row is not None:
+            self.chat_settings.set(cid,
+                                   notifications_enabled=bool(row.notifications_enabled),
+                                   plaintext_answers_enabled=bool(row.plaintext_answers_enabled))
+
+    def _refresh_user(self, uid: int) -> None:
+        self.admin_roles.invalidate(uid)
+        self.profiles.invalidate(uid)
+        row = (self.session.query(User.uname, User.first_name, User.last_name, User.gid, UserData.skills)
+               .outerjoin(UserData, UserData.uid == User.uid)
+               .filter(User.uid == uid)
+               .first())
+        if row is not None:
+            if not self.user_sync.is_registered(uid):
+                self.user_sync.add(uid, row.uname, row.first_name, row.last_name)
+            self.skill_index.set(uid, row.skills or 0)
+            self.segments.update(uid, gid=row.gid, skills=row.skills or 0)
+
+    def _refresh_reachability(self, uid: int) -> None:
+        if self.session.query(UnreachableUser.uid).filter(UnreachableUser.uid == uid).first() is None:
+            self.segments.mark_reachable(uid)
+        else:
+            self.segments.mark_unreachable(uid)
+
+    def _refresh_coworking(self) -> None:
+        previous = self.coworking_snapshot.state
+        self._load_coworking_snapshot()
+        state = self.coworking_snapshot.state
+        if state is not None and (previous is None or state.since != previous.since):
+            is_open = state.status in analytics.OPEN_STATUSES
+            if previous is None or (previous.status in analytics.OPEN_STATUSES) != is_open:
+                self.coworking_forecast.add(state.since, is_open)
+    # endregion
+
+    def _load_coworking_snapshot(self) -> None:
+        """Load the current coworking state and the latest status transitions into the snapshot"""
+        try:
+            state = self._get_coworking_state()
+        except AttributeError:
+            return
+        transitions = (self.session.query(Coworking.time, Coworking.status)
+                       .order_by(Coworking.time.desc(), Coworking.id.desc())
+                       .limit(self.coworking_snapshot.history_size)
+                       .all())
+        self.coworking_snapshot.load(CoworkingState(state.version,
+                                                    CoworkingStatus(state.status),
+                                                    state.since,
+                                                    state.updated,
+                                                    self._get_uname(state.uid),
+                                                    state.temp_delta),
+                                     [(time, CoworkingStatus(status)) for time, status in reversed(transitions)])
+
+    def flush_pending_writes(self) -> None:
+        """Write buffered changes to the database in batches"""
+        try:
+            pending_cids = self.chat_settings.pending()
+            if pending_cids:
+                self.session.execute(pg_insert(ChatSettings)
+                                     .values([{"cid": cid,
+                                               "notifications_enabled": False,
+                                               "plaintext_answers_enabled": False} for cid in pending_cids])
+                                     .on_conflict_do_nothing(index_elements=[ChatSettings.cid]))
+                self.session.commit()
+                self.chat_settings.clear_pending()
+            pending_users = self.user_sync.pending()
+            if pending_users:
+                stmt = pg_insert(User).values([{"uid": uid,
+                                                "uname": uname,
+                                                "first_name": first_name,
+                                                "last_name": last_name,
+                                                "gid": GroupType.users}
+                                               for uid, (uname, first_name, last_name) in pending_users.items()])
+                # Names edited in the profile take precedence over the Telegram ones
+                self.session.execute(stmt.on_conflict_do_update(
+                    index_elements=[User.uid],
+                    set_={"uname": stmt.excluded.uname,
+                          "first_name": func.coalesce(User.first_name, stmt.excluded.first_name),
+                          "last_name": func.coalesce(User.last_name, stmt.excluded.last_name)}))
+                self.session.commit()
+                self.user_sync.clear_pending()
+                for uid in pending_users:
+                    self.profiles.invalidate(uid)
+        except Exception:
+            # Keep the buffers so that the next flush retries them
+            self.session.rollback()
+            raise
+    # endregion
+
+    # region Read-only rows
+    # Column queries mapped into DTOs; the rows are never attached to the session
+    _USER_COLUMNS = (User.uid, User.uname, User.first_name, User.last_name, User.gid)
+    _USER_DATA_COLUMNS = (UserData.uid, UserData.bio, UserData.resume, UserData.birthday,
+                          UserData.phone, UserData.email, UserData.skills)
+    _GROUP_COLUMNS = (Group.gid, Group.name, Group.gtype)
+    _COWORKING_LOG_COLUMNS = (Coworking.id, Coworking.uid, Coworking.time, Coworking.status, Coworking.temp_delta)
+
+    @staticmethod
+    def _rows(dto, query) -> list:
+        """Map the rows of a column query into DTOs"""
+        return [dto._make(row) for row in query]
     # endregion
 
     # region User management
@@ -90,25 +335,81 @@ class DBManager:
         """Check if a user exists in the database"""
         return self.session.query(User).filter(User.uid == uid).first() is not None
 
-    def add_regular_user(self, uid: int, uname: str, first_name: str, last_name: str) -> None:
-        """Add a regular user of type `user` to the database"""
-        if self.user_exists(uid):
-            return
-        user = User(uid=uid, uname=uname, first_name=first_name, last_name=last_name, gid=GroupType.users)
-        self.session.add(user)
-        self.session.commit()
-        userdata = UserData(uid=uid)
-        self.session.add(userdata)
-        self.session.commit()
+    def _register_users(self, users: List[dict]) -> List[int]:
+        """Insert User and UserData rows in one transaction, skipping existing users.
 
-    def add_admin(self, uid: int, uname: str, first_name: str, gid: int):
-        """Add an admin to the database"""
-        admin = User(uid=uid, uname=uname, first_name=first_name, gid=gid)
-        self.session.add(admin)
-        self.session.commit()
-        userdata = UserData(uid=uid)
-        self.session.add(userdata)
-        self.session.commit()
+        Return the uids that have been created."""
+        try:
+            created = (self.session.execute(pg_insert(User)
+                                            .values(users)
+                                            .on_conflict_do_nothing(index_elements=[User.uid])
+                                            .returning(User.uid))
+                       .scalars().all())
+            self.session.execute(pg_insert(UserData)
+                                 .values([{"uid": u["uid"]} for u in users])
+                                 .on_conflict_do_nothing(index_elements=[UserData.uid]))
+            for uid in created:
+                self._notify('user', uid)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        created_uids = set(created)
+        for u in users:
+            # Existing users keep their stored fields; sync_user_profile loads them into the cache on demand
+            if u["uid"] in created_uids:
+                self.user_sync.add(u["uid"], u["uname"], u["first_name"], u["last_name"])
+                self.segments.update(u["uid"], gid=u["gid"])
+            else:
+                self.user_sync.forget_missing(u["uid"])
+        return created
+
+    def add_regular_user(self, uid: int, uname: str, first_name: str, last_name: str) -> bool:
+        """Add a regular user of type `user` to the database
+
+        Return False if the user already exists."""
+        return bool(self._register_users([{"uid": uid,
+                                           "uname": uname,
+                                           "first_name": first_name,
+                                           "last_name": last_name,
+                                           "gid": GroupType.users}]))
+
+    def add_admin(self, uid: int, uname: str, first_name: str, gid: int) -> bool:
+        """Add an admin to the database
+
+        Return False if the user already exists."""
+        return bool(self._register_users([{"uid": uid,
+                                           "uname": uname,
+                                           "first_name": first_name,
+                                           "last_name": None,
+                                           "gid": gid}]))
+
+    def add_users_bulk(self,
+                       users: Iterable[Tuple[int, str | None, str | None, str | None]],
+                       gid: int = GroupType.users,
+                       batch_size: int = 1000) -> int:
+        """Import (uid, uname, first_name, last_name) users of a group in batches
+
+        Return the number of users that have been created."""
+        created = 0
+        batch = {}
+        for uid, uname, first_name, last_name in users:
+            batch[uid] = {"uid": uid,
+                          "uname": uname,
+                          "first_name": first_name,
+                          "last_name": last_name,
+                          "gid": gid}
+            if len(batch) >= batch_size:
+                created += len(self._register_users(self._sorted_batch(batch)))
+                batch = {}
+        if batch:
+            created += len(self._register_users(self._sorted_batch(batch)))
+        return created
+
+    @staticmethod
+    def _sorted_batch(batch: dict) -> List[dict]:
+        # Concurrent imports lock the rows in the same (uid) order, so they cannot deadlock
+        return [batch[uid] for uid in sorted(batch)]
 
     def get_group_name(self, gid: int) -> str | None:
         """Get the name of a group from its ID"""
@@ -127,6 +428,49 @@ class DBManager:
         self.session.query(User).filter(User.uid == uid).first().uname = uname
         self.session.commit()
 
+    def sync_user_profile(self, uid: int, uname: str, first_name: str, last_name: str) -> bool:
+        """Queue the current Telegram profile fields of a registered user for the next flush.
+
+        Return False (and queue nothing) if the user is not registered."""
+        # The user has contacted the bot, so broadcasts can reach them again
+        self.mark_reachable(uid)
+        if not self.user_sync.is_registered(uid) and (self.user_sync.is_missing(uid)
+                                                      or not self._load_known_user(uid)):
+            return False
+        return self.user_sync.record(uid, uname, first_name, last_name)
+
+    def mark_unreachable(self, uid: int) -> None:
+        """Exclude a user that could not receive a message from the segments (in all processes)"""
+        if uid in self.segments.unreachable:
+            return
+        self.segments.mark_unreachable(uid)
+        self.session.execute(pg_insert(UnreachableUser).values(uid=uid).on_conflict_do_nothing())
+        self._notify('reachability', uid)
+        self.session.commit()
+
+    def mark_reachable(self, uid: int) -> None:
+        """Include a user in the segments again (in all processes)"""
+        # All processes share the same set, so only users that are excluded here need a write
+        if uid not in self.segments.unreachable:
+            return
+        self.segments.mark_reachable(uid)
+        self.session.query(UnreachableUser).filter(UnreachableUser.uid == uid).delete()
+        self._notify('reachability', uid)
+        self.session.commit()
+
+    def _load_known_user(self, uid: int) -> bool:
+        """Add a user that is missing from the cache (e.g. registered by another process) from the database
+
+        Return False if the user is not registered."""
+        row = (self.session.query(User.uname, User.first_name, User.last_name)
+               .filter(User.uid == uid)
+               .first())
+        if row is None:
+            self.user_sync.set_missing(uid)
+            return False
+        self.user_sync.add(uid, row.uname, row.first_name, row.last_name)
+        return True
+
     def is_uname_set(self, uid: int) -> bool:
         """Check if the uid has an uname set"""
         user = self.session.query(User).filter(User.uid == uid).first()
@@ -139,33 +483,38 @@ class DBManager:
         return self.session.query(User).filter(User.uid == uid).first() is not None
 
     def is_admin(self, uid: int) -> bool:
-        """Check if a user is in the admins list"""
-        user = self.session.query(User).filter(User.uid == uid).first()
-        if user is not None:
-            group = self.session.query(Group).filter(Group.gid == user.gid).first()
-            if group is not None:
-                return group.gtype in self.admin_groups
-        return False
+        """Check if a user is in the admins list (cached)"""
+        is_admin = self.admin_roles.get(uid)
+        if is_admin is None:
+            gtype = (self.session.query(Group.gtype)
+                     .join(User, User.gid == Group.gid)
+                     .filter(User.uid == uid)
+                     .scalar())
+            is_admin = gtype is not None and gtype in self.admin_groups
+            self.admin_roles.set(uid, is_admin)
+        return is_admin
     # endregion
 
     # region Group management
     def set_user_group(self, uid: int, gid: int):
         """Set the group id of an admin"""
         self.session.query(User).filter(User.uid == uid).first().gid = gid
+        self._notify('user', uid)
         self.session.commit()
+        self.profiles.invalidate(uid)
+        self.admin_roles.invalidate(uid)
+        self.segments.update(uid, gid=gid)
 
     def get_groups_and_ids(self) -> str:  # TODO: Change to List[Group]
         """Get a string list of group names and their respective IDs"""
-        groups = self.session.query(Group).all()
-        return "\n".join([f"{g.gid}. {g.name}" for g in groups])
+        return "\n".join([f"{gid}. {name}" for gid, name in self.session.query(Group.gid, Group.name)])
 
     def get_groups_and_ids_as_dict_namekey(self) -> dict:
         """Get a dictionary of group names and their respective IDs"""
-        groups_raw = self.session.query(Group).all()
         groups = {}
-        for group in groups_raw:
-            groups[group.name] = {
-                "gid": group.gid
+        for gid, name in self.session.query(Group.gid, Group.name):
+            groups[name] = {
+                "gid": gid
             }
         return groups
 
@@ -174,67 +523,138 @@ class DBManager:
         self.session.add(group)
         self.session.commit()
 
-    def get_groups(self, gtype: GroupType = None) -> List[Group]:  # TODO: FIX!
-        """Get a string list of group names of a given type"""
+    def get_groups(self, gtype: GroupType = None) -> List[GroupRow]:
+        """Get a list of groups (of a given type)"""
+        query = self.session.query(*self._GROUP_COLUMNS)
         if gtype is not None:
-            groups = self.session.query(Group).filter(Group.gtype == gtype).all()
-        else:
-            groups = self.session.query(Group).all()
-        return groups
+            query = query.filter(Group.gtype == gtype)
+        return self._rows(GroupRow, query)
     # endregion
 
     # region Chat management
     def get_group_chats(self) -> List[int]:
         """Get a list of Telegram group chats from ChatSettings table"""
-        chats = self.session.query(ChatSettings).filter(ChatSettings.cid < 0).all()
-        return [c.cid for c in chats]
+        return [cid for cid in self.chat_settings.cids() if cid < 0]
+
+    def _upsert_chat_settings(self, cid: int, **fields) -> None:
+        """Insert or update ChatSettings fields of a chat id (cid) and update the cache (write-through)."""
+        self.session.execute(pg_insert(ChatSettings)
+                             .values(cid=cid, **{**self.chat_settings.get(cid)._asdict(), **fields})
+                             .on_conflict_do_update(index_elements=[ChatSettings.cid], set_=fields))
+        self._notify('chat', cid)
+        self.session.commit()
+        self.chat_settings.set(cid, **fields)
     # endregion
 
     # region Admin statistics
     def get_users_str(self, gid: int = None) -> str:
         """Get a string list of users of a given group"""
+        query = self.session.query(User.uid, User.first_name)
         if gid is not None:
-            users = self.session.query(User).filter(User.gid == gid).all()
-            return "\n".join([f"{i+1}. {u.first_name} [{u.uid}]" for i, u in enumerate(users)])
-        else:
-            users = self.session.query(User).all()
-            return "\n".join([f"{i+1}. {u.first_name} [{u.uid}]" for i, u in enumerate(users)])
+            query = query.filter(User.gid == gid)
+        return "\n".join([f"{i+1}. {first_name} [{uid}]" for i, (uid, first_name) in enumerate(query)])
 
     def get_users_verbose_str(self) -> str:
         """Get a string list of users and their groups"""
-        users = self.session.query(User).all()
+        users = (self.session.query(*self._USER_COLUMNS, Group.name)
+                 .outerjoin(Group, Group.gid == User.gid))
         return "\n".join([f"{i+1}. [{u.first_name} {u.last_name if u.last_name else ''}] \
-@{u.uname if u.uname else '—'} [{u.uid}] ({self.get_group_name(u.gid)})" for i, u in enumerate(users)])
+@{u.uname if u.uname else '—'} [{u.uid}] ({u.name})" for i, u in enumerate(users)])
 
-    def get_users(self) -> List[User]:
+    def get_users(self) -> List[UserRow]:
         """Get a list of users."""
-        return self.session.query(User).all()
-
-    def get_users_data(self) -> List[UserData]:
+        return self._rows(UserRow, self.session.query(*self._USER_COLUMNS))
+
+    def get_users_page(self,
+                       after_uid: int | None = None,
+                       before_uid: int | None = None,
+                       gid: int | None = None,
+                       skill: Skill | None = None,
+                       limit: int = 20) -> UserPage:
+        """Get a page of users ordered by uid (keyset pagination)
+
+        Pages start after `after_uid` (next page) or end before `before_uid` (previous page);
+        only `limit` + 1 rows are read from the database."""
+        query = self.session.query(*self._USER_COLUMNS)
+        if gid is not None:
+            query = query.filter(User.gid == gid)
+        if skill is not None:
+            query = (query.join(UserData, UserData.uid == User.uid)
+                     .filter(UserData.skills.op('&')(skill.bit) != 0))
+        if before_uid is not None:
+            rows = self._rows(UserRow, (query.filter(User.uid < before_uid)
+                                        .order_by(User.uid.desc())
+                                        .limit(limit + 1)))
+            return UserPage(rows[:limit][::-1], has_prev=len(rows) > limit, has_next=True)
+        if after_uid is not None:
+            query = query.filter(User.uid > after_uid)
+        rows = self._rows(UserRow, query.order_by(User.uid).limit(limit + 1))
+        return UserPage(rows[:limit], has_prev=after_uid is not None, has_next=len(rows) > limit)
+
+    def get_users_data(self) -> List[UserDataRow]:
         """Get a list of users data."""
-        return self.session.query(UserData).all()
+        return self._rows(UserDataRow, self.session.query(*self._USER_DATA_COLUMNS))
+
+    def get_users_full(self) -> List[Tuple[User, UserData, Tuple[Skill, ...]]]:
+        """Get a list of users and their data (including skills)"""
+        return [(u, ud, skills_from_mask(ud.skills))
+                for u, ud in self.session.query(User, UserData).join(UserData, UserData.uid == User.uid).all()]
+
+    def find_teammates(self, skills: Iterable[Skill], match_all: bool = True,
+                       offset: int = 0, limit: int = 10) -> Tuple[List[UserRow], int]:
+        """Get a page of users that have all (or any) of the skills (from the skill index)
 
-    def get_users_full(self) -> List[Tuple[User, UserData, List[UserSkill]]]:
-        """Get a list of users and their data (including UserSkill list)"""
-        users = self.session.query(User).all()
-        users_data = self.session.query(UserData).all()
-        users_skills = self.session.query(UserSkill).all()
-        return [(u, ud, [us for us in users_skills if us.uid == u.uid])
-                for u in users for ud in users_data if u.uid == ud.uid]
+        Return the users of the page and the total number of matching users."""
+        skills = list(skills)
+        uids = self.skill_index.find(skills, match_all, offset=offset, limit=limit)
+        users = {u.uid: u for u in self._rows(UserRow, (self.session.query(*self._USER_COLUMNS)
+                                                        .filter(User.uid.in_(uids))))} if uids else {}
+        return [users[uid] for uid in uids if uid in users], self.skill_index.count(skills, match_all)
 
-    def get_admins(self) -> List[User]:
+    def get_admins(self) -> List[UserRow]:
         """Get a list of admins"""
-        return self.session.query(User).filter(User.gid == GroupType.admins).all()
+        return self._rows(UserRow, self.session.query(*self._USER_COLUMNS).filter(User.gid == GroupType.admins))
 
-    def get_coworking_log(self) -> List[Coworking]:
-        return self.session.query(Coworking).all()
+    def get_coworking_log(self) -> List[CoworkingLogRow]:
+        """Get the coworking status log (oldest first)"""
+        return self._rows(CoworkingLogRow, self.session.query(*self._COWORKING_LOG_COLUMNS).order_by(Coworking.id))
 
     def get_coworking_log_str(self) -> str:
-        return "\n".join([f"""{i+1}. {c.time} - {c.uid} - \
-{'open' if c.status == CoworkingStatus.open
-        else ('event_open' if CoworkingStatus.event_open
-              else ('temp_closed' if CoworkingStatus.temp_closed
-                    else 'closed'))}""" for i, c in enumerate(self.get_coworking_log())])
+        return "\n".join([f"{i+1}. {c.time} - {c.uid} - {CoworkingStatus(c.status).name}"
+                          for i, c in enumerate(self.get_coworking_log())])
+
+    def get_coworking_log_page(self,
+                               since: datetime | None = None,
+                               until: datetime | None = None,
+                               older_than: Tuple[datetime, int] | None = None,
+                               newer_than: Tuple[datetime, int] | None = None,
+                               limit: int = 15) -> CoworkingLogPage:
+        """Get a page of the coworking log within [since, until), newest first
+
+        Pages are keyed by (time, id) of the last/first entry of the adjacent page,
+        so only `limit` + 1 rows are read through the (time, id) index."""
+        query = (self.session.query(Coworking.id,
+                                    Coworking.time,
+                                    Coworking.status,
+                                    Coworking.uid,
+                                    User.uname,
+                                    Coworking.temp_delta)
+                 .outerjoin(User, User.uid == Coworking.uid))
+        if since is not None:
+            query = query.filter(Coworking.time >= since)
+        if until is not None:
+            query = query.filter(Coworking.time < until)
+        key = tuple_(Coworking.time, Coworking.id)
+        if newer_than is not None:
+            rows = self._rows(CoworkingLogEntry, (query.filter(key > tuple_(*newer_than))
+                                                  .order_by(Coworking.time, Coworking.id)
+                                                  .limit(limit + 1)))
+            return CoworkingLogPage(rows[:limit][::-1], has_newer=len(rows) > limit, has_older=True)
+        if older_than is not None:
+            query = query.filter(key < tuple_(*older_than))
+        rows = self._rows(CoworkingLogEntry, (query.order_by(Coworking.time.desc(), Coworking.id.desc())
+                                              .limit(limit + 1)))
+        return CoworkingLogPage(rows[:limit], has_newer=older_than is not None, has_older=len(rows) > limit)
 
     def get_user_count(self) -> int:
         """Get the current amount of users in the database"""
@@ -245,35 +665,85 @@ class DBManager:
         return self.session.query(User).filter(User.gid == GroupType.admins).count()
 
     def get_stats(self) -> dict:
-        """Get a dict of all stats"""
-        return {
-            "users": self.get_user_count(),
-            "admins": self.get_admin_count(),
-            "coworking_status": self.get_coworking_status(),
-            "coworking_log_count": len(self.get_coworking_log()),
-            "coworking_notifications": self.get_coworking_notification_enabled_count()
+        """Get a dict of all stats
+
+        Database counters are read with a single aggregate statement; the result
+        is cached for `stats_ttl` seconds and carries its "as_of" time (UTC)."""
+        if self._stats is not None and self._stats[0] > monotonic():
+            return self._stats[1]
+        week_ago = datetime.utcnow() - timedelta(days=7)
+        row = self.session.execute(select(
+            select(func.count()).select_from(User).scalar_subquery().label("users"),
+            (select(func.count()).select_from(User)
+             .where(User.gid == GroupType.admins)
+             .scalar_subquery().label("admins")),
+            (select(CoworkingCurrent.status)
+             .where(CoworkingCurrent.id == 1)
+             .scalar_subquery().label("coworking_status")),
+            select(func.count()).select_from(Coworking).scalar_subquery().label("coworking_log_count"),
+            (select(func.count()).select_from(Coworking)
+             .where(Coworking.status.in_([CoworkingStatus.open, CoworkingStatus.event_open]),
+                    Coworking.time >= week_ago)
+             .scalar_subquery().label("coworking_opens_week")),
+            (select(array([func.count().filter(UserData.skills.op('&')(skill.bit) != 0) for skill in Skill]))
+             .select_from(UserData)
+             .scalar_subquery().label("skills"))
+        )).one()
+        stats = {
+            "as_of": datetime.utcnow(),
+            "users": row.users,
+            "admins": row.admins,
+            "reachable_users": self.segments.size('all'),
+            "coworking_status": CoworkingStatus(row.coworking_status) if row.coworking_status is not None else None,
+            "coworking_log_count": row.coworking_log_count,
+            "coworking_opens_week": row.coworking_opens_week,
+            "coworking_notifications": self.get_coworking_notification_enabled_count(),
+            "skills": dict(zip(Skill, row.skills or [0] * len(Skill)))
         }
+        self._stats = (monotonic() + self.stats_ttl, stats)
+        return stats
     # endregion
 
     # region User data getters
+    def get_user_profile(self, uid: int) -> UserProfile | None:
+        """Get the profile aggregate of a user (cached, loaded with a single query)"""
+        profile = self.profiles.get(uid)
+        if profile is not None:
+            return profile
+        row = (self.session.query(User.uid,
+                                  User.uname,
+                                  User.first_name,
+                                  User.last_name,
+                                  Group.name,
+                                  UserData.phone,
+                                  UserData.email,
+                                  UserData.birthday,
+                                  UserData.skills)
+               .outerjoin(UserData, UserData.uid == User.uid)
+               .outerjoin(Group, Group.gid == User.gid)
+               .filter(User.uid == uid)
+               .first())
+        if row is None:
+            return None
+        profile = UserProfile(*row[:-1], skills=skills_from_mask(row[-1] or 0))
+        self.profiles.put(profile)
+        return profile
+
+    def get_user_profile_text(self, uid: int, render: Callable[[UserProfile], str]) -> str | None:
+        """Get the rendered profile text of a user (cached until the profile changes); None if the user is not found"""
+        text = self.profiles.get_rendered(uid)
+        if text is None:
+            profile = self.get_user_profile(uid)
+            if profile is None:
+                return None
+            text = render(profile)
+            self.profiles.set_rendered(uid, text)
+        return text
+
     def get_user_data(self, uid: int) -> dict | None:
         """Get information about a user"""
-        main = self.session.query(User).filter(User.uid == uid).first()
-        aux = self.session.query(UserData).filter(UserData.uid == uid).first()
-        skills = self.session.query(UserSkill).filter(UserSkill.uid == uid).all()
-        if main is None:
-            return None
-        return {
-            "uid": main.uid,
-            "uname": main.uname,
-            "first_name": main.first_name,
-            "last_name": main.last_name,
-            "gname": self.get_group_name(main.gid),
-            "phone": aux.phone if aux else None,
-            "email": aux.email if aux else None,
-            "birthday": aux.birthday if aux else None,
-            "skills": [s.skill for s in skills]
-        }
+        profile = self.get_user_profile(uid)
+        return profile._asdict() if profile is not None else None
 
     def get_user_data_bio(self, uid: int) -> str | None:
         """Get the bio of a user"""
@@ -300,7 +770,9 @@ class DBManager:
             raise AttributeError("User not found")
         user.first_name = first_name
         user.last_name = last_name
+        self._notify('user', uid)
         self.session.commit()
+        self.profiles.update(uid, first_name=first_name, last_name=last_name)
         return first_name, last_name
 
     def set_user_first_name(self, uid: int, first_name: str) -> str:
@@ -309,7 +781,9 @@ class DBManager:
         if user is None:
             raise AttributeError("User not found")
         user.first_name = first_name
+        self._notify('user', uid)
         self.session.commit()
+        self.profiles.update(uid, first_name=first_name)
         return first_name
 
     def set_user_last_name(self, uid: int, last_name: str) -> str:
@@ -318,7 +792,9 @@ class DBManager:
         if user is None:
             raise AttributeError("User not found")
         user.last_name = last_name
+        self._notify('user', uid)
         self.session.commit()
+        self.profiles.update(uid, last_name=last_name)
         return last_name
 
     def set_user_birthday(self, uid: int, birthday: date) -> date:
@@ -328,7 +804,9 @@ class DBManager:
         if user is None:
             raise AttributeError("User not found")
         user.birthday = birthday
+        self._notify('user', uid)
         self.session.commit()
+        self.profiles.update(uid, birthday=birthday)
         return birthday
 
     def set_user_email(self, uid: int, email: str) -> str:
@@ -339,7 +817,9 @@ class DBManager:
         if user is None:
             raise AttributeError("User not found")
         user.email = email
+        self._notify('user', uid)
         self.session.commit()
+        self.profiles.update(uid, email=email)
         return email
 
     def set_user_phone(self, uid: int, phone: int) -> int:
@@ -353,118 +833,219 @@ class DBManager:
         if user is None:
             raise AttributeError("User not found")
         user.phone = phone
+        self._notify('user', uid)
         self.session.commit()
+        self.profiles.update(uid, phone=phone)
         return phone
 
     def skill_exists(self, uid: int, skill: Skill) -> bool:
         """Check if a skill exists for a user"""
-        return (self.session.query(UserSkill)
-                .filter(UserSkill.uid == uid,
-                        UserSkill.skill == skill)
+        return (self.session.query(UserData.uid)
+                .filter(UserData.uid == uid,
+                        UserData.skills.op('&')(skill.bit) != 0)
                 .first()) is not None
 
+    def _update_user_skills(self, uid: int, mask: int, value) -> Tuple[Skill, ...]:
+        """Set the skill mask of a user to `value` (an expression of the current mask) in one statement
+
+        `mask` is the initial value if the user has no data row yet. Return the new skills."""
+        stmt = pg_insert(UserData).values(uid=uid, skills=mask)
+        try:
+            new_mask = self.session.execute(stmt
+                                            .on_conflict_do_update(index_elements=[UserData.uid],
+                                                                   set_={"skills": value})
+                                            .returning(UserData.skills)).scalar_one()
+            self._notify('user', uid)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        skills = skills_from_mask(new_mask)
+        self.profiles.update(uid, skills=skills)
+        self.skill_index.set(uid, new_mask)
+        self.segments.update(uid, skills=new_mask)
+        return skills
+
     def add_user_skills(self,
                         uid: int,
-                        skills: Union[Skill, List[Skill]]) -> None:
-        """Add skills to a user."""
+                        skills: Union[Skill, List[Skill]]) -> Tuple[Skill, ...]:
+        """Add skills to a user. Return the new skills."""
         if isinstance(skills, Skill):
             skills = [skills]
-        for s in skills:
-            if not self.skill_exists(uid, s):
-                self.session.add(UserSkill(uid=uid, skill=s))
-        self.session.commit()
+        mask = skill_mask(skills)
+        return self._update_user_skills(uid, mask, UserData.skills.op('|')(mask))
 
     def set_user_skills(self,
                         uid: int,
-                        skills: Union[Skill, List[Skill]]) -> None:
-        """Set the skills of a user."""
-        self.del_user_skills_all(uid)
-        self.add_user_skills(uid, skills)
-
-    def remove_user_skill(self, uid: int, skill: Skill) -> None:
-        """Delete a skill from a user"""
-        (self.session.query(UserSkill)
-         .filter(UserSkill.uid == uid,
-                 UserSkill.skill == skill)
-         .delete())
-        self.session.commit()
+                        skills: Union[Skill, List[Skill]]) -> Tuple[Skill, ...]:
+        """Set the skills of a user. Return the new skills."""
+        if isinstance(skills, Skill):
+            skills = [skills]
+        mask = skill_mask(skills)
+        return self._update_user_skills(uid, mask, mask)
+
+    def remove_user_skill(self, uid: int, skill: Skill) -> Tuple[Skill, ...]:
+        """Delete a skill from a user. Return the new skills."""
+        return self._update_user_skills(uid, 0, UserData.skills.op('&')(~skill.bit))
 
     def del_user_skills_all(self, uid: int) -> None:
         """Delete all skills from a user"""
-        self.session.query(UserSkill).filter(UserSkill.uid == uid).delete()
-        self.session.commit()
+        self._update_user_skills(uid, 0, 0)
     # endregion
 
     # region Coworking management
+    def _get_coworking_state(self):
+        """Get the current coworking state row (primary key lookup)"""
+        state = (self.session.query(CoworkingCurrent.version,
+                                    CoworkingCurrent.status,
+                                    CoworkingCurrent.uid,
+                                    CoworkingCurrent.since,
+                                    CoworkingCurrent.updated,
+                                    CoworkingCurrent.temp_delta)
+                 .filter(CoworkingCurrent.id == 1)
+                 .first())
+        if state is None:
+            raise AttributeError("Current coworking status not found")
+        return state
+
     def get_coworking_status(self) -> CoworkingStatus:
         """Get the status of the coworking space"""
-        user = (self.session.query(Coworking)
-                .order_by(Coworking.id.desc())
-                .first())
-        if user is None:
-            raise AttributeError("User not found")
-        return user.status
+        return CoworkingStatus(self._get_coworking_state().status)
 
     def get_coworking_delta(self) -> int:
         """Get the delta of the coworking space"""
-        user = (self.session.query(Coworking)
-                .order_by(Coworking.id.desc())
-                .first())
-        if user is None:
-            raise AttributeError("User not found")
-        return user.temp_delta
+        return self._get_coworking_state().temp_delta
+
+    def _change_coworking_state(self, uid: int,
+                                status: CoworkingStatus | None = None,
+                                delta_mins: int | None = None,
+                                expected_version: int | None = None) -> CoworkingState | None:
+        """Change the current coworking state and record the change in one transaction.
+
+        A new status is a transition: it is added to the log (coworking_status) and the interval
+        of the previous status is rolled up. Without a status only the responsible user changes,
+        which is recorded as a handover. The change is a compare-and-set on the state version,
+        so it returns None without writing anything if the state has changed concurrently
+        (or differs from `expected_version`), the status is already set, or `uid` is already responsible."""
+        now = datetime.utcnow()
+        try:
+            current = (self.session.query(CoworkingCurrent.version,
+                                          CoworkingCurrent.status,
+                                          CoworkingCurrent.uid,
+                                          CoworkingCurrent.since)
+                       .filter(CoworkingCurrent.id == 1)
+                       .first())
+            previous = CoworkingStatus(current.status) if current is not None else None
+            if (current is None and status is None
+                    or current is not None and expected_version not in (None, current.version)  # noqa: W503
+                    or status is not None and status == previous  # noqa: W503
+                    or status is None and uid == current.uid):  # noqa: W503
+                self.session.rollback()
+                return None
+            values = {"uid": uid, "updated": now}
+            if status is not None:
+                values.update(status=status, since=now, temp_delta=delta_mins)
+            if current is None:
+                stmt = (pg_insert(CoworkingCurrent)
+                        .values(id=1, version=1, **values)
+                        .on_conflict_do_nothing(index_elements=[CoworkingCurrent.id]))
+            else:
+                # Loses to any change committed since the state was read
+                stmt = (update(CoworkingCurrent)
+                        .where(CoworkingCurrent.id == 1, CoworkingCurrent.version == current.version)
+                        .values(version=CoworkingCurrent.version + 1, **values))
+            changed = self.session.execute(stmt.returning(CoworkingCurrent.version,
+                                                          CoworkingCurrent.status,
+                                                          CoworkingCurrent.since,
+                                                          CoworkingCurrent.temp_delta)).first()
+            if changed is None:
+                self.session.rollback()
+                return None
+            if status is None:
+                self.session.add(CoworkingHandover(uid=uid, time=now, status=previous))
+            else:
+                if current is not None:
+                    analytics.rollup_interval(self.session, previous, current.since, now)
+                self.session.add(Coworking(status=status, uid=uid, time=now, temp_delta=delta_mins))
+            state = CoworkingState(changed.version, CoworkingStatus(changed.status), changed.since, now,
+                                   self._get_uname(uid), changed.temp_delta)
+            self._notify('coworking', state.version)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        is_open = state.status in analytics.OPEN_STATUSES
+        if status is not None and (previous is None or (previous in analytics.OPEN_STATUSES) != is_open):
+            self.coworking_forecast.add(now, is_open)
+        self.coworking_snapshot.update(state)
+        return state
+
+    def get_coworking_version(self) -> int:
+        """Get the version of the current coworking state (changes on every status change or handover)."""
+        return self._get_coworking_state().version
 
     def set_coworking_status(self,
                              status: CoworkingStatus,
                              uid: int,
-                             delta_mins: int = 15) -> CoworkingStatus:
-        """Update the status of the coworking space (add new entry to log)."""
-        if status == CoworkingStatus.temp_closed:
-            coworking_status = Coworking(status=status, uid=uid, temp_delta=delta_mins, time=datetime.utcnow())
-        else:
-            coworking_status = Coworking(status=status,
-                                         uid=uid,
-                                         time=datetime.utcnow())
-        self.session.add(coworking_status)
-        self.session.commit()
-        return status
+                             delta_mins: int = 15,
+                             expected_version: int | None = None) -> CoworkingStatus | None:
+        """Update the status of the coworking space (a transition).
+
+        Returns None if the status is already set or has been changed concurrently."""
+        state = self._change_coworking_state(uid, status,
+                                             delta_mins=delta_mins if status == CoworkingStatus.temp_closed else None,
+                                             expected_version=expected_version)
+        return status if state is not None else None
 
     def get_coworking_responsible(self) -> int:
         """Get the responsible uid for the coworking space key."""
-        status = (self.session.query(Coworking)
-                  .order_by(Coworking.id.desc())
-                  .first())
-        if status is None:
-            raise AttributeError("Current coworking status not found")
-        return status.uid
+        return self._get_coworking_state().uid
+
+    def _get_uname(self, uid: int | None) -> str | None:
+        """Get the username of a user (None if unknown)"""
+        if uid is None:
+            return None
+        return self.session.query(User.uname).filter(User.uid == uid).scalar()
 
     def get_coworking_responsible_uname(self) -> str:
         """Get the responsible uname for the coworking space key."""
-        uid: int = self.session.query(Coworking).order_by(Coworking.id.desc()).first().uid
-        return self.session.query(User).filter(User.uid == uid).first().uname
+        return (self.session.query(User.uname)
+                .join(CoworkingCurrent, CoworkingCurrent.uid == User.uid)
+                .filter(CoworkingCurrent.id == 1)
+                .scalar())
 
     def coworking_status_set_uid_responsible(self, uid: int) -> bool:
-        """Set the responsible uid for the coworking space key."""
-        coworking_status = (self.session.query(Coworking)
-                            .order_by(Coworking.id.desc())
-                            .first())
-        if coworking_status is None:
-            raise AttributeError("Current coworking status not found")
-        status: CoworkingStatus = coworking_status.status
-        # Create new entry
-        self.session.add(Coworking(status=status,
-                                   uid=uid,
-                                   time=datetime.utcnow()))
-        self.session.commit()
-        return True
+        """Set the responsible uid for the coworking space key (a handover).
+
+        Returns False if the user is already responsible or the state has been changed concurrently."""
+        return self._change_coworking_state(uid) is not None
+
+    def get_coworking_occupancy(self, days: int = 7) -> analytics.OccupancyReport:
+        """Get coworking open time per day and per weekday/hour from the rollups"""
+        current = (self.session.query(CoworkingCurrent.status, CoworkingCurrent.since)
+                   .filter(CoworkingCurrent.id == 1)
+                   .first())
+        return analytics.occupancy_report(self.session, days=days,
+                                          current=(current.status, current.since) if current else None)
+
+    def get_coworking_heatmap(self):
+        """Get the 7x24 weekday/hour open share array from the rollups"""
+        return analytics.occupancy_heatmap(self.session)
 
     def trim_coworking_status_log(self, limit: int = 10):
         """Trim the coworking log to the specified limit, \
            starting from the oldest entry."""
-        log = self.get_coworking_log()
-        if len(log) > limit:
-            for i in range(len(log) - limit):
-                self.session.delete(log[i])
+        if limit <= 0:
+            self.session.query(Coworking).delete(synchronize_session=False)
+            self.session.commit()
+            return
+        oldest_kept = (self.session.query(Coworking.id)
+                       .order_by(Coworking.id.desc())
+                       .offset(limit - 1)
+                       .limit(1)
+                       .scalar())
+        if oldest_kept is not None:
+            self.session.query(Coworking).filter(Coworking.id < oldest_kept).delete(synchronize_session=False)
             self.session.commit()
     # endregion
 
@@ -516,13 +1097,7 @@ class DBManager:
     # region Coworking notifications
     def change_coworking_notifications(self, cid: int, notify: bool) -> None:
         """Change coworking notifications boolean value for a chat id (cid)."""
-        # Check if the chat id is already in the database
-        if self.session.query(ChatSettings).filter(ChatSettings.cid == cid).first() is None:
-            # If not, add it
-            self.session.add(ChatSettings(cid=cid, notifications_enabled=notify))
-            return
-        self.session.query(ChatSettings).filter(ChatSettings.cid == cid).update({"notifications_enabled": notify})
-        self.session.commit()
+        self._upsert_chat_settings(cid, notifications_enabled=notify)
 
     def toggle_coworking_notifications(self, cid: int) -> bool:
         """Toggle coworking notifications for a chat id (cid)."""
@@ -532,22 +1107,11 @@ class DBManager:
 
     def get_coworking_notifications(self, cid: int) -> bool:
         """Get coworking notifications boolean value for a chat id (cid)."""
-        try:
-            user = (self.session.query(ChatSettings)
-                    .filter(ChatSettings.cid == cid)
-                    .first())
-            if user is None:
-                raise AttributeError("Chat not found")
-            status = user.notifications_enabled
-        except AttributeError:
-            status = False
-        return status
+        return self.chat_settings.get(cid).notifications_enabled
 
     def get_coworking_notification_chats(self) -> List[int]:
         """Get a dict of all chats (present in ChatSettings table) that have notifications enabled."""
-        return [c.cid for c in (self.session.query(ChatSettings)
-                                .filter(ChatSettings.notifications_enabled)
-                                .all())]
+        return self.chat_settings.cids(notifications_enabled=True)
 
     def get_coworking_notification_chats_str(self) -> str:
         """Get a structured string containing all chats that have notifications enabled."""
@@ -555,7 +1119,7 @@ class DBManager:
 
     def get_coworking_notification_enabled_count(self) -> int:
         """Get the number of chats with coworking notifications enabled."""
-        return self.session.query(ChatSettings).filter(ChatSettings.notifications_enabled).count()
+        return len(self.chat_settings.cids(notifications_enabled=True))
 
     # region Admin coworking notifications
     def coworking_notified_admin_closed_during_hours_today(self) -> bool:
@@ -636,14 +1200,7 @@ has been opened today: {exc}")
     # region Answer plaintext user messages
     def change_message_answers_status(self, cid: int, enabled: bool) -> None:
         """Enable answers to user messages for a chat id (cid)"""
-        # Check if the chat id is already in the database
-        if self.session.query(ChatSettings).filter(ChatSettings.cid == cid).first() is None:
-            self.session.add(ChatSettings(cid=cid, plaintext_answers_enabled=enabled))
-            self.session.commit()
-            return
-        # If it is, update the value
-        self.session.query(ChatSettings).filter(ChatSettings.cid == cid).update({"plaintext_answers_enabled": enabled})
-        self.session.commit()
+        self._upsert_chat_settings(cid, plaintext_answers_enabled=enabled)
 
     def set_message_answers_status(self, cid: int) -> None:
         self.change_message_answers_status(cid, True)
@@ -652,11 +1209,8 @@ has been opened today: {exc}")
         self.change_message_answers_status(cid, False)
 
     def get_message_answers_status(self, cid: int) -> bool:
-        # Check if the chat id is already in the database
-        if self.session.query(ChatSettings).filter(ChatSettings.cid == cid).first() is None:
-            self.session.add(ChatSettings(cid=cid))
-            self.session.commit()
-        return self.session.query(ChatSettings).filter(ChatSettings.cid == cid).first().plaintext_answers_enabled
+        # Unknown chats are inserted lazily by flush_pending_writes()
+        return self.chat_settings.get(cid, register=True).plaintext_answers_enabled
 
     def toggle_message_answers_status(self, cid: int) -> bool:
         if self.get_message_answers_status(cid):
@@ -668,17 +1222,55 @@ has been opened today: {exc}")
     # endregion
 
     # region Privilege management
+    def _stream_ids(self, stmt, batch_size: int = 1000) -> Iterator[int]:
+        """Yield the users.uid column of a select in keyset batches (uid > last ORDER BY uid LIMIT n)
+
+        Each batch is read in its own short transaction, so a slow consumer (e.g. a rate-limited
+        broadcast) does not hold a connection or a snapshot between batches."""
+        last = None
+        while True:
+            page = stmt if last is None else stmt.where(User.uid > last)
+            with self.engine.connect() as conn:
+                batch = conn.execute(page.order_by(User.uid).limit(batch_size)).scalars().all()
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            last = batch[-1]
+
+    def iter_chats(self, gid: int | None = None, batch_size: int = 1000) -> Iterator[int]:
+        """Stream the uids of all users (or of a group) in uid order"""
+        stmt = select(User.uid)
+        if gid is not None:
+            stmt = stmt.where(User.gid == gid)
+        return self._stream_ids(stmt, batch_size)
+
+    def iter_segment_chats(self, name: str, batch_size: int = 1000) -> Iterator[int]:
+        """Stream the uids of an audience segment (reachable users only if the segment requires it)"""
+        if not self.segments.is_available(name):
+            raise ValueError(f"Segment {name} is unknown or has no data source")
+        segment = self.segments.segments[name]
+        if segment.where is None:
+            # No SQL equivalent; iterate over a copy of the materialized set
+            yield from self.segments.members(name)
+            return
+        stmt = (select(User.uid)
+                .outerjoin(UserData, UserData.uid == User.uid)
+                .where(segment.where))
+        for uid in self._stream_ids(stmt, batch_size):
+            if not (segment.reachable_only and uid in self.segments.unreachable):
+                yield uid
+
     def get_user_chats(self) -> List[int]:
         """Get a list of all uids with GroupType user."""
-        return [i.uid for i in self.session.query(User).filter(User.gid == GroupType.users).all()]
+        return list(self.iter_chats(GroupType.users))
 
     def get_admin_chats(self) -> List[int]:
         """Get a list of all uids with GroupType admin."""
-        return [i.uid for i in self.session.query(User).filter(User.gid == GroupType.admins).all()]
+        return list(self.iter_chats(GroupType.admins))
 
     def get_all_chats(self) -> List[int]:
         """Get a list of all uids"""
-        return [i.uid for i in self.session.query(User).all()]
+        return list(self.iter_chats())
 
     @staticmethod
     def get_superadmin_uids() -> list[int]:
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""Read-only data transfer objects for database rows.
+
+DTOs are built from column queries, so they are never attached to the
+session (and its identity map) and hold no ORM instance state.
+"""
+from datetime import date, datetime
+from typing import List, NamedTuple, Tuple
+
+from modules.models import CoworkingStatus, GroupType, Skill
+
+
+class UserProfile(NamedTuple):
+    """User profile aggregate (user, user data, skills and group name)."""
+    uid: int
+    uname: str | None
+    first_name: str | None
+    last_name: str | None
+    gname: str | None
+    phone: int | None
+    email: str | None
+    birthday: date | None
+    skills: Tuple[Skill, ...]
+
+
+class UserRow(NamedTuple):
+    """Row of the users table."""
+    uid: int
+    uname: str | None
+    first_name: str | None
+    last_name: str | None
+    gid: GroupType
+
+
+class UserDataRow(NamedTuple):
+    """Row of the user_data table."""
+    uid: int
+    bio: str | None
+    resume: str | None
+    birthday: date | None
+    phone: int | None
+    email: str | None
+    skills: int  # Skill mask
+
+
+class GroupRow(NamedTuple):
+    """Row of the groups table."""
+    gid: int
+    name: str | None
+    gtype: GroupType
+
+
+class CoworkingLogRow(NamedTuple):
+    """Row of the coworking status log."""
+    id: int
+    uid: int
+    time: datetime
+    status: CoworkingStatus
+    temp_delta: int | None
+
+
+class UserPage(NamedTuple):
+    """Keyset page of users ordered by uid."""
+    users: List[UserRow]
+    has_prev: bool
+    has_next: bool
+
+
+class CoworkingLogEntry(NamedTuple):
+    """Coworking log row with the username of the user who changed the status."""
+    id: int
+    time: datetime
+    status: CoworkingStatus
+    uid: int
+    uname: str | None
+    temp_delta: int | None
+
+
+class CoworkingLogPage(NamedTuple):
+    """Keyset page of the coworking log, newest entries first."""
+    entries: List[CoworkingLogEntry]
+    has_newer: bool
+    has_older: bool
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+"""Intent matching for plaintext messages."""
+import re
+from typing import Dict, List, Tuple
+
+# region Intents
+COWORKING_STATUS = 'coworking_status'
+COWORKING_LOCATION = 'coworking_location'
+CLUBS = 'clubs'
+HELP = 'help'
+
+# Intent name -> keyword groups; an intent matches when every group has at least one hit.
+# Keywords are matched as lowercase substrings. Intents defined first win ties.
+PLAINTEXT_INTENTS: Dict[str, List[List[str]]] = {
+    COWORKING_STATUS: [['коворк', 'кв'],
+                       ['статус', 'открыт', 'закрыт']],
+    COWORKING_LOCATION: [['коворк', 'кв'],
+                         ['где наход', 'адрес', 'как пройти', 'как добраться', 'местоположен', 'кабинет']],
+    CLUBS: [['клуб'],
+            ['какие', 'список', 'вступить', 'расскаж']],
+    HELP: [['бот'],
+           ['помощь', 'помоги', 'что умеешь', 'команды']]
+}
+# endregion
+
+
+class IntentMatcher:
+    """Matches text against all intents in a single regex scan.
+
+    Keyword hits are the same as with substring checks: every occurrence of
+    every keyword counts, including occurrences that overlap or lie inside
+    a longer keyword.
+    """
+
+    def __init__(self, intents: Dict[str, List[List[str]]]):
+        """Compile the keywords of all intents into one alternation."""
+        self.intents = intents
+        keywords: Dict[str, List[Tuple[str, int]]] = {}
+        for intent, groups in intents.items():
+            for group_idx, group in enumerate(groups):
+                for keyword in group:
+                    keywords.setdefault(keyword.lower(), []).append((intent, group_idx))
+        # A match is the longest keyword at a position, so it also stands for the keywords that are its prefixes
+        self._keywords: Dict[str, List[Tuple[str, int]]] = {
+            keyword: [target for prefix, targets in keywords.items() if keyword.startswith(prefix)
+                      for target in targets]
+            for keyword in keywords}
+        # Longer keywords first so that the alternation prefers the longest match at a position
+        self._pattern = re.compile('|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)))
+
+    def scores(self, text: str) -> Dict[str, int]:
+        """Get the keyword hit count of every fully matched intent."""
+        groups_hit: Dict[str, set] = {}
+        hits: Dict[str, int] = {}
+        text = text.lower()
+        match = self._pattern.search(text)
+        while match is not None:
+            for intent, group_idx in self._keywords[match.group()]:
+                groups_hit.setdefault(intent, set()).add(group_idx)
+                hits[intent] = hits.get(intent, 0) + 1
+            # Resume right after the start (not the end) of the match, so that overlapping keywords are found too
+            match = self._pattern.search(text, match.start() + 1)
+        return {intent: hits[intent] for intent, groups in groups_hit.items()
+                if len(groups) == len(self.intents[intent])}
+
+    def match(self, text: str) -> str | None:
+        """Get the best matching intent or None."""
+        scores = self.scores(text)
+        if not scores:
+            return None
+        # max() keeps the first of equal scores, i.e. the intent defined first
+        return max((intent for intent in self.intents if intent in scores), key=lambda i: scores[i])
@@ -33,14 +33,6 @@ inlResumeMenu = InlKbMarkup().add(inlEditResumeBtn)
 inlCancelBtn = InlKbBtn('Отмена', callback_data='cancel')
 inlCancelMenu = InlKbMarkup().add(inlCancelBtn)
 
-bc_scope_users = KeyboardButton(btns.USERS)
-bc_scope_admins = KeyboardButton(btns.ADMINS)
-bc_scope_everyone = KeyboardButton(btns.EVERYONE)
-adminBroadcastScopeMenu = (ReplyKeyboardMarkup(row_width=1)
-                           .add(bc_scope_users,
-                                bc_scope_admins,
-                                bc_scope_everyone))
-
 confirmBtn = KeyboardButton(btns.CONFIRM)
 cancelBtn = KeyboardButton(btns.CANCEL)
 confirmMenu = ReplyKeyboardMarkup(resize_keyboard=True).add(confirmBtn, cancelBtn)
@@ -68,7 +60,9 @@ coworkingTempCloseDeltaMenu = (ReplyKeyboardMarkup(resize_keyboard=True).add(cwT
 botSkillsMenu = (InlKbMarkup(row_width=1).add(InlKbBtn(btns.BOT_SKILL_INSTITUTIONS,
                                                        callback_data='skill:departments'),
                                               InlKbBtn(btns.BOT_SKILL_NAVIGATION,
-                                                       callback_data='skill:navigation')))
+                                                       callback_data='skill:navigation'),
+                                              InlKbBtn(btns.BOT_SKILL_TEAMMATES,
+                                                       callback_data='skill:teammates')))
 
 
 def get_skill_inl_kb(active_skills: List[Skill]) -> InlKbMarkup:
@@ -89,6 +83,11 @@ def get_skill_inl_kb(active_skills: List[Skill]) -> InlKbMarkup:
     return kb
 
 
+def get_broadcast_scope_kb(scopes: List[str]) -> ReplyKeyboardMarkup:
+    """Get keyboard with the broadcast scope buttons."""
+    return ReplyKeyboardMarkup(row_width=1).add(*[KeyboardButton(scope) for scope in scopes])
+
+
 def get_profile_edit_fields_kb() -> InlKbMarkup:
     """Get inline keyboard with profile fields for editing."""
     kb = InlKbMarkup()
@@ -3,8 +3,10 @@
 """Models for SQLAlchemy."""
 import enum
 from datetime import datetime
+from typing import Iterable, Tuple
 # from sqlalchemy import ForeignKey
-from sqlalchemy import Column, Integer, BigInteger, Boolean, Text, Date, DateTime, JSON, TypeDecorator
+from sqlalchemy import Column, Integer, BigInteger, Boolean, Float, Text, Date, DateTime, JSON, TypeDecorator, Index, \
+    CheckConstraint
 from sqlalchemy.orm import declarative_base  # , relationship
 
 Base = declarative_base()
@@ -59,6 +61,11 @@ class Skill(enum.IntEnum):
     def __str__(self):
         return self.name.capitalize().replace('_', ' ')
 
+    @property
+    def bit(self) -> int:
+        """Bit of the skill in a skill mask."""
+        return 1 << self.value
+
 
 class CoworkingStatus(enum.IntEnum):
     """Coworking statuses."""
@@ -70,6 +77,36 @@ class CoworkingStatus(enum.IntEnum):
 # endregion
 
 
+# region Skill masks
+def skill_mask(skills: Iterable[Skill]) -> int:
+    """Get the skill mask of skills."""
+    mask = 0
+    for skill in skills:
+        mask |= skill.bit
+    return mask
+
+
+def skill_mask_set(mask: int, skill: Skill) -> int:
+    """Add a skill to a skill mask."""
+    return mask | skill.bit
+
+
+def skill_mask_clear(mask: int, skill: Skill) -> int:
+    """Remove a skill from a skill mask."""
+    return mask & ~skill.bit
+
+
+def skill_mask_test(mask: int, skill: Skill) -> bool:
+    """Check if a skill is in a skill mask."""
+    return bool(mask & skill.bit)
+
+
+def skills_from_mask(mask: int) -> Tuple[Skill, ...]:
+    """Get the skills of a skill mask (in enum order)."""
+    return tuple(skill for skill in Skill if mask & skill.bit)
+# endregion
+
+
 class User(Base):
     """Admin model for SQLAlchemy."""
     __tablename__ = 'users'
@@ -91,12 +128,14 @@ class UserData(Base):
     birthday = Column(Date)
     phone = Column(BigInteger)
     email = Column(Text)
+    skills = Column(Integer, nullable=False, default=0, server_default='0')  # Skill mask
 
 
 class UserSkill(Base):
     """User skills model for SQLAlchemy.
 
-    Multiple skills per uid are allowed."""
+    Multiple skills per uid are allowed.
+    Deprecated: skills are stored in `UserData.skills`; kept for the migration."""
     __tablename__ = 'user_skills'
     id = Column(BigInteger, primary_key=True)
     uid = Column(BigInteger)
@@ -114,8 +153,11 @@ class Group(Base):
 
 
 class Coworking(Base):
-    """Coworking status model for SQLAlchemy."""
+    """Coworking status model for SQLAlchemy.
+
+    History of status transitions; the current state is in CoworkingCurrent."""
     __tablename__ = 'coworking_status'
+    __table_args__ = (Index('ix_coworking_status_time_id', 'time', 'id'),)
     id = Column(BigInteger, primary_key=True)
     uid = Column(BigInteger)
     time = Column(DateTime, default=datetime.utcnow)
@@ -123,6 +165,30 @@ class Coworking(Base):
     temp_delta = Column(Integer, default=None)
 
 
+class CoworkingCurrent(Base):
+    """Current coworking state model for SQLAlchemy.
+
+    A single row (id = 1) that is updated in the same transaction as the history."""
+    __tablename__ = 'coworking_state'
+    __table_args__ = (CheckConstraint('id = 1', name='ck_coworking_state_single_row'),)
+    id = Column(Integer, primary_key=True, default=1)
+    version = Column(BigInteger, nullable=False, default=1)  # Incremented on every change
+    status = Column(IntEnum(CoworkingStatus), nullable=False)
+    uid = Column(BigInteger)  # Responsible user
+    since = Column(DateTime, nullable=False)  # Last status transition
+    updated = Column(DateTime, nullable=False)  # Last change, including handovers
+    temp_delta = Column(Integer, default=None)
+
+
+class CoworkingHandover(Base):
+    """Coworking responsibility handover model for SQLAlchemy."""
+    __tablename__ = 'coworking_handovers'
+    id = Column(BigInteger, primary_key=True)
+    uid = Column(BigInteger, nullable=False)
+    time = Column(DateTime, default=datetime.utcnow, nullable=False)
+    status = Column(IntEnum(CoworkingStatus))  # Status at the time of the handover
+
+
 class CoworkingTrustedUser(Base):
     """Coworking trusted users model for SQLAlchemy."""
     __tablename__ = 'coworking_trusted_users'
@@ -144,3 +210,21 @@ class ChatSettings(Base):
     cid = Column(BigInteger, primary_key=True)
     notifications_enabled = Column(Boolean, default=False)
     plaintext_answers_enabled = Column(Boolean, default=False)
+
+
+class UnreachableUser(Base):
+    """Users that could not receive a broadcast message, excluded from segments until they write again."""
+    __tablename__ = 'unreachable_users'
+    uid = Column(BigInteger, primary_key=True, autoincrement=False)
+    time = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class CoworkingRollup(Base):
+    """Coworking status time rollup model for SQLAlchemy.
+
+    Seconds spent in a status per UTC day and hour (see modules.analytics)."""
+    __tablename__ = 'coworking_rollups'
+    day = Column(Date, primary_key=True)
+    hour = Column(Integer, primary_key=True)
+    status = Column(IntEnum(CoworkingStatus), primary_key=True)
+    seconds = Column(Float, nullable=False, default=0)
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-from datetime import datetime
+from datetime import datetime, time
 
 # region Local dependencies
 from modules import btntext as btn
@@ -268,12 +268,17 @@ def get_coworking_status_reply_data(status: CoworkingStatus,
 
 def coworking_status_reply(status: CoworkingStatus,
                            responsible_uname: str = "(не назначен)",
-                           delta_mins: int = 0) -> str:
-    """Return coworking status reply string"""
+                           delta_mins: int = 0,
+                           next_change: time | None = None) -> str:
+    """Return coworking status reply string (with the usual next opening/closing time, if known)"""
     status_icon, status_str = get_coworking_status_reply_data(status,
                                                               responsible_uname=responsible_uname,
                                                               delta_mins=delta_mins)
-    return f"🔑{status_icon} Коворкинг ITAM {status_str}"
+    hint = ""
+    if next_change is not None:
+        action = "закрывается" if status in [CoworkingStatus.open, CoworkingStatus.event_open] else "открывается"
+        hint = f"\n\n🕒 Обычно в этот день {action} около {next_change:%H:%M}"
+    return f"🔑{status_icon} Коворкинг ITAM {status_str}{hint}"
 
 
 def switch_coworking_status_inline_binary_action(status: CoworkingStatus) -> str:
@@ -357,13 +362,19 @@ def stats(statistics: dict) -> str:
     cw_icon, cw_status = get_coworking_status_reply_data(statistics["coworking_status"],
                                                          responsible_account=False)
     cw_status = f"{cw_icon} {cw_status}"
-    return f"""📊 Статистика на {datetime.utcnow().strftime("%d.%m.%Y %H:%M:%S")} UTC+0
+    skills = "\n".join(f"    {skill_names()[skill.name]}: {count}"
+                       for skill, count in sorted(statistics['skills'].items(), key=lambda i: -i[1]))
+    return f"""📊 Статистика на {statistics['as_of'].strftime("%d.%m.%Y %H:%M:%S")} UTC+0
 
 💃 Пользователей: {statistics['users']}
+📬 Доступных для рассылки: {statistics['reachable_users']}
 🧑‍💻 Администраторов: {statistics['admins']}
 🔑 Статус коворкинга: {cw_status}
 💫 Изменений статуса коворкинга: {statistics['coworking_log_count']}
-🔔 Пользователей с включенными уведомлениями: {statistics['coworking_notifications']}"""
+🟢 Открытий коворкинга за неделю: {statistics['coworking_opens_week']}
+🔔 Пользователей с включенными уведомлениями: {statistics['coworking_notifications']}
+🛠 Навыки:
+{skills}"""
 
 
 def club_info_general() -> str:
@@ -455,6 +466,10 @@ def coworking_status_already_responsible() -> str:
     return """🔑🚧🔴 Ты уже отвечаешь за коворкинг!"""
 
 
+def coworking_status_already_changed() -> str:
+    return "Статус коворкинга уже изменён, обнови меню"
+
+
 def coworking_status_now_responsible() -> str:
     return """🔑🚧🟢 Теперь ты отвечаешь за коворкинг!"""
 
@@ -497,3 +512,33 @@ def coworking_status_explain(responsible_uname: str) -> str:
 
 def admin_panel_access_denied() -> str:
     return """🚧🔴 Доступ запрещен"""
+
+
+def coworking_occupancy(per_day: list, per_weekday_hour: dict) -> str:
+    """Coworking open time per day and usual opening hours per weekday"""
+    weekdays = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
+    days = "\n".join(f"{day.strftime('%d.%m')} ({weekdays[day.weekday()]}): "
+                     f"{int(secs // 3600)} ч {int(secs % 3600 // 60)} мин" for day, secs in per_day)
+    usual = []
+    for weekday in range(1, 8):
+        hours = [hour for hour in range(24) if per_weekday_hour.get((weekday, hour), 0) >= 0.5]
+        usual.append(f"{weekdays[weekday - 1]}: "
+                     f"{f'{hours[0]:02}:00–{hours[-1] + 1:02}:00' if hours else 'обычно закрыт'}")
+    usual_str = "\n".join(usual)
+    return f"""📈 Коворкинг был открыт
+
+{days}
+
+🕒 Обычно открыт
+{usual_str}"""
+
+
+def coworking_best_time(weekday: int, best: tuple | None) -> str:
+    """Usual opening hours of the coworking today (see analytics.best_time)"""
+    weekdays = ['понедельник', 'вторник', 'среду', 'четверг', 'пятницу', 'субботу', 'воскресенье']
+    if best is None:
+        return f"📊 В {weekdays[weekday - 1]} коворкинг обычно закрыт"
+    start, end, peak, share = best
+    return f"""📊 В {weekdays[weekday - 1]} коворкинг обычно открыт с {start:02}:00 до {end:02}:00
+
+Лучше всего приходить к {peak:02}:00 — в это время он открыт в {share:.0%} случаев"""
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+"""Broadcast audience segments.
+
+A segment is a named predicate over a user's group and skills. Members of
+every segment are kept as materialized uid sets that are updated per user
+whenever DBManager writes a user's group or skills, so resolving an
+audience size never loads the users table. Segments can also carry the
+same condition as an SQL clause over users/user_data, which lets the
+broadcast stream their ids from the database instead of copying a set.
+Users that could not be reached (blocked the bot, deleted account) are
+excluded until they write again; DBManager persists this set and announces
+its changes to the other processes.
+"""
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Set, Tuple
+from sqlalchemy import true
+
+from modules.models import GroupType, Skill, User, UserData, skill_mask_test
+
+
+class SegmentUser(NamedTuple):
+    """Fields of a user that segment predicates can use."""
+    uid: int
+    gid: int
+    skills: int  # Skill mask
+
+
+class Segment(NamedTuple):
+    """Named audience predicate; segments without a predicate have no data source."""
+    name: str
+    predicate: Callable[[SegmentUser], bool] | None
+    where: Any = None  # Equivalent SQL clause, if any
+    reachable_only: bool = True
+
+
+def _skill_segment(skill: Skill) -> Segment:
+    return Segment(f'skill-{skill.name}',
+                   lambda user: skill_mask_test(user.skills, skill),
+                   UserData.skills.op('&')(skill.bit) != 0)
+
+
+# region Segments
+DEFAULT_SEGMENTS: List[Segment] = [
+    Segment('all', lambda user: True, true()),
+    Segment('users', lambda user: user.gid == GroupType.users, User.gid == GroupType.users),
+    Segment('admins', lambda user: user.gid == GroupType.admins, User.gid == GroupType.admins),
+    *[_skill_segment(skill) for skill in Skill],
+    # Yandex Internship progress is not stored in the database yet
+    Segment('ya_int-not_signed_up', None),
+    Segment('ya_int-signed_up', None),
+    Segment('ya_int-not_enrolled', None),
+    Segment('ya_int-enrolled', None),
+    Segment('ya_int-not_flow_started', None),
+    Segment('ya_int-flow_started', None),
+]
+# endregion
+
+
+class SegmentEngine:
+    """Materialized uid sets of audience segments."""
+
+    def __init__(self, segments: Iterable[Segment] = DEFAULT_SEGMENTS):
+        """Initialize the engine with empty segments."""
+        self.segments: Dict[str, Segment] = {segment.name: segment for segment in segments}
+        self._users: Dict[int, SegmentUser] = {}
+        self._members: Dict[str, Set[int]] = {name: set() for name in self.segments}
+        self.unreachable: Set[int] = set()
+
+    def load(self, rows: Iterable[Tuple[int, int, int | None]], unreachable: Iterable[int] = ()) -> None:
+        """Replace the users with (uid, gid, skill mask) rows and rebuild all segments."""
+        self._users.clear()
+        self.unreachable = set(unreachable)
+        for members in self._members.values():
+            members.clear()
+        for uid, gid, skills in rows:
+            self.update(uid, gid=gid, skills=skills or 0)
+
+    def update(self, uid: int, **fields) -> None:
+        """Update fields of a user and re-evaluate the segments of this user only."""
+        user = self._users.get(uid)
+        if user is None:
+            user = SegmentUser(uid, GroupType.users, 0)
+        user = self._users[uid] = user._replace(**fields)
+        for name, segment in self.segments.items():
+            if segment.predicate is None:
+                continue
+            if segment.predicate(user):
+                self._members[name].add(uid)
+            else:
+                self._members[name].discard(uid)
+
+    def mark_unreachable(self, uid: int) -> None:
+        """Exclude a user that could not receive a message."""
+        self.unreachable.add(uid)
+
+    def mark_reachable(self, uid: int) -> None:
+        """Include a user again after they have contacted the bot."""
+        self.unreachable.discard(uid)
+
+    def is_available(self, name: str) -> bool:
+        """Check if a segment exists and can be resolved."""
+        segment = self.segments.get(name)
+        return segment is not None and segment.predicate is not None
+
+    def members(self, name: str) -> Set[int]:
+        """Get the uids of a segment."""
+        if not self.is_available(name):
+            raise ValueError(f"Segment {name} is unknown or has no data source")
+        members = self._members[name]
+        return members - self.unreachable if self.segments[name].reachable_only else set(members)
+
+    def size(self, name: str) -> int:
+        """Get the number of uids in a segment."""
+        if not self.is_available(name):
+            raise ValueError(f"Segment {name} is unknown or has no data source")
+        members = self._members[name]
+        if not self.segments[name].reachable_only:
+            return len(members)
+        return len(members) - len(members & self.unreachable)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+"""In-memory snapshot of the coworking status.
+
+DBManager updates the snapshot after every committed status change, so
+readers (the public HTTP API) never query the database. The JSON bodies
+and their ETags are encoded once per change, not once per request.
+
+Every change is also published to waiting readers (SSE streams and long
+polls): all of them await one shared asyncio.Event that is replaced and
+set on publish, so an idle subscriber is a single waiting task.
+"""
+import asyncio
+import hashlib
+import json
+from collections import deque
+from datetime import datetime
+from typing import Deque, Iterable, NamedTuple, Tuple
+
+from modules.models import CoworkingStatus
+
+OPEN_STATUSES = (CoworkingStatus.open, CoworkingStatus.event_open)
+
+
+class CoworkingState(NamedTuple):
+    """Current coworking status."""
+    version: int                   # Version of the coworking_state row
+    status: CoworkingStatus
+    since: datetime                # Time of the last status transition (UTC)
+    updated: datetime              # Time of the latest log entry, including handovers (UTC)
+    responsible_uname: str | None
+    temp_delta: int | None
+
+
+class Encoded(NamedTuple):
+    """JSON body with its strong ETag."""
+    body: bytes
+    etag: str
+
+
+def _iso(moment: datetime) -> str:
+    return moment.isoformat(timespec='seconds') + 'Z'
+
+
+def encode(obj) -> Encoded:
+    """Encode an object as compact JSON with a content-based ETag."""
+    body = json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode()
+    return Encoded(body, f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"')
+
+
+class CoworkingSnapshot:
+    """Current coworking status and the latest status transitions."""
+
+    def __init__(self, history_size: int = 50):
+        """Initialize an empty snapshot that keeps `history_size` transitions."""
+        self.history_size = history_size
+        self.state: CoworkingState | None = None
+        self._history: Deque[Tuple[datetime, CoworkingStatus]] = deque(maxlen=history_size)
+        self.status_json: Encoded | None = None
+        self.history_json: Encoded | None = None
+        self._changed = asyncio.Event()
+
+    def load(self, state: CoworkingState, history: Iterable[Tuple[datetime, CoworkingStatus]]) -> None:
+        """Replace the snapshot; `history` is (time, status) transitions, oldest first."""
+        self._history.clear()
+        self._history.extend(history)
+        self.state = state
+        self._encode_status()
+        self._encode_history()
+        self._publish()
+
+    def update(self, state: CoworkingState) -> None:
+        """Apply a committed change of the coworking state."""
+        if self.state is not None and state.version <= self.state.version:
+            return
+        transition = self.state is None or self.state.since != state.since
+        self.state = state
+        self._encode_status()
+        if transition:
+            self._history.append((state.since, state.status))
+            self._encode_history()
+        self._publish()
+
+    def _publish(self) -> None:
+        """Wake up all readers waiting for a change."""
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for the next change; return False on timeout."""
+        try:
+            # Unlike wait_for(), timeout() does not wrap the wait in another task
+            async with asyncio.timeout(timeout):
+                await self._changed.wait()
+        except TimeoutError:
+            return False
+        return True
+
+    def _encode_status(self) -> None:
+        state = self.state
+        self.status_json = encode({
+            "status": state.status.name,
+            "is_open": state.status in OPEN_STATUSES,
+            "since": _iso(state.since),
+            "updated": _iso(state.updated),
+            "responsible": state.responsible_uname,
+            "temp_delta": state.temp_delta if state.status == CoworkingStatus.temp_closed else None,
+            "version": state.version,
+        })
+
+    def _encode_history(self) -> None:
+        self.history_json = encode({
+            "history": [{"status": status.name, "time": _iso(time)} for time, status in reversed(self._history)]
+        })
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+"""Shared test setup.
+
+The bot's modules are imported from src/ (as in the container). Tests that
+need Postgres create a throwaway database on TEST_PG_HOST and are skipped
+if it is not set.
+"""
+import gc
+import logging
+import os
+import sys
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+
+# region Postgres
+@pytest.fixture
+def pg_database(monkeypatch):
+    """Empty throwaway database (skipped unless TEST_PG_HOST points to a Postgres server)."""
+    host = os.getenv('TEST_PG_HOST')
+    if not host:
+        pytest.skip("TEST_PG_HOST is not set")
+    import psycopg2
+    params = {'host': host,
+              'port': os.getenv('TEST_PG_PORT', '5432'),
+              'user': os.getenv('TEST_PG_USER', 'postgres'),
+              'password': os.getenv('TEST_PG_PASS', '')}
+    name = f'itam_test_{uuid4().hex[:12]}'
+    admin = psycopg2.connect(dbname='postgres', **params)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f'CREATE DATABASE {name}')
+    for key, value in {'PG_HOST': params['host'], 'PG_PORT': params['port'], 'PG_USER': params['user'],
+                       'PG_PASS': params['password'], 'PG_DB': name, 'PG_NOTIFY_CHANNEL': name,
+                       'DEFAULT_ADMIN_UID': '1', 'DEFAULT_ADMIN_USERNAME': 'admin',
+                       'DEFAULT_ADMIN_FNAME': 'Admin'}.items():
+        monkeypatch.setenv(key, value)
+    yield name
+    with admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE {name} WITH (FORCE)')
+    admin.close()
+
+
+@pytest.fixture
+def make_db(pg_database):
+    """Factory of DBManagers on the test database (one per simulated bot process)."""
+    from modules.db import DBManager
+    managers = []
+
+    def make() -> DBManager:
+        manager = DBManager(logging.getLogger('itam-bot-test'))
+        managers.append(manager)
+        return manager
+    yield make
+    for manager in managers:
+        manager.session.close()
+        manager.engine.dispose()
+    # DBManager.__del__ closes all sessions of the process, so collect the managers before the next test
+    managers.clear()
+    gc.collect()
+# endregion
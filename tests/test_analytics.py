@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+"""Tests for the coworking opening time forecast (modules.analytics)."""
+from datetime import datetime, time, timedelta
+
+from modules.analytics import DISPLAY_UTC_OFFSET, TransitionForecast
+
+MONDAY = datetime(2023, 1, 2)
+
+
+def utc(local_time: str, day: datetime = MONDAY) -> datetime:
+    hours, minutes = map(int, local_time.split(':'))
+    return day + timedelta(hours=hours - DISPLAY_UTC_OFFSET, minutes=minutes)
+
+
+def test_next_change_is_the_median_of_later_transitions():
+    forecast = TransitionForecast(min_samples=3)
+    forecast.load([(utc('10:05', MONDAY - timedelta(weeks=week)), True) for week in range(3)]
+                  + [(utc(closed, MONDAY - timedelta(weeks=week)), False)
+                     for week, closed in enumerate(['18:00', '19:10', '21:40'])])
+    # Closed: the coworking usually opens at 10:00 (15 minute bins)
+    assert forecast.next_change(False, now=utc('08:00')) == time(10, 0)
+    # Open: the median of the closing times later today
+    assert forecast.next_change(True, now=utc('12:00')) == time(19, 0)
+    # Transitions earlier in the day (or in the current bin) are not counted
+    assert forecast.next_change(False, now=utc('10:00')) is None
+    assert forecast.next_change(True, now=utc('18:30')) is None
+    # Other weekdays have no data
+    assert forecast.next_change(False, now=utc('08:00', MONDAY + timedelta(days=1))) is None
+
+
+def test_next_change_needs_enough_samples():
+    forecast = TransitionForecast(min_samples=3)
+    forecast.load([(utc('10:00'), True), (utc('10:00', MONDAY - timedelta(weeks=1)), True)])
+    assert forecast.next_change(False, now=utc('08:00')) is None
+    forecast.add(utc('11:00', MONDAY - timedelta(weeks=2)), True)
+    assert forecast.next_change(False, now=utc('08:00')) == time(10, 0)
+    forecast.load([])
+    assert forecast.next_change(False, now=utc('08:00')) is None
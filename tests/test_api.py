@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+"""Concurrent subscribers of the coworking status push endpoints (SSE and long polling)."""
+import asyncio
+import importlib
+import sys
+from datetime import datetime
+from types import ModuleType, SimpleNamespace
+
+import pytest
+from starlette.requests import Request
+
+from modules.models import CoworkingStatus
+from modules.snapshot import CoworkingSnapshot, CoworkingState
+
+SUBSCRIBERS = 200
+UPDATES = 5
+
+
+def state(version: int) -> CoworkingState:
+    status = CoworkingStatus.open if version % 2 else CoworkingStatus.closed
+    now = datetime(2023, 1, 1, 12, version)
+    return CoworkingState(version, status, now, now, 'admin', None)
+
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    """Snapshot served by modules.api (the bot's config, with its database, is not loaded)."""
+    snapshot = CoworkingSnapshot()
+    snapshot.load(state(1), [])
+    config = ModuleType('config')
+    config.db = SimpleNamespace(coworking_snapshot=snapshot)
+    monkeypatch.setitem(sys.modules, 'config', config)
+    api = importlib.import_module('modules.api')
+    monkeypatch.setattr(api, 'db', config.db)
+    monkeypatch.setattr(api, 'SSE_KEEPALIVE', 60)
+    return snapshot
+
+
+def request(if_none_match: str | None = None) -> Request:
+    headers = [(b'if-none-match', if_none_match.encode())] if if_none_match else []
+    return Request({'type': 'http', 'method': 'GET', 'path': '/', 'headers': headers, 'query_string': b''})
+
+
+async def until(condition, timeout: float = 5) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.001)
+
+
+def test_stream_delivers_every_update_once(snapshot):
+    from modules import api
+
+    async def subscriber(received: list):
+        async for chunk in api._status_events(None):
+            if chunk.startswith(b'id: '):
+                received.append(int(chunk.split(b'\n', 1)[0][4:]))
+
+    async def scenario():
+        received = [[] for _ in range(SUBSCRIBERS)]
+        clients = [asyncio.create_task(subscriber(events)) for events in received]
+        for version in range(1, UPDATES + 2):
+            if version > 1:
+                snapshot.update(state(version))
+            await until(lambda: all(len(events) == version for events in received))
+            await asyncio.sleep(0.01)  # Idle: no more events and no tasks besides the clients
+            assert len(asyncio.all_tasks()) == SUBSCRIBERS + 1
+        for client in clients:
+            client.cancel()
+        await asyncio.gather(*clients, return_exceptions=True)
+        return received
+    received = asyncio.run(scenario())
+    assert all(events == list(range(1, UPDATES + 2)) for events in received)
+
+
+def test_long_polls_return_on_update(snapshot):
+    from modules import api
+
+    async def scenario():
+        etag = snapshot.status_json.etag
+        polls = [asyncio.create_task(api.coworking_status_poll(request(etag), timeout=30))
+                 for _ in range(SUBSCRIBERS)]
+        await asyncio.sleep(0.01)
+        assert not any(poll.done() for poll in polls)
+        assert len(asyncio.all_tasks()) == SUBSCRIBERS + 1
+        snapshot.update(state(2))
+        responses = await asyncio.gather(*polls)
+        stale = await api.coworking_status_poll(request(etag), timeout=30)
+        current = await api.coworking_status_poll(request(snapshot.status_json.etag), timeout=0.01)
+        return responses, stale, current
+    responses, stale, current = asyncio.run(scenario())
+    assert {(r.status_code, r.body) for r in responses} == {(200, snapshot.status_json.body)}
+    assert stale.status_code == 200
+    assert current.status_code == 304
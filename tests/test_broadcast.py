@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+"""Tests for the broadcast audience (scope keyboard and unreachable users)."""
+import importlib
+import logging
+import sys
+from types import ModuleType, SimpleNamespace
+
+from sqlalchemy import text
+
+from modules import btntext
+from modules.segments import SegmentEngine
+
+from test_db_users import deliver_notifications, listen
+
+
+def test_scope_keyboard_hides_segments_without_data(monkeypatch):
+    config = ModuleType('config')
+    config.log = logging.getLogger('test')
+    config.db = SimpleNamespace(segments=SegmentEngine())
+    monkeypatch.setitem(sys.modules, 'config', config)
+    broadcast_flow = importlib.import_module('modules.bot.handlers.broadcast_flow')
+    monkeypatch.setattr(broadcast_flow, 'db', config.db)
+    buttons = [button.text for row in broadcast_flow.scope_menu().keyboard for button in row]
+    assert buttons == [btntext.USERS, btntext.ADMINS, btntext.EVERYONE]
+
+
+def test_unreachable_users_are_excluded_by_every_process(make_db):
+    db, other = make_db(), make_db()
+    assert db.add_regular_user(500, 'user', 'First', 'Last')
+    other.reload_shared_caches()
+    listener = listen(other)
+    try:
+        db.mark_unreachable(500)
+        assert deliver_notifications(other, listener, 1) == 1
+        assert 500 not in other.segments.members('all')
+        # Restarted processes load the set from the database
+        assert 500 not in make_db().segments.members('all')
+        # Writing to any process includes the user again everywhere
+        db.sync_user_profile(500, 'user', 'First', 'Last')
+        assert deliver_notifications(other, listener, 1) == 1
+    finally:
+        listener.close()
+    assert 500 in other.segments.members('all')
+    assert 500 in make_db().segments.members('all')
+
+
+def test_segment_chats_are_read_in_short_transactions(make_db):
+    db = make_db()
+    db.add_users_bulk([(uid, None, 'First', None) for uid in range(100, 107)])
+    db.mark_unreachable(103)
+    chats = db.iter_segment_chats('users', batch_size=2)
+    assert next(chats) == 100
+    # Between batches the broadcast holds no connection and no open transaction
+    assert db.session.execute(text("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database() "
+                                   "AND state LIKE 'idle in transaction%' AND pid <> pg_backend_pid()")).scalar() == 0
+    assert db.engine.pool.checkedout() == 1  # The shared session only
+    db.add_regular_user(110, 'user', 'First', 'Last')
+    assert list(chats) == [101, 102, 104, 105, 106, 110]
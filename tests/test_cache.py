@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+"""Tests for the in-memory caches (modules.cache)."""
+from modules.cache import ChatSettingsCache, ChatSettingsEntry, SkillIndex, UserSyncBuffer
+from modules.models import Skill, skill_mask
+
+BACKEND = skill_mask([Skill.backend])
+DESIGN = skill_mask([Skill.design])
+
+
+def test_skill_index_set_and_clear():
+    index = SkillIndex()
+    index.load([(10, BACKEND | DESIGN), (20, BACKEND)])
+    index.set(10, DESIGN)  # Removes backend, keeps design
+    assert index.find([Skill.backend]) == [20]
+    assert index.find([Skill.design]) == [10]
+    index.set(10, 0)
+    index.set(10, 0)  # Clearing twice must not toggle the bits back
+    assert index.count([Skill.design]) == 0
+    index.set(10, BACKEND)
+    assert index.find([Skill.backend]) == [10, 20]
+
+
+def test_skill_index_match_all_and_any():
+    index = SkillIndex()
+    index.load([(10, BACKEND | DESIGN), (20, BACKEND), (30, DESIGN), (40, 0)])
+    assert index.find([Skill.backend, Skill.design]) == [10]
+    assert index.find([Skill.backend, Skill.design], match_all=False) == [10, 20, 30]
+    assert index.count([Skill.backend, Skill.design], match_all=False) == 3
+    assert index.find([]) == []
+
+
+def test_skill_index_find_pages():
+    index = SkillIndex()
+    index.load([(uid, BACKEND) for uid in range(10)])
+    assert index.find([Skill.backend], offset=3, limit=4) == [3, 4, 5, 6]
+    assert index.find([Skill.backend], offset=8, limit=4) == [8, 9]
+    assert index.find([Skill.backend], offset=10) == []
+
+
+def test_chat_settings_cache_registers_unknown_chats():
+    cache = ChatSettingsCache()
+    cache.load([(1, True, False), (2, False, True)])
+    assert cache.get(1) == ChatSettingsEntry(True, False)
+    assert cache.get(3) == ChatSettingsEntry()
+    assert cache.pending() == []
+    cache.get(3, register=True)
+    assert cache.pending() == [3]
+    assert cache.set(3, notifications_enabled=True) == ChatSettingsEntry(True, False)
+    assert cache.pending() == []
+    assert sorted(cache.cids(notifications_enabled=True)) == [1, 3]
+    assert cache.cids(notifications_enabled=False) == [2]
+    cache.get(4, register=True)
+    cache.load([])  # Loading replaces the pending chats
+    assert cache.pending() == [] and cache.cids() == []
+
+
+def test_user_sync_buffer_misses_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('modules.cache.monotonic', lambda: now[0])
+    buffer = UserSyncBuffer(miss_ttl=60)
+    buffer.set_missing(5)
+    assert buffer.is_missing(5)
+    now[0] += 61
+    assert not buffer.is_missing(5)
+    buffer.set_missing(5)
+    buffer.add(5, 'user', 'First', None)
+    assert not buffer.is_missing(5) and buffer.is_registered(5)
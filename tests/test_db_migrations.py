@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+"""Startup migrations run by several bot processes at once (require Postgres, see conftest)."""
+from sqlalchemy import text
+
+from modules import analytics
+from modules.models import CoworkingStatus, Skill
+from test_db_users import run_concurrently
+
+
+def start_replicas(make_db, count: int = 3) -> list:
+    return run_concurrently([make_db] * count)
+
+
+def test_user_skills_migration(make_db):
+    db = make_db()
+    db.add_regular_user(500, 'user', 'First', None)
+    db.add_regular_user(501, 'other', 'Other', None)
+    # Schema before skills were stored as a mask
+    db.session.execute(text("ALTER TABLE user_data DROP COLUMN skills"))
+    db.session.execute(text("INSERT INTO user_skills (uid, skill) VALUES (500, :a), (500, :b), (501, :a)"),
+                       {"a": int(Skill.backend), "b": int(Skill.design)})
+    db.session.commit()
+    replicas = start_replicas(make_db)
+    assert replicas[0].get_user_profile(500).skills == (Skill.backend, Skill.design)
+    assert replicas[0].get_user_profile(501).skills == (Skill.backend,)
+
+
+def rollup_totals(db) -> list:
+    return db.session.execute(text("SELECT status, sum(seconds) FROM coworking_rollups "
+                                   "GROUP BY status ORDER BY status")).all()
+
+
+def test_rollups_are_rebuilt_once(make_db):
+    db = make_db()
+    db.session.execute(text("INSERT INTO coworking_status (uid, time, status) VALUES "
+                            "(1, now() - interval '3 hours', :open), (1, now() - interval '1 hour', :closed)"),
+                       {"open": int(CoworkingStatus.open), "closed": int(CoworkingStatus.closed)})
+    analytics.rebuild_rollups(db.session)
+    db.session.commit()
+    expected = rollup_totals(db)
+    assert expected
+    db.session.execute(text("DELETE FROM coworking_rollups"))
+    db.session.commit()
+    start_replicas(make_db)
+    assert rollup_totals(db) == expected
+
+
+def test_coworking_state_migration(make_db):
+    db = make_db()
+    # Log before the state row existed: the second entry is a handover that repeats the status
+    db.session.execute(text("DELETE FROM coworking_state; DELETE FROM coworking_handovers; "
+                            "DELETE FROM coworking_status"))
+    db.session.execute(text("INSERT INTO coworking_status (uid, time, status) VALUES "
+                            "(1, now() - interval '3 hours', :open), (2, now() - interval '2 hours', :open), "
+                            "(1, now() - interval '1 hour', :closed)"),
+                       {"open": int(CoworkingStatus.open), "closed": int(CoworkingStatus.closed)})
+    db.session.commit()
+    replicas = start_replicas(make_db)
+    counts = db.session.execute(text("SELECT (SELECT count(*) FROM coworking_status), "
+                                     "(SELECT count(*) FROM coworking_handovers), "
+                                     "(SELECT count(*) FROM coworking_state)")).one()
+    assert tuple(counts) == (2, 1, 1)
+    assert all(r.coworking_snapshot.state.status == CoworkingStatus.closed for r in replicas)
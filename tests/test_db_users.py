@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+"""Tests for user registration and the user caches of DBManager (require Postgres, see conftest)."""
+import random
+import select
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+
+import psycopg2
+from sqlalchemy import event, text
+
+from modules.models import Skill
+
+
+def test_profile_sync_of_user_registered_by_another_process(make_db):
+    db, other = make_db(), make_db()
+    assert other.add_regular_user(500, 'user', 'First', 'Last')
+    # Not in the startup snapshot of `db`: checked in the users table instead of asking to /start
+    assert db.sync_user_profile(500, 'renamed', 'First', 'Last')
+    assert db.user_sync.pending() == {500: ('renamed', 'First', 'Last')}
+    db.flush_pending_writes()
+    assert other.get_uname(500) == 'renamed'
+
+
+def test_profile_sync_of_unregistered_user(make_db):
+    db = make_db()
+    assert not db.sync_user_profile(600, 'user', 'First', 'Last')
+    assert db.user_sync.pending() == {}
+
+
+def deliver_notifications(db, listener, expected: int, timeout: float = 5) -> int:
+    """Apply the notifications received on a LISTEN connection (as modules.bus does) until `expected` arrive."""
+    count = 0
+    deadline = monotonic() + timeout
+    while count < expected and select.select([listener], [], [], max(deadline - monotonic(), 0))[0]:
+        listener.poll()
+        while listener.notifies:
+            db.apply_notification(listener.notifies.pop(0).payload)
+            count += 1
+    return count
+
+
+def listen(db):
+    conn = psycopg2.connect(host=db.pg_host, port=db.pg_port, user=db.pg_user,
+                            password=db.pg_pass, dbname=db.pg_db)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f'LISTEN {db.notify_channel}')
+    return conn
+
+
+def test_registration_is_announced_to_other_processes(make_db):
+    db, other = make_db(), make_db()
+    listener = listen(db)
+    try:
+        assert other.add_regular_user(500, 'user', 'First', 'Last')
+        other.set_user_skills(500, [Skill.backend])
+        assert deliver_notifications(db, listener, 2) == 2
+    finally:
+        listener.close()
+    assert db.user_sync.is_registered(500)
+    assert db.sync_user_profile(500, 'renamed', 'First', 'Last')
+    assert [u.uid for u in db.find_teammates([Skill.backend])[0]] == [500]
+    assert 500 in set(db.segments.members('users'))
+
+
+def test_reload_shared_caches(make_db):
+    db, other = make_db(), make_db()
+    other.add_regular_user(500, 'user', 'First', 'Last')
+    other.set_user_skills(500, [Skill.backend])
+    db.reload_shared_caches()
+    assert db.user_sync.is_registered(500)
+    assert db.find_teammates([Skill.backend])[1] == 1
+    assert 500 in set(db.segments.members('users'))
+
+
+def run_concurrently(calls) -> list:
+    """Run the calls in threads released at the same time; return their results in order."""
+    barrier = threading.Barrier(len(calls))
+
+    def run(call):
+        barrier.wait()
+        return call()
+    with ThreadPoolExecutor(len(calls)) as pool:
+        return list(pool.map(run, calls))
+
+
+def count_rows(db, table: str) -> int:
+    return db.session.execute(text(f'SELECT count(*) FROM {table}')).scalar()
+
+
+def test_concurrent_start_registers_once(make_db):
+    managers = [make_db() for _ in range(8)]  # One per bot process handling the same /start
+    results = run_concurrently([lambda db=db: db.add_regular_user(700, 'user', 'First', 'Last')
+                                for db in managers])
+    assert sorted(results) == [False] * 7 + [True]
+    # The default admin and the new user
+    assert count_rows(managers[0], 'users') == 2
+    assert count_rows(managers[0], 'user_data') == 2
+
+
+def test_concurrent_bulk_imports(make_db):
+    managers = [make_db() for _ in range(4)]
+    # Overlapping ranges in different orders, several batches each
+    imports = [[(uid, f'user{uid}', 'First', None) for uid in range(1000 + 50 * i, 1200 + 50 * i)]
+               for i in range(len(managers))]
+    for users in imports:
+        random.Random(len(users)).shuffle(users)
+    created = run_concurrently([lambda db=db, users=users: db.add_users_bulk(users, batch_size=64)
+                                for db, users in zip(managers, imports)])
+    assert sum(created) == len({uid for users in imports for uid, *_ in users})
+    assert count_rows(managers[0], 'users') == sum(created) + 1
+    assert count_rows(managers[0], 'user_data') == sum(created) + 1
+    assert managers[0].user_sync.is_registered(1000)
+
+
+def test_bulk_import_keeps_existing_users(make_db):
+    db = make_db()
+    db.add_regular_user(800, 'current', 'Current', 'Name')
+    assert db.add_users_bulk([(800, None, 'Stale', None), (801, 'new', 'New', None)]) == 1
+    assert db.user_sync.pending() == {}
+    db.flush_pending_writes()
+    profile = make_db().get_user_profile(800)
+    assert (profile.uname, profile.first_name) == ('current', 'Current')
+    # Known again after the first message; nothing to write while the fields are unchanged
+    assert db.sync_user_profile(800, 'current', 'Current', 'Name')
+    assert db.user_sync.pending() == {}
+
+
+def test_unregistered_user_is_looked_up_once(make_db):
+    db, other = make_db(), make_db()
+    queries = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *args: queries.append(args[2]))
+    for _ in range(5):
+        assert not db.sync_user_profile(900, 'user', 'First', None)
+    assert len(queries) == 1
+    # Registered by another process (the notification is not delivered here): /start clears the miss
+    other.add_regular_user(900, 'user', 'First', None)
+    assert not db.add_regular_user(900, 'user', 'First', None)
+    assert db.sync_user_profile(900, 'user', 'First', None)
+
+
+def test_user_profile_text(make_db):
+    db = make_db()
+    rendered = []
+
+    def render(profile):
+        rendered.append(profile.uid)
+        return f'{profile.first_name} ({profile.gname})'
+    assert db.get_user_profile_text(950, render) is None
+    db.add_regular_user(950, 'user', 'First', None)
+    assert db.get_user_profile_text(950, render) == 'First (users)'
+    assert db.get_user_profile_text(950, render) == 'First (users)'
+    assert rendered == [950]
+    db.set_user_first_name(950, 'Renamed')
+    assert db.get_user_profile_text(950, render) == 'Renamed (users)'
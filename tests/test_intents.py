@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+"""Tests for plaintext intent matching."""
+import random
+
+from modules import intents
+from modules.intents import IntentMatcher, PLAINTEXT_INTENTS
+
+
+def substring_scores(intent_map: dict, text: str) -> dict:
+    """Reference: per-intent substring checks, every (overlapping) occurrence counts."""
+    text = text.lower()
+    scores = {}
+    for intent, groups in intent_map.items():
+        if all(any(k.lower() in text for k in group) for group in groups):
+            scores[intent] = sum(sum(text.startswith(k.lower(), i) for i in range(len(text)))
+                                 for group in groups for k in group)
+    return scores
+
+
+def test_plaintext_intents():
+    matcher = IntentMatcher(PLAINTEXT_INTENTS)
+    assert matcher.match('Коворкинг сейчас открыт?') == intents.COWORKING_STATUS
+    assert matcher.match('А где находится кв?') == intents.COWORKING_LOCATION
+    assert matcher.match('Какие есть клубы?') == intents.CLUBS
+    assert matcher.match('бот, что умеешь?') == intents.HELP
+    assert matcher.match('Коворкинг') is None
+    assert matcher.match('Привет всем') is None
+
+
+def test_overlapping_keywords_are_counted():
+    intent_map = {'hours': [['open'], ['opening hours', 'hours']],
+                  'state': [['open'], ['pen']]}
+    matcher = IntentMatcher(intent_map)
+    # 'open' is inside 'opening hours', 'hours' is its suffix, 'pen' overlaps 'open'
+    assert matcher.scores('opening hours?') == {'hours': 3, 'state': 2}
+    assert matcher.scores('aaa') == {}
+
+
+def test_tie_goes_to_the_intent_defined_first():
+    matcher = IntentMatcher({'first': [['a']], 'second': [['a']]})
+    assert matcher.match('a') == 'first'
+
+
+def test_same_scores_as_substring_checks():
+    rng = random.Random(0)
+    keywords = [k for groups in PLAINTEXT_INTENTS.values() for group in groups for k in group]
+    matcher = IntentMatcher(PLAINTEXT_INTENTS)
+    for _ in range(2000):
+        text = ' '.join(rng.choice(keywords + ['привет', 'как', 'кк', 'в']) for _ in range(rng.randint(0, 6)))
+        text = text.replace(' ', '') if rng.random() < 0.3 else text  # Keywords glued together overlap
+        assert matcher.scores(text) == substring_scores(PLAINTEXT_INTENTS, text), text
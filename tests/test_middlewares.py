@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+"""Tests for the callback query answering middleware."""
+import asyncio
+import logging
+
+import pytest
+from aiogram import Bot, Dispatcher
+
+from modules.bot.middlewares import CallbackAckMiddleware
+from test_router import TOKEN, callback_update
+
+
+@pytest.fixture
+def answers(monkeypatch):
+    """Texts of the callback query answers sent to the Bot API."""
+    sent = []
+
+    async def answer_callback_query(self, callback_query_id, text=None, *args, **kwargs):
+        sent.append(text)
+        return True
+    monkeypatch.setattr(Bot, 'answer_callback_query', answer_callback_query)
+    return sent
+
+
+def make_dispatcher(grace: float) -> Dispatcher:
+    bot = Bot(token=TOKEN)
+    dp = Dispatcher(bot)
+    Bot.set_current(bot)
+    Dispatcher.set_current(dp)
+    dp.middleware.setup(CallbackAckMiddleware(logging.getLogger('itam-bot-test'), grace=grace))
+    return dp
+
+
+def test_repeated_taps_are_dropped_only_while_handled(answers):
+    dp, calls = make_dispatcher(grace=10), []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def refresh(call):
+            calls.append(call.data)
+            await release.wait()
+            await call.answer('Updated')
+        dp.register_callback_query_handler(refresh)
+        first = asyncio.ensure_future(dp.process_update(callback_update('admin:stats', update_id=1)))
+        await asyncio.sleep(0)
+        await dp.process_update(callback_update('admin:stats', update_id=2))  # Still being handled: dropped
+        release.set()
+        await first
+        await dp.process_update(callback_update('admin:stats', update_id=3))  # Deliberate repeated tap
+    asyncio.run(scenario())
+    assert calls == ['admin:stats', 'admin:stats']
+    assert answers == [None, 'Updated', 'Updated']
+
+
+def test_slow_handler_is_answered_after_grace(answers):
+    dp = make_dispatcher(grace=0.01)
+
+    async def scenario():
+        async def slow(call):
+            await asyncio.sleep(0.05)
+            await call.answer('Too late')
+        dp.register_callback_query_handler(slow)
+        await dp.process_update(callback_update('coworking:status'))
+    asyncio.run(scenario())
+    assert answers == [None]
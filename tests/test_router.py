@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+"""Tests for the hash-indexed update router (dispatched through a real aiogram Dispatcher)."""
+import asyncio
+
+import pytest
+from aiogram import Bot, Dispatcher, types
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+
+from modules.bot.router import UpdateRouter
+
+TOKEN = '123456789:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA'
+USER = {'id': 1, 'is_bot': False, 'first_name': 'Test'}
+PRIVATE = {'id': 1, 'type': 'private'}
+GROUP = {'id': -100, 'type': 'supergroup', 'title': 'Group'}
+
+
+def message_update(text: str, chat: dict = PRIVATE, update_id: int = 1) -> types.Update:
+    entities = ([{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+                if text.startswith('/') else [])
+    return types.Update(**{'update_id': update_id,
+                           'message': {'message_id': 1, 'date': 0, 'chat': chat,
+                                       'from': USER, 'text': text, 'entities': entities}})
+
+
+def callback_update(data: str, update_id: int = 1) -> types.Update:
+    return types.Update(**{'update_id': update_id,
+                           'callback_query': {'id': '1', 'chat_instance': '1', 'from': USER, 'data': data,
+                                              'message': {'message_id': 1, 'date': 0, 'chat': PRIVATE,
+                                                          'from': USER, 'text': 'menu'}}})
+
+
+@pytest.fixture
+def dp():
+    bot = Bot(token=TOKEN)
+    dispatcher = Dispatcher(bot, storage=MemoryStorage())
+    Bot.set_current(bot)
+    Dispatcher.set_current(dispatcher)
+    yield dispatcher
+    asyncio.run(dispatcher.storage.close())
+
+
+def dispatch(dp: Dispatcher, update: types.Update) -> None:
+    asyncio.run(dp.process_update(update))
+
+
+def recorder(calls: list, name: str):
+    async def handler(obj, **kwargs):
+        calls.append(name)
+    return handler
+
+
+def test_command_and_text(dp):
+    router, calls = UpdateRouter(dp), []
+    router.register_message_handler(recorder(calls, 'start'), commands=['start'])
+    router.register_message_handler(recorder(calls, 'button'), text='Button')
+    dispatch(dp, message_update('/start'))
+    dispatch(dp, message_update('/START extra'))
+    dispatch(dp, message_update('Button'))
+    assert calls == ['start', 'start', 'button']
+
+
+def test_exact_wins_over_prefix_and_longest_prefix(dp):
+    router, calls = UpdateRouter(dp), []
+    router.register_callback_query_handler(recorder(calls, 'profile'), text_startswith='profile:')
+    router.register_callback_query_handler(recorder(calls, 'edit'), text_startswith='profile:edit:')
+    router.register_callback_query_handler(recorder(calls, 'exact'), text='profile:edit:bio')
+    dispatch(dp, callback_update('profile:edit:bio'))
+    dispatch(dp, callback_update('profile:edit:name'))
+    dispatch(dp, callback_update('profile:view'))
+    assert calls == ['exact', 'edit', 'profile']
+
+
+def test_remaining_filters(dp):
+    router, calls = UpdateRouter(dp), []
+    router.register_message_handler(recorder(calls, 'group'), commands=['stats'], chat_type=['supergroup'])
+    router.register_message_handler(recorder(calls, 'private'), commands=['stats'])
+    router.register_message_handler(recorder(calls, 'denied'), lambda message: False, text='Secret')
+    dispatch(dp, message_update('/stats', chat=GROUP))
+    dispatch(dp, message_update('/stats'))
+    dispatch(dp, message_update('Secret'))
+    assert calls == ['group', 'private']
+
+
+def test_state_filter(dp):
+    router, calls = UpdateRouter(dp), []
+    router.register_message_handler(recorder(calls, 'any'), commands=['cancel'], state='*')
+    router.register_message_handler(recorder(calls, 'idle'), commands=['edit'])
+    asyncio.run(dp.current_state(chat=PRIVATE['id'], user=USER['id']).set_state('Editing:bio'))
+    dispatch(dp, message_update('/edit'))
+    dispatch(dp, message_update('/cancel'))
+    assert calls == ['any']
+
+
+def test_falls_through_to_generic_handlers(dp):
+    router, calls = UpdateRouter(dp), []
+    router.register_message_handler(recorder(calls, 'denied'), lambda message: False, text='Button')
+    router.register_message_handler(recorder(calls, 'generic'))
+    dispatch(dp, message_update('Button'))
+    dispatch(dp, message_update('Unknown'))
+    assert calls == ['generic', 'generic']
+
+
+def test_filter_data_is_passed_to_handler(dp):
+    router, received = UpdateRouter(dp), []
+
+    async def handler(message: types.Message, command):
+        received.append(command.args)
+    router.register_message_handler(handler, commands=['find'])
+    dispatch(dp, message_update('/find python'))
+    assert received == ['python']
+
+
+def test_multiple_indexed_keys_rejected(dp):
+    router = UpdateRouter(dp)
+    with pytest.raises(ValueError):
+        router.register_message_handler(recorder([], 'x'), commands=['a'], text='b')
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+"""Tests for the broadcast audience segments (modules.segments)."""
+import pytest
+
+from modules.models import GroupType, Skill, skill_mask
+from modules.segments import SegmentEngine
+
+
+@pytest.fixture
+def engine() -> SegmentEngine:
+    engine = SegmentEngine()
+    engine.load([(1, GroupType.admins, None),
+                 (2, GroupType.users, skill_mask([Skill.backend])),
+                 (3, GroupType.users, 0)])
+    return engine
+
+
+def test_segments_are_materialized(engine):
+    assert engine.members('all') == {1, 2, 3}
+    assert engine.members('admins') == {1}
+    assert engine.members('users') == {2, 3}
+    assert engine.members('skill-backend') == {2}
+    assert engine.size('skill-design') == 0
+
+
+def test_update_moves_a_user_between_segments(engine):
+    engine.update(2, gid=GroupType.admins, skills=skill_mask([Skill.design]))
+    assert engine.members('admins') == {1, 2}
+    assert engine.members('users') == {3}
+    assert engine.members('skill-backend') == set()
+    assert engine.members('skill-design') == {2}
+    engine.update(4)  # A new user gets the default group
+    assert engine.members('users') == {3, 4}
+
+
+def test_unreachable_users_are_excluded(engine):
+    engine.mark_unreachable(3)
+    assert engine.members('users') == {2}
+    assert engine.size('users') == 1
+    assert engine.size('all') == 2
+    engine.mark_reachable(3)
+    assert engine.members('users') == {2, 3}
+    engine.load([(3, GroupType.users, 0)], unreachable=[3])
+    assert engine.size('all') == 0
+
+
+def test_segments_without_data_source(engine):
+    assert engine.is_available('users')
+    assert not engine.is_available('ya_int-enrolled')
+    assert not engine.is_available('unknown')
+    with pytest.raises(ValueError):
+        engine.members('ya_int-enrolled')
+    with pytest.raises(ValueError):
+        engine.size('unknown')